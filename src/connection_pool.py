@@ -0,0 +1,139 @@
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available before the checkout timeout."""
+
+
+class PooledConnection:
+    """A live connection plus the bookkeeping the pool needs to manage it."""
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.autocommit = False
+        self.statement_cache = None
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived connections with checkout/return semantics.
+
+    `factory` is called to open a new connection whenever the pool has no idle
+    connection to hand out and fewer than `max_size` are checked out. Idle
+    connections older than `idle_timeout` seconds are closed, and connections
+    that sat idle for longer than `health_check_interval` seconds are pinged
+    before being handed out again.
+    """
+    def __init__(self, factory, max_size=5, idle_timeout=300, health_check_interval=30, checkout_timeout=10):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self.stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'waits': 0,
+        }
+
+    def acquire(self):
+        """Check out a connection, opening a new one if the pool has room"""
+        deadline = time.monotonic() + self.checkout_timeout
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+
+                self._prune_idle()
+
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if self._is_healthy(pooled):
+                        pooled.last_used = time.monotonic()
+                        self._in_use += 1
+                        self.stats['reused'] += 1
+                        return pooled
+                    self._discard(pooled)
+
+                if self._in_use < self.max_size:
+                    # Reserve the slot before releasing the lock to open the connection
+                    self._in_use += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No connection available after {self.checkout_timeout}s")
+                self.stats['waits'] += 1
+                self._condition.wait(remaining)
+
+        try:
+            pooled = PooledConnection(self.factory())
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self.stats['created'] += 1
+        return pooled
+
+    def release(self, pooled, discard=False):
+        """Return a checked out connection so the next caller can reuse it"""
+        with self._condition:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._discard(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def close_all(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._condition.notify_all()
+
+    def size(self):
+        """Returns (idle, in_use) connection counts"""
+        with self._condition:
+            return len(self._idle), self._in_use
+
+    def _prune_idle(self):
+        if self.idle_timeout is None:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [pooled for pooled in self._idle if pooled.last_used < cutoff]
+        for pooled in expired:
+            self._idle.remove(pooled)
+            self._discard(pooled)
+
+    def _is_healthy(self, pooled):
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            return bool(pooled.connection.is_connected())
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        self.stats['discarded'] += 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
@@ -2,11 +2,14 @@ from datetime import datetime
 
 from database_connector import DatabaseConnector
 from config.config_loader import ConfigLoader
+from .metadata_cache import MetadataCache
+from .transaction_fingerprint import backfill_fingerprints
 
 class AccountDBService():
     def __init__(self, db_connector) -> None:
         self.db_connector: DatabaseConnector = db_connector
         self.json_config_loader = ConfigLoader()
+        self.metadata_cache = MetadataCache.for_connector(self.db_connector)
         
     def add_account(self, name, balance, account_type):
         date_created = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -23,6 +26,7 @@ class AccountDBService():
                 (date_created, name, balance, account_type, is_credit)
             )
         if result == 1:
+            self.metadata_cache.invalidate_accounts()
             print("Account has successfully been added")
         else:
             print("Error with insert query")
@@ -39,6 +43,8 @@ class AccountDBService():
         """
 
         result = self.db_connector.execute_query(query, (id,))
+        if result:
+            self.metadata_cache.invalidate_accounts()
 
         print(f"The result from deletion is {result}")
 
@@ -59,12 +65,13 @@ class AccountDBService():
             """
         else:
             print("Must use arg id or name")
+            self.db_connector.close()
             return
         
         if id is not None:
-            result = self.db_connector.execute_query(query, (id,))
+            result = self.db_connector.execute_query(query, (id,), prepared=True)
         else:
-            result = self.db_connector.execute_query(query, (name,))
+            result = self.db_connector.execute_query(query, (name,), prepared=True)
 
         self.db_connector.close()
         
@@ -92,7 +99,7 @@ class AccountDBService():
         WHERE id = %s
         """
 
-        result = self.db_connector.execute_query(query, (amount, id))
+        result = self.db_connector.execute_query(query, (amount, id), prepared=True)
 
         if result == 1:
             print("Balance successfully modified")
@@ -118,11 +125,14 @@ class AccountDBService():
         return result
 
     def transfer_transactions(self, account_id, transfer_account_id):
+        """Moves every transaction of account_id to transfer_account_id in one statement.
+        The fingerprint includes the account, so the moved rows are cleared and then
+        fingerprinted again in batches, like rows stored before fingerprints existed."""
         self.db_connector.connect()
         
         query = """
         UPDATE transactions
-        SET account = %s
+        SET account = %s, fingerprint = NULL
         WHERE account = %s
         """
         
@@ -134,6 +144,9 @@ class AccountDBService():
             self.db_connector.set_safe_updates(True)
             print(f"Error transferring transactions: {e}")
             rows_affected = None
+
+        if rows_affected:
+            backfill_fingerprints(self.db_connector)
         
         self.db_connector.close()
 
@@ -151,7 +164,7 @@ class AccountDBService():
         WHERE id = %s
         """
 
-        rows_affected = self.db_connector.execute_query(query, (amount, amount, id,))
+        rows_affected = self.db_connector.execute_query(query, (amount, amount, id,), prepared=True)
         
         self.db_connector.close()
         
@@ -180,7 +193,7 @@ class AccountDBService():
         END
         """
 
-        result = self.db_connector.execute_query(query, (from_account_id, to_account_id, amount))
+        result = self.db_connector.execute_query(query, (from_account_id, to_account_id, amount), prepared=True)
 
         self.db_connector.close()
 
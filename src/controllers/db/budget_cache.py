@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+from .connector_cache import ConnectorCache
+
+
+class BudgetCache(ConnectorCache):
+    """LRU cache of BudgetDBService.search_all results keyed by (year, month).
+
+    The all-time budget is cached under (None, None). Writes made through
+    TransactionDBService or CategoriesDBService drop the entries they make
+    stale; entries are otherwise kept until evicted.
+    """
+    def __init__(self, max_size=24):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, year, month):
+        """Returns a copy of the cached result, or None on a miss"""
+        entry = self._entries.get((year, month))
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        self._entries.move_to_end((year, month))
+        self.stats['hits'] += 1
+        return list(entry)
+
+    def put(self, year, month, result):
+        self._entries[(year, month)] = list(result)
+        self._entries.move_to_end((year, month))
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def invalidate_periods(self, periods):
+        """Drops the months given as year * 100 + month, and the all-time budget that includes them"""
+        keys = {(period // 100, period % 100) for period in periods}
+        if keys:
+            keys.add((None, None))
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def invalidate_categories(self):
+        """Drops every entry after a category or goal change.
+
+        Each cached budget lists every category with its goal, so any such
+        change makes every entry stale.
+        """
+        self.stats['invalidations'] += len(self._entries)
+        self._entries.clear()
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,91 +1,185 @@
+from array import array
+from datetime import date
+
 from database_connector import DatabaseConnector
 
+from .budget_cache import BudgetCache
 from .categories_db_service import CategoriesDBService
+from .category_totals_db_service import CategoryTotalsDBService
+
+class BudgetMatrix():
+    """Category x month balances returned by BudgetDBService.search_matrix.
+
+    `categories` holds (id, name, type) in id order and `periods` the months as
+    year * 100 + month, oldest first. `balances` is one flat array of doubles,
+    row major: the balance of category i in period j is at i * len(periods) + j.
+    `goals` holds one goal per category.
+    """
+    def __init__(self, categories, periods) -> None:
+        self.categories = categories
+        self.periods = periods
+        self.balances = array('d', [0.0]) * (len(categories) * len(periods))
+        self.goals = array('d', [0.0]) * len(categories)
+
+    def row(self, index):
+        """Balances of the category at `index` for every period"""
+        width = len(self.periods)
+        return self.balances[index * width:(index + 1) * width]
+
+    def column(self, period):
+        """Balances of every category for one period"""
+        return self.balances[self.periods.index(period)::len(self.periods)]
+
+    def value(self, index, period):
+        return self.balances[index * len(self.periods) + self.periods.index(period)]
+
 
 class BudgetDBService():
     def __init__(self, db_connector) -> None:
         self.db_connector: DatabaseConnector = db_connector
 
         self.categories_db_service = CategoriesDBService(self.db_connector)
+        self.budget_cache = BudgetCache.for_connector(self.db_connector)
 
     def search_all(self, month=None, year=None):
-        """Returns category_names, category_types, (SUM of all transactions with same category_id), goals"""
+        """Returns (name, type, SUM of all transactions with same category_id, goal) for every category, ordered by id.
+
+        Categories, per category balances and goals are joined in one statement,
+        so a refresh costs a single round trip. Balances come from the
+        category_month_totals summary, not from the raw transactions.
+        Results are kept in the connector's BudgetCache until a write touches them.
+        """
+        statement = self._search_all_query(month, year)
+        if statement is None:
+            print("Month or Year not selected!")
+            return None
+
+        cached = self.budget_cache.get(year, month)
+        if cached is not None:
+            return cached
+
+        self.db_connector.connect()
+
+        result = self.db_connector.execute_query(*statement)
+
+        self.db_connector.close()
+
+        if result is not None:
+            self.budget_cache.put(year, month, result)
+
+        return result
+
+    def search_matrix(self, months=12, month=None, year=None):
+        """Returns a BudgetMatrix of every category over the `months` months ending with (month, year).
 
-        category_names = self.categories_db_service.select_category_names()
-        category_types = self.categories_db_service.select_category_types()
+        Without month and year the matrix ends with the current month. All
+        periods are read in one statement, so a year over year view costs a
+        single round trip instead of one search_all per month. Raises
+        ValueError when months is less than 1.
+        """
+        if months < 1:
+            raise ValueError(f"A budget matrix needs at least one month, got {months}")
 
         if month is None and year is None:
-            balance_query = """
-            SELECT
-                t.category,
-                SUM(CASE
-                    WHEN t.type = 'Income' THEN -t.amount
-                    ELSE t.amount
-                END) as net_amount
-            FROM transactions t
-            LEFT JOIN categories c ON t.category = c.id
-            WHERE c.name != 'Transfer'
-            GROUP BY t.category
-            """
-
-            goals_query = """
-            SELECT 
-                category_id,
-                goal
-            FROM budget_goals
-            """
-        elif month is not None and year is not None:
-            balance_query = """
+            today = date.today()
+            month, year = today.month, today.year
+        elif month is None or year is None:
+            print("Month or Year not selected!")
+            return None
+
+        periods = CategoryTotalsDBService.periods_ending(year, month, months)
+
+        query = """
+        SELECT
+            c.id,
+            c.name,
+            c.type,
+            COALESCE(g.goal, 0) AS goal,
+            t.period,
+            t.net_amount
+        FROM categories c
+        LEFT JOIN category_month_totals t
+            ON t.category_id = c.id AND c.name != 'Transfer' AND t.period >= %s AND t.period <= %s
+        LEFT JOIN (
             SELECT
-                t.category,
-                SUM(CASE
-                    WHEN t.type = 'Income' THEN -t.amount
-                    ELSE t.amount
-                END) as net_amount
-            FROM transactions t
-            LEFT JOIN categories c ON t.category = c.id
-            WHERE YEAR(t.date) = %s AND MONTH(t.date) = %s AND c.name != 'Transfer'
-            GROUP BY t.category
-            """
-            
-            goals_query = """
-            SELECT 
                 category_id,
-                goal
+                MAX(goal) AS goal
             FROM budget_goals
-            """
-        else:
-            print("Month or Year not selected!")
-            return None
+            GROUP BY category_id
+        ) g ON g.category_id = c.id
+        ORDER BY c.id, t.period
+        """
 
         self.db_connector.connect()
 
-        # Execute queries with parameters if filtering by month/year
-        if month is not None and year is not None:
-            balance_result = self.db_connector.execute_query(balance_query, (year, month))
-        else:
-            balance_result = self.db_connector.execute_query(balance_query)
-            
-        goals_result = self.db_connector.execute_query(goals_query)
+        result = self.db_connector.execute_query(query, (periods[0], periods[-1]))
 
         self.db_connector.close()
 
-        # Sort each by ID and create lookup dictionaries
-        names_dict = {item[0]: item[1] for item in sorted(category_names)} # type: ignore
-        types_dict = {item[0]: item[1] for item in sorted(category_types)} # type: ignore
-        balance_dict = {item[0]: item[1] for item in sorted(balance_result)} if balance_result else {} # type: ignore
-        goals_dict = {item[0]: item[1] for item in sorted(goals_result)} if goals_result else {} # type: ignore
+        if result is None:
+            return None
+
+        categories = []
+        goals = []
+        cells = []
+        for category_id, name, category_type, goal, period, net_amount in result: # type: ignore
+            if not categories or categories[-1][0] != category_id:
+                categories.append((category_id, name, category_type))
+                goals.append(float(goal))
+            if period is not None:
+                cells.append((len(categories) - 1, period, float(net_amount)))
 
-        # Get all unique IDs and sort them
-        all_ids = sorted(set(names_dict.keys()) | set(types_dict.keys()) | set(balance_dict.keys()) | set(goals_dict.keys()))
+        matrix = BudgetMatrix(categories, periods)
+        matrix.goals = array('d', goals)
+        columns = {period: j for j, period in enumerate(periods)}
+        for index, period, net_amount in cells:
+            matrix.balances[index * len(periods) + columns[period]] = net_amount
+        return matrix
 
-        # Create combined tuples (name, type, balance, goal)
-        result = []
-        for category_id in all_ids:
-            name = names_dict.get(category_id, "Unknown")
-            category_type = types_dict.get(category_id, "Unknown") 
-            balance = balance_dict.get(category_id, 0.0)
-            goal = goals_dict.get(category_id, 0.0)
-            result.append((name, category_type, balance, goal))
+    def explain_search_all(self, month=None, year=None):
+        """Returns the execution plan of search_all, to confirm the month is an index lookup
 
-        return result
+            plan = budget_db_service.explain_search_all(month=3, year=2024)
+            db.index_used(plan, 'uq_category_month_totals_period_category')
+        """
+        statement = self._search_all_query(month, year)
+        if statement is None:
+            print("Month or Year not selected!")
+            return None
+        return self.db_connector.explain(*statement)
+
+    def _search_all_query(self, month, year):
+        if month is None and year is None:
+            period_filter = ""
+            params = None
+        elif month is not None and year is not None:
+            period_filter = "WHERE period = %s"
+            params = (CategoryTotalsDBService.period(date(year, month, 1)),)
+        else:
+            return None
+
+        query = f"""
+        SELECT
+            c.name,
+            c.type,
+            COALESCE(b.net_amount, 0) AS balance,
+            COALESCE(g.goal, 0) AS goal
+        FROM categories c
+        LEFT JOIN (
+            SELECT
+                category_id,
+                SUM(net_amount) AS net_amount
+            FROM category_month_totals
+            {period_filter}
+            GROUP BY category_id
+        ) b ON b.category_id = c.id AND c.name != 'Transfer'
+        LEFT JOIN (
+            SELECT
+                category_id,
+                MAX(goal) AS goal
+            FROM budget_goals
+            GROUP BY category_id
+        ) g ON g.category_id = c.id
+        ORDER BY c.id
+        """
+        return query, params
@@ -2,9 +2,14 @@ from datetime import datetime
 
 from database_connector import DatabaseConnector
 
+from .budget_cache import BudgetCache
+from .metadata_cache import MetadataCache
+
 class CategoriesDBService():
     def __init__(self, db_connector) -> None:
         self.db_connector: DatabaseConnector = db_connector
+        self.budget_cache = BudgetCache.for_connector(self.db_connector)
+        self.metadata_cache = MetadataCache.for_connector(self.db_connector)
 
     def add_category(self, name, category_type):
         date_created = datetime.now().strftime('%Y-%m-%d')
@@ -21,6 +26,8 @@ class CategoriesDBService():
                 (date_created, name, category_type)
                 )
         if result == 1:
+            self.budget_cache.invalidate_categories()
+            self.metadata_cache.invalidate_categories()
             print("Category has been successfully added")
         else:
             print("Error with insert query")
@@ -39,6 +46,8 @@ class CategoriesDBService():
         result = self.db_connector.execute_query(query, (id,))
 
         if result == 1:
+            self.budget_cache.invalidate_categories()
+            self.metadata_cache.invalidate_categories()
             print(f"successfully deleted category id: {id}")
         else:
             print(f"Error deleting category")
@@ -53,7 +62,7 @@ class CategoriesDBService():
         search_query = """
         SELECT id FROM categories WHERE name = %s
         """
-        category_result = self.db_connector.execute_query(search_query, (category_name,))
+        category_result = self.db_connector.execute_query(search_query, (category_name,), prepared=True)
         
         if not category_result:
             self.db_connector.close()
@@ -68,6 +77,8 @@ class CategoriesDBService():
         """
         
         result = self.db_connector.execute_query(insert_query, (category_id, goal_amount, date_created))
+        if result:
+            self.budget_cache.invalidate_categories()
 
         self.db_connector.close()
         return result
@@ -82,6 +93,8 @@ class CategoriesDBService():
         """
 
         result = self.db_connector.execute_query(query, (goal, category_id))
+        if result:
+            self.budget_cache.invalidate_categories()
 
         self.db_connector.close()
         return result
@@ -100,12 +113,13 @@ class CategoriesDBService():
             """
         else:
             print("Must use arg id or name")
+            self.db_connector.close()
             return
 
         if id is not None:
-            result = self.db_connector.execute_query(query, (id,))
+            result = self.db_connector.execute_query(query, (id,), prepared=True)
         else:
-            result = self.db_connector.execute_query(query, (name,))
+            result = self.db_connector.execute_query(query, (name,), prepared=True)
 
         self.db_connector.close()
         
@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import date as date_type
+from decimal import Decimal
+
+from database_connector import DatabaseConnector, TransactionError
+
+from .budget_cache import BudgetCache
+
+# Net amount as the budget counts it: income reduces the category balance
+SIGNED_AMOUNT = "CASE WHEN t.type = 'Income' THEN -t.amount ELSE t.amount END"
+PERIOD = "YEAR(t.date) * 100 + MONTH(t.date)"
+
+UPSERT = """
+ON DUPLICATE KEY UPDATE
+    net_amount = net_amount + VALUES(net_amount),
+    txn_count = txn_count + VALUES(txn_count)
+"""
+
+
+class CategoryTotalsDBService():
+    """Maintains category_month_totals, the per category and month sums the budget reads.
+
+    Each row holds the net amount and transaction count of one category in one
+    period (year * 100 + month). Writers to transactions call add_rows(),
+    add_where() or subtract_where() with the connection they already hold,
+    inside the same DB transaction as their own write.
+    """
+    def __init__(self, db_connector) -> None:
+        self.db_connector: DatabaseConnector = db_connector
+
+    @staticmethod
+    def period(value):
+        """Period key of a date or 'YYYY-MM-DD' string"""
+        if isinstance(value, date_type):
+            return value.year * 100 + value.month
+        return int(str(value)[:4]) * 100 + int(str(value)[5:7])
+
+    @staticmethod
+    def periods_ending(year, month, count):
+        """The `count` consecutive periods ending with (year, month), oldest first"""
+        index = year * 12 + month - 1
+        return [(i // 12) * 100 + i % 12 + 1 for i in range(index - count + 1, index + 1)]
+
+    def add_rows(self, rows):
+        """Adds new transactions given as (category_id, date, amount, transaction_type).
+        Rows are summed per category and month first, so a batch costs one statement."""
+        totals = defaultdict(lambda: [Decimal(0), 0])
+        for category_id, date, amount, transaction_type in rows:
+            if category_id is None:
+                continue
+            amount = Decimal(str(amount))
+            key = (category_id, self.period(date))
+            totals[key][0] += -amount if transaction_type == 'Income' else amount
+            totals[key][1] += 1
+
+        if not totals:
+            return 0
+
+        query = f"""
+        INSERT INTO category_month_totals (category_id, period, net_amount, txn_count)
+        VALUES (%s, %s, %s, %s)
+        {UPSERT}
+        """
+        return self.db_connector.execute_many(
+            query,
+            [(category_id, period, net_amount, txn_count) for (category_id, period), (net_amount, txn_count) in totals.items()]
+        )
+
+    def add_where(self, where, params):
+        """Adds the transactions matching `where` (a condition on transactions t) as they are stored now"""
+        return self._apply_where(where, params, "")
+
+    def subtract_where(self, where, params):
+        """Removes the transactions matching `where`. Call before they are deleted or changed."""
+        return self._apply_where(where, params, "-")
+
+    def periods_where(self, where, params):
+        """Returns the periods of the transactions matching `where`, to know which months a change touches"""
+        query = f"""
+        SELECT DISTINCT {PERIOD}
+        FROM transactions t
+        WHERE {where}
+        """
+        result = self.db_connector.execute_query(query, params)
+        return [row[0] for row in result] if isinstance(result, list) else []
+
+    def delete_before(self, period):
+        """Removes the months before `period`, after their transactions were dropped in bulk.
+        Returns the number of rows deleted, or None on failure."""
+        self.db_connector.set_safe_updates(False)
+        result = self.db_connector.execute_query("DELETE FROM category_month_totals WHERE period < %s", (period,))
+        self.db_connector.set_safe_updates(True)
+
+        if result is not None:
+            BudgetCache.for_connector(self.db_connector).clear()
+        return result
+
+    def _apply_where(self, where, params, sign):
+        query = f"""
+        INSERT INTO category_month_totals (category_id, period, net_amount, txn_count)
+        SELECT t.category, {PERIOD}, {sign}SUM({SIGNED_AMOUNT}), {sign}COUNT(*)
+        FROM transactions t
+        WHERE ({where}) AND t.category IS NOT NULL
+        GROUP BY t.category, {PERIOD}
+        {UPSERT}
+        """
+        return self.db_connector.execute_query(query, params)
+
+    def rebuild(self):
+        """Recomputes every row from the transactions table. Returns the number of rows written."""
+        insert_query = f"""
+        INSERT INTO category_month_totals (category_id, period, net_amount, txn_count)
+        SELECT t.category, {PERIOD}, SUM({SIGNED_AMOUNT}), COUNT(*)
+        FROM transactions t
+        WHERE t.category IS NOT NULL
+        GROUP BY t.category, {PERIOD}
+        """
+
+        try:
+            with self.db_connector.transaction():
+                self.db_connector.set_safe_updates(False)
+                self.db_connector.execute_query("DELETE FROM category_month_totals")
+                self.db_connector.set_safe_updates(True)
+                result = self.db_connector.execute_query(insert_query)
+        except TransactionError as e:
+            print(f"Error rebuilding category totals: {e}")
+            return None
+
+        BudgetCache.for_connector(self.db_connector).clear()
+        print(f"Rebuilt category totals: {result} rows")
+        return result
+
+    def check_consistency(self):
+        """Compares the table with an aggregate over the raw transactions.
+
+        Returns a list of (category_id, period, (stored net, count), (actual net, count))
+        for every period that differs; an empty list means the table is correct.
+        """
+        actual_query = f"""
+        SELECT t.category, {PERIOD}, SUM({SIGNED_AMOUNT}), COUNT(*)
+        FROM transactions t
+        WHERE t.category IS NOT NULL
+        GROUP BY t.category, {PERIOD}
+        """
+        stored_query = """
+        SELECT category_id, period, net_amount, txn_count
+        FROM category_month_totals
+        WHERE txn_count <> 0 OR net_amount <> 0
+        """
+
+        self.db_connector.connect()
+
+        actual_result = self.db_connector.execute_query(actual_query)
+        stored_result = self.db_connector.execute_query(stored_query)
+
+        self.db_connector.close()
+
+        if actual_result is None or stored_result is None:
+            return None
+
+        actual = {(row[0], row[1]): (_cents(row[2]), row[3]) for row in actual_result} # type: ignore
+        stored = {(row[0], row[1]): (_cents(row[2]), row[3]) for row in stored_result} # type: ignore
+        empty = (_cents(0), 0)
+
+        return [
+            (category_id, period, stored.get((category_id, period), empty), actual.get((category_id, period), empty))
+            for category_id, period in sorted(set(actual) | set(stored))
+            if stored.get((category_id, period), empty) != actual.get((category_id, period), empty)
+        ]
+
+
+def _cents(value):
+    return Decimal(str(value)).quantize(Decimal("0.01"))
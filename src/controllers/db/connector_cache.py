@@ -0,0 +1,26 @@
+from weakref import WeakKeyDictionary
+
+
+class ConnectorCache:
+    """Base for caches shared by every service using the same connector.
+
+    Services get their instance through for_connector(), so a write made
+    through one service drops the entries another service would read. Each
+    subclass keeps its own instances, held only as long as the connector
+    lives. Changes made outside the services, e.g. by another process, are
+    not seen until the cache is cleared.
+    """
+    _caches = WeakKeyDictionary()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._caches = WeakKeyDictionary()
+
+    @classmethod
+    def for_connector(cls, db_connector):
+        """Returns the cache shared by all services on db_connector"""
+        cache = cls._caches.get(db_connector)
+        if cache is None:
+            cache = cls()
+            cls._caches[db_connector] = cache
+        return cache
@@ -0,0 +1,47 @@
+from .connector_cache import ConnectorCache
+
+
+class MetadataCache(ConnectorCache):
+    """Account names and the Transfer category id, looked up once per process.
+
+    TransactionDBService.add_transfer needs both to label a transfer.
+    AccountDBService drops the account names whenever an account is added or
+    removed, and CategoriesDBService drops the category id whenever a
+    category is.
+    """
+    def __init__(self):
+        self._account_names = None
+        self._transfer_category_id = None
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def account_names(self):
+        """Returns {account id: name}, or None on a miss"""
+        return self._lookup(self._account_names)
+
+    def put_account_names(self, names):
+        self._account_names = dict(names)
+
+    def transfer_category_id(self):
+        """Returns the id of the Transfer category, or None on a miss"""
+        return self._lookup(self._transfer_category_id)
+
+    def put_transfer_category_id(self, category_id):
+        self._transfer_category_id = category_id
+
+    def invalidate_accounts(self):
+        if self._account_names is not None:
+            self.stats['invalidations'] += 1
+        self._account_names = None
+
+    def invalidate_categories(self):
+        if self._transfer_category_id is not None:
+            self.stats['invalidations'] += 1
+        self._transfer_category_id = None
+
+    def clear(self):
+        self._account_names = None
+        self._transfer_category_id = None
+
+    def _lookup(self, value):
+        self.stats['misses' if value is None else 'hits'] += 1
+        return value
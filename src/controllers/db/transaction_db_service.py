@@ -1,6 +1,15 @@
+import time
+from decimal import Decimal
+from itertools import islice
+
 from controllers.db.account_db_service import AccountDBService
-from database_connector import DatabaseConnector
+from database_connector import DatabaseConnector, TransactionError
 from controllers.db.categories_db_service import CategoriesDBService
+from controllers.db.category_totals_db_service import CategoryTotalsDBService
+from controllers.db.budget_cache import BudgetCache
+from controllers.db.metadata_cache import MetadataCache
+from controllers.db.transaction_query import DELETION_COLUMNS, SEARCH_COLUMNS, TransactionFilter, build_text_search_query, build_transaction_query
+from controllers.db.transaction_fingerprint import DUPLICATE_NOTE, DUPLICATE_POLICIES, DuplicateFinder, backfill_fingerprints, transaction_fingerprint
 
 class TransactionDBService():
     def __init__(self, db_connector) -> None:
@@ -8,20 +17,34 @@ class TransactionDBService():
 
         self.account_db_service = AccountDBService(self.db_connector)
         self.categories_db_service = CategoriesDBService(self.db_connector)
+        self.category_totals_db_service = CategoryTotalsDBService(self.db_connector)
+        self.budget_cache = BudgetCache.for_connector(self.db_connector)
+        self.metadata_cache = MetadataCache.for_connector(self.db_connector)
 
     def add_transaction(self, date, description, amount, category_id, transaction_type, account_id, notes=""):
         self.db_connector.connect()
 
         insert_query = """
-        INSERT INTO transactions (date, description, amount, category, type, account, notes)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        INSERT INTO transactions (date, description, amount, category, type, account, notes, fingerprint)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
 
-        result = self.db_connector.execute_query(
-                insert_query,
-                (date, description, amount, category_id, transaction_type, account_id, notes)
-            )
+        try:
+            # The insert and the category_month_totals update commit together
+            with self.db_connector.transaction():
+                result = self.db_connector.execute_query(
+                        insert_query,
+                        (date, description, amount, category_id, transaction_type, account_id, notes,
+                         transaction_fingerprint(date, amount, account_id, description, transaction_type)),
+                        prepared=True
+                    )
+                if result == 1:
+                    self.category_totals_db_service.add_rows([(category_id, date, amount, transaction_type)])
+        except TransactionError:
+            result = None
+
         if result == 1:
+            self._invalidate_budgets([CategoryTotalsDBService.period(date)])
             print("Transaction has been successfully added")
         else:
             print("Error with insert query")
@@ -29,50 +52,374 @@ class TransactionDBService():
         self.db_connector.close()
         return result
 
-    def add_transfer(self, date, amount, from_account, to_account, notes):
-        from_account_name = self.account_db_service.search_account(id=from_account)[0][1] # type: ignore
-        to_account_name = self.account_db_service.search_account(id=to_account)[0][1] # type: ignore
-        description = f"Transfer from {from_account_name} to {to_account_name}"
+    def add_transactions_bulk(self, rows, chunk_size=1000, duplicates='insert', duplicate_finder=None):
+        """Inserts many transactions inside one database transaction.
+
+        rows is any iterable of dicts keyed like add_transaction's arguments or of
+        (date, description, amount, category_id, transaction_type, account_id, notes)
+        tuples. Rows are written chunk_size at a time as multi-row INSERTs.
+
+        duplicates is one of DUPLICATE_POLICIES and says what happens to rows whose
+        fingerprint matches a transaction stored before the call ('insert' writes
+        them unchecked). Each chunk is checked with one indexed lookup. Pass a
+        DuplicateFinder to share it across calls, e.g. the batches of one import.
+
+        Returns (inserted_ids, chunk_timings) where each timing is a dict with the
+        chunk's row count, duplicates found and elapsed seconds. Nothing is kept if
+        any chunk fails.
+        """
+        if duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unknown duplicate policy '{duplicates}'")
+
+        insert_query = """
+        INSERT INTO transactions (date, description, amount, category, type, account, notes, fingerprint)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """
+
+        inserted_ids = []
+        chunk_timings = []
+        periods = set()
+        rows = iter(rows)
+
+        try:
+            with self.db_connector.transaction():
+                if duplicates != 'insert' and duplicate_finder is None:
+                    duplicate_finder = DuplicateFinder(self.db_connector)
+
+                while True:
+                    chunk = [self._bulk_row_params(row) for row in islice(rows, chunk_size)]
+                    if not chunk:
+                        break
+
+                    start = time.perf_counter()
+                    found = 0
+                    if duplicates != 'insert':
+                        matches = duplicate_finder.matches([row[7] for row in chunk]) # type: ignore
+                        found = sum(matches)
+                        if duplicates == 'flag':
+                            chunk = [self._flag_duplicate(row) if duplicate else row for row, duplicate in zip(chunk, matches)]
+                        else:
+                            if duplicates == 'merge' and found:
+                                periods.update(self._merge_duplicates([row for row, duplicate in zip(chunk, matches) if duplicate], duplicate_finder.last_existing_id)) # type: ignore
+                            chunk = [row for row, duplicate in zip(chunk, matches) if not duplicate]
+
+                    if chunk:
+                        result = self.db_connector.execute_many(insert_query, chunk)
+                        if result is None:
+                            raise RuntimeError(f"Bulk insert failed after {len(inserted_ids)} rows")
+
+                        inserted_ids.extend(self.db_connector.last_insert_ids(len(chunk)))
+                        self.category_totals_db_service.add_rows((row[3], row[0], row[2], row[4]) for row in chunk)
+                        periods.update(CategoryTotalsDBService.period(row[0]) for row in chunk)
+                    chunk_timings.append({'rows': len(chunk), 'duplicates': found, 'seconds': time.perf_counter() - start})
+
+            self._invalidate_budgets(periods)
+            found = sum(timing['duplicates'] for timing in chunk_timings)
+            if duplicates == 'insert' or not found:
+                print(f"Bulk insert added {len(inserted_ids)} transactions in {len(chunk_timings)} chunks")
+            else:
+                action = {'skip': "skipped", 'flag': "flagged", 'merge': "merged"}[duplicates]
+                print(f"Bulk insert added {len(inserted_ids)} transactions in {len(chunk_timings)} chunks, {found} duplicates {action}")
+        except Exception as e:
+            print(f"Error with bulk insert, no transactions were added: {e}")
+            inserted_ids = []
+
+        return inserted_ids, chunk_timings
+
+    def _bulk_row_params(self, row):
+        """Insert parameters of a bulk row, ending with its fingerprint"""
+        if isinstance(row, dict):
+            row = (
+                row['date'], row['description'], row['amount'], row['category_id'],
+                row['transaction_type'], row['account_id'], row.get('notes', "")
+            )
+        elif len(row) == 6:
+            row = tuple(row) + ("",)
+        elif len(row) == 8:
+            # Fingerprint already computed, e.g. by TransactionImporter.dedupe
+            return tuple(row)
+        return tuple(row) + (transaction_fingerprint(row[0], row[2], row[5], row[1], row[4]),)
+
+    def _flag_duplicate(self, row):
+        notes = f"{DUPLICATE_NOTE} {row[6]}" if row[6] else DUPLICATE_NOTE
+        return row[:6] + (notes[:1000],) + row[7:]
+
+    def _merge_duplicates(self, rows, last_existing_id):
+        """Fills the missing category and notes of the stored copies of rows from them.
+        Returns the periods whose category totals changed."""
+        query = """
+        UPDATE transactions
+        SET category = COALESCE(category, %s),
+            notes = CASE WHEN notes IS NULL OR notes = '' THEN %s ELSE notes END
+        WHERE fingerprint = %s AND id <= %s
+        """
+        fingerprints = sorted({row[7] for row in rows})
+        where = f"t.fingerprint IN ({', '.join(['%s'] * len(fingerprints))}) AND t.id <= %s"
+        params = tuple(fingerprints) + (last_existing_id,)
+
+        # A category filled in moves the stored copy into that category's totals
+        periods = self.category_totals_db_service.periods_where(where, params)
+        self.category_totals_db_service.subtract_where(where, params)
+        if self.db_connector.execute_many(query, [(row[3], row[6], row[7], last_existing_id) for row in rows]) is None:
+            raise RuntimeError("Duplicates could not be merged")
+        self.category_totals_db_service.add_where(where, params)
+        return periods
+
+    def add_transfer(self, date, amount, from_account, to_account, notes, update_balances=True):
+        """Records a transfer as two linked rows and, with update_balances, moves both account balances.
+
+        The outgoing leg on from_account holds -amount and the incoming leg on
+        to_account holds amount; both carry the id of the incoming leg as their
+        transfer_id. Account names and the Transfer category come from the
+        MetadataCache, so once it is warm the transfer costs one connection and
+        one commit: both legs, their link and AccountDBService.add_transfer run
+        in the same transaction. Returns 1 when the transfer was recorded, None otherwise;
+        inside a caller's transaction() a failure also rolls that transaction back.
+        """
+        names = self._account_names([from_account, to_account])
+        category_id = self._transfer_category_id()
+        if names is None or category_id is None:
+            print("Error with transfer: account or Transfer category not found")
+            return None
+
+        description = f"Transfer from {names[from_account]} to {names[to_account]}"
         transaction_type = "Transfer"
-        
-        transfer_category = self.categories_db_service.search_categories(name="Transfer")
-        
-        if not transfer_category:
-            self.categories_db_service.add_category("Transfer", "Transfer")
-            transfer_category = self.categories_db_service.search_categories(name="Transfer")
-        
-        category_id = transfer_category[0][0] # type: ignore
+        legs = [
+            (date, description, amount, category_id, transaction_type, to_account, notes,
+             transaction_fingerprint(date, amount, to_account, description, transaction_type)),
+            (date, description, -amount, category_id, transaction_type, from_account, notes,
+             transaction_fingerprint(date, -amount, from_account, description, transaction_type)),
+        ]
 
         self.db_connector.connect()
-        query = """
-        INSERT INTO transactions (date, description, amount, category, type, account, notes)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        insert_query = """
+        INSERT INTO transactions (date, description, amount, category, type, account, notes, fingerprint)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
-        result = self.db_connector.execute_query(query, (date, description, amount, category_id, transaction_type, to_account, notes))
+        link_query = """
+        UPDATE transactions SET transfer_id = %s WHERE id IN (%s, %s)
+        """
+        result = None
+        try:
+            with self.db_connector.transaction():
+                if self.db_connector.execute_many(insert_query, legs) != 2:
+                    raise TransactionError("The transfer could not be inserted.")
+                ids = self.db_connector.last_insert_ids(2)
+                if len(ids) != 2 or self.db_connector.execute_query(link_query, (ids[0], ids[0], ids[1])) != 2:
+                    raise TransactionError("The transfer legs could not be linked.")
+                self.category_totals_db_service.add_rows((category_id, date, leg[2], transaction_type) for leg in legs)
+                if update_balances and self.account_db_service.add_transfer(from_account, to_account, amount) != 2:
+                    raise TransactionError("Account balances could not be updated, the transfer was not added.")
+                result = 1
+        except TransactionError as e:
+            print(f"Error with transfer: {e}")
+            result = None
+        if result == 1:
+            self._invalidate_budgets([CategoryTotalsDBService.period(date)])
         self.db_connector.close()
         return result
 
+    def del_transfer(self, id, reverse_balances=False, legs=None):
+        """Deletes every leg of the transfer transaction `id` belongs to.
+
+        With reverse_balances the amount moves back to the sending account in the
+        same transaction. A transfer stored as a single row (recorded before
+        transfers had two legs, or whose other leg was deleted with its account)
+        can only be deleted without reversal. Returns 1 when the transfer was deleted;
+        inside a caller's transaction() a failure also rolls that transaction back.
+        `legs` saves the lookup when the caller already holds _transfer_legs(id).
+        """
+        self.db_connector.connect()
+
+        if legs is None:
+            legs = self._transfer_legs(id)
+        if legs is None:
+            legs = [(id, None, None)]
+        if reverse_balances and len(legs) != 2:
+            print("Only transfers stored with both legs can be reversed")
+            self.db_connector.close()
+            return None
+
+        ids = tuple(leg[0] for leg in legs)
+        where = f"t.id IN ({', '.join(['%s'] * len(ids))})"
+        query = f"""
+        DELETE FROM transactions WHERE id IN ({', '.join(['%s'] * len(ids))})
+        """
+
+        result = None
+        try:
+            with self.db_connector.transaction():
+                periods = self.category_totals_db_service.periods_where(where, ids)
+                self.category_totals_db_service.subtract_where(where, ids)
+                if self.db_connector.execute_query(query, ids) != len(ids):
+                    raise TransactionError("The transfer could not be deleted.")
+                if reverse_balances:
+                    outgoing, incoming = sorted(legs, key=lambda leg: leg[2])
+                    if self.account_db_service.add_transfer(incoming[1], outgoing[1], incoming[2]) != 2:
+                        raise TransactionError("Account balances could not be reversed, the transfer was not deleted.")
+                result = 1
+            self._invalidate_budgets(periods)
+        except TransactionError as e:
+            print(f"Error deleting transfer: {e}")
+            result = None
+
+        if result == 1:
+            print(f"Successfully deleted transfer of transaction id: {id}")
+
+        self.db_connector.close()
+        return result
+
+    def _transfer_legs(self, id):
+        """Returns [(id, account, amount)] for the legs of the transfer transaction `id`
+        belongs to, or None when it is not a linked transfer leg"""
+        result = self.db_connector.execute_query("SELECT transfer_id FROM transactions WHERE id = %s", (id,))
+        if not isinstance(result, list) or not result or result[0][0] is None:
+            return None
+
+        legs = self.db_connector.execute_query(
+            "SELECT id, account, amount FROM transactions WHERE transfer_id = %s ORDER BY id",
+            (result[0][0],)
+        )
+        return legs if isinstance(legs, list) and legs else None
+
+    def link_legacy_transfers(self):
+        """Adds the outgoing leg to transfers stored as a single row.
+
+        Before transfers had two legs, only the incoming row on the receiving
+        account was stored, described "Transfer from <from> to <to>". The sending
+        account is found by name; rows whose description names no single account
+        are left as they are. Balances are not touched, they already include
+        these transfers. Returns the number of transfers linked.
+        """
+        self.db_connector.connect()
+
+        rows = self.db_connector.execute_query("""
+        SELECT id, date, description, amount, category, account, notes
+        FROM transactions
+        WHERE type = 'Transfer' AND transfer_id IS NULL
+        ORDER BY id
+        """)
+        if not isinstance(rows, list) or not rows:
+            self.db_connector.close()
+            return 0
+
+        accounts = self.account_db_service.select_name_id_all_accounts()
+        names = {row[0]: row[1] for row in accounts} if isinstance(accounts, list) else {}
+        ids_by_name = {}
+        for account_id, name in names.items():
+            ids_by_name.setdefault(name, []).append(account_id)
+
+        legs = []
+        for id, row_date, description, amount, category_id, account_id, notes in rows:
+            prefix, suffix = "Transfer from ", f" to {names.get(account_id)}"
+            if not (description.startswith(prefix) and description.endswith(suffix)):
+                continue
+            from_accounts = ids_by_name.get(description[len(prefix):-len(suffix)], [])
+            if len(from_accounts) != 1 or from_accounts[0] == account_id:
+                continue
+            legs.append((
+                row_date, description, -amount, category_id, "Transfer", from_accounts[0], notes,
+                transaction_fingerprint(row_date, -amount, from_accounts[0], description, "Transfer"), id
+            ))
+
+        insert_query = """
+        INSERT INTO transactions (date, description, amount, category, type, account, notes, fingerprint, transfer_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        link_query = """
+        UPDATE transactions SET transfer_id = id WHERE id = %s
+        """
+        linked = 0
+        if legs:
+            try:
+                with self.db_connector.transaction():
+                    if self.db_connector.execute_many(insert_query, legs) != len(legs):
+                        raise TransactionError("The outgoing legs could not be inserted.")
+                    if self.db_connector.execute_many(link_query, [(leg[8],) for leg in legs]) != len(legs):
+                        raise TransactionError("The transfers could not be linked.")
+                    self.category_totals_db_service.add_rows((leg[3], leg[0], leg[2], leg[4]) for leg in legs)
+                self._invalidate_budgets({CategoryTotalsDBService.period(leg[0]) for leg in legs})
+                linked = len(legs)
+            except TransactionError as e:
+                print(f"Error linking earlier transfers: {e}")
+
+        self.db_connector.close()
+        return linked
+
+    def _invalidate_budgets(self, periods):
+        # Inside a caller's transaction() the cached months are dropped when it ends, not before
+        periods = list(periods)
+        self.db_connector.after_transaction(lambda: self.budget_cache.invalidate_periods(periods))
+
+    def _account_names(self, account_ids):
+        """Returns {id: name} for every account from the cache, reloading it once when
+        one of account_ids is missing. None when an account does not exist."""
+        names = self.metadata_cache.account_names()
+        if names is None or any(id not in names for id in account_ids):
+            rows = self.account_db_service.select_name_id_all_accounts()
+            if not isinstance(rows, list):
+                return None
+            names = {row[0]: row[1] for row in rows}
+            self.metadata_cache.put_account_names(names)
+        if any(id not in names for id in account_ids):
+            return None
+        return names
+
+    def _transfer_category_id(self):
+        category_id = self.metadata_cache.transfer_category_id()
+        if category_id is None:
+            transfer_category = self.categories_db_service.search_categories(name="Transfer")
+            if not transfer_category:
+                self.categories_db_service.add_category("Transfer", "Transfer")
+                transfer_category = self.categories_db_service.search_categories(name="Transfer")
+            if not isinstance(transfer_category, list) or not transfer_category:
+                return None
+            category_id = transfer_category[0][0]
+            self.metadata_cache.put_transfer_category_id(category_id)
+        return category_id
+
     def del_account_transactions(self, account_id):
         self.db_connector.connect()
         query = """
         DELETE FROM transactions WHERE account = %s
         """
         
-        self.db_connector.set_safe_updates(False)
-        result = self.db_connector.execute_query(query, (account_id,))
-        self.db_connector.set_safe_updates(True)
+        try:
+            with self.db_connector.transaction():
+                periods = self.category_totals_db_service.periods_where("t.account = %s", (account_id,))
+                self.category_totals_db_service.subtract_where("t.account = %s", (account_id,))
+                self.db_connector.set_safe_updates(False)
+                result = self.db_connector.execute_query(query, (account_id,))
+                self.db_connector.set_safe_updates(True)
+            self._invalidate_budgets(periods)
+        except TransactionError:
+            result = None
 
         self.db_connector.close()
         return result
 
     def del_transaction(self, id):
+        """Deletes one transaction, or both legs when it belongs to a transfer"""
         self.db_connector.connect()
 
+        legs = self._transfer_legs(id)
+        if legs is not None:
+            result = self.del_transfer(id, legs=legs)
+            self.db_connector.close()
+            return result
+
         query = """
         DELETE FROM transactions WHERE id = %s
         """
 
-        result = self.db_connector.execute_query(query, (id,))
+        try:
+            with self.db_connector.transaction():
+                periods = self.category_totals_db_service.periods_where("t.id = %s", (id,))
+                self.category_totals_db_service.subtract_where("t.id = %s", (id,))
+                result = self.db_connector.execute_query(query, (id,))
+            self._invalidate_budgets(periods)
+        except TransactionError:
+            result = None
 
         if result == 1:
             print(f"Successfully deleted transaction id: {id}")
@@ -82,6 +429,37 @@ class TransactionDBService():
         self.db_connector.close()
         return result
 
+    def reassign_category(self, id, category_id):
+        """Moves a transaction to another category, keeping category_month_totals in step"""
+        self.db_connector.connect()
+
+        query = """
+        UPDATE transactions SET category = %s WHERE id = %s
+        """
+
+        try:
+            with self.db_connector.transaction():
+                periods = self.category_totals_db_service.periods_where("t.id = %s", (id,))
+                self.category_totals_db_service.subtract_where("t.id = %s", (id,))
+                result = self.db_connector.execute_query(query, (category_id, id))
+                self.category_totals_db_service.add_where("t.id = %s", (id,))
+            self._invalidate_budgets(periods)
+        except TransactionError:
+            result = None
+
+        if result == 1:
+            print(f"Successfully moved transaction id: {id}")
+        else:
+            print("Error moving transaction")
+
+        self.db_connector.close()
+        return result
+
+    def backfill_fingerprints(self, batch_size=1000):
+        """Computes the fingerprint of every transaction stored without one, batch_size rows
+        per transaction. Returns the number of rows updated."""
+        return backfill_fingerprints(self.db_connector, batch_size)
+
     def search_transaction(self, id=None, description=None):
         """Needs either id or description"""
         self.db_connector.connect()
@@ -96,112 +474,207 @@ class TransactionDBService():
             """
         else:
             print("Must use arg id or description")
+            self.db_connector.close()
             return
 
         if id is not None:
-            result = self.db_connector.execute_query(query, (id,))
+            result = self.db_connector.execute_query(query, (id,), prepared=True)
         else:
-            result = self.db_connector.execute_query(query, (description,))
+            result = self.db_connector.execute_query(query, (description,), prepared=True)
 
         self.db_connector.close()
         
         return result
 
-    def search_all(self):
-        self.db_connector.connect()
+    def search(self, transaction_filter=None, columns=SEARCH_COLUMNS, stream=False, batch_size=500):
+        """Returns the transactions matching a TransactionFilter, newest first, in one statement.
+        columns picks the fields returned (see transaction_query.COLUMNS).
+        With stream=True returns an iterator that reads rows batch_size at a time"""
+        query, params = build_transaction_query(transaction_filter, columns)
 
-        query = """
-        SELECT t.date, t.description, t.amount, c.name as category_name, a.name as account_name, t.type
-        FROM transactions t
-        LEFT JOIN categories c ON t.category = c.id
-        LEFT JOIN accounts a ON t.account = a.id
-        ORDER BY t.date DESC, t.id DESC
-        """
+        if stream:
+            return self.db_connector.iter_query(query, params, batch_size=batch_size)
 
-        result = self.db_connector.execute_query(query)
+        self.db_connector.connect()
+
+        result = self.db_connector.execute_query(query, params)
 
         self.db_connector.close()
 
         return result
 
-    def search_by_date_range(self, start_date, end_date):
-        self.db_connector.connect()
+    def search_text(self, text, transaction_filter=None, columns=SEARCH_COLUMNS, limit=100):
+        """Full-text search over description and notes, best matches first.
 
-        query = """
-        SELECT t.date, t.description, t.amount, c.name as category_name, a.name as account_name, t.type
-        FROM transactions t
-        LEFT JOIN categories c ON t.category = c.id
-        LEFT JOIN accounts a ON t.account = a.id
-        WHERE t.date BETWEEN %s AND %s
-        ORDER BY t.date DESC, t.id DESC
+        Every word of `text` must appear, as a word or word prefix. An optional
+        TransactionFilter narrows the results further. Uses the index made by
+        DatabaseInitializer.ensure_text_search; without one (partitioned MySQL
+        tables) it falls back to a LIKE scan ordered by date.
         """
+        mode = 'fts5' if self.db_connector.dialect == 'sqlite' else 'fulltext'
+        query, params = build_text_search_query(text, mode, transaction_filter, columns, limit)
+        if query is None:
+            return []
 
-        result = self.db_connector.execute_query(query, (start_date, end_date))
+        self.db_connector.connect()
+
+        result = self.db_connector.execute_query(query, params)
+        if result is None and mode == 'fulltext':
+            print("Full-text index unavailable, searching with LIKE")
+            result = self.db_connector.execute_query(*build_text_search_query(text, 'like', transaction_filter, columns, limit))
 
         self.db_connector.close()
 
         return result
 
-    def search_by_category(self, category_id):
-        self.db_connector.connect()
+    def search_page(self, transaction_filter=None, columns=SEARCH_COLUMNS, page_size=500, cursor=None):
+        """Returns (rows, next_cursor) for one page of search().
 
-        query = """
-        SELECT t.date, t.description, t.amount, c.name as category_name, a.name as account_name, t.type
-        FROM transactions t
-        LEFT JOIN categories c ON t.category = c.id
-        LEFT JOIN accounts a ON t.account = a.id
-        WHERE t.category = %s
-        ORDER BY t.date DESC, t.id DESC
+        cursor is None for the first page, then the next_cursor of the previous
+        page: the (date, id) of its last row. Pages start right after the cursor
+        on the (date, id) index instead of skipping rows with OFFSET, so every
+        page costs the same. next_cursor is None on the last page.
         """
+        # The cursor columns ride along at the end of each row; one extra row tells whether another page follows
+        query, params = build_transaction_query(transaction_filter, tuple(columns) + ('date', 'id'), cursor, page_size + 1)
+
+        self.db_connector.connect()
 
-        result = self.db_connector.execute_query(query, (category_id,))
+        result = self.db_connector.execute_query(query, params)
 
         self.db_connector.close()
 
-        return result
+        if result is None:
+            return None, None
 
-    def search_by_account(self, account_id):
-        self.db_connector.connect()
+        next_cursor = None
+        if len(result) > page_size: # type: ignore
+            result = result[:page_size] # type: ignore
+            next_cursor = tuple(result[-1][-2:]) # type: ignore
 
-        query = """
-        SELECT t.date, t.description, t.amount, c.name as category_name, a.name as account_name, t.type
-        FROM transactions t
-        LEFT JOIN categories c ON t.category = c.id
-        LEFT JOIN accounts a ON t.account = a.id
-        WHERE t.account = %s
-        ORDER BY t.date DESC, t.id DESC
+        return [row[:-2] for row in result], next_cursor # type: ignore
+
+    def account_ledger_page(self, account_id, page_size=500, cursor=None):
+        """Returns (rows, next_cursor) for one page of an account's history with its running balance.
+
+        Rows are (id, date, description, category_name, type, amount, balance),
+        newest first, where balance is the account balance right after the row.
+        The newest row ends at accounts.balance and each older one is worked
+        backwards from it by window functions over the page, so the balance
+        follows is_credit the same way AccountDBService.add_transaction does.
+
+        cursor is None for the first page, then the next_cursor of the previous
+        page: the (date, id) of its last row and the balance before it. Each
+        page is one range scan of the (account, date, id) index, so the last
+        page of a long history costs the same as the first. next_cursor is None
+        on the last page.
         """
+        query, params = self._account_ledger_query(account_id, page_size + 1, cursor)
 
-        result = self.db_connector.execute_query(query, (account_id,))
+        self.db_connector.connect()
+
+        result = self.db_connector.execute_query(query, params)
 
         self.db_connector.close()
 
-        return result
+        if not isinstance(result, list):
+            return None, None
 
-    def search_for_deletion(self, start_date=None, end_date=None):
-        """Search transactions with ID for deletion purposes"""
-        self.db_connector.connect()
+        # balance_before rides along at the end of each row to build the next cursor
+        rows = [row[:6] + (_money(row[6]),) for row in result[:page_size]]
+        next_cursor = None
+        if len(result) > page_size:
+            last = result[page_size - 1]
+            next_cursor = (last[1], last[0], _money(last[7]))
 
-        if start_date and end_date:
-            query = """
-            SELECT t.id, t.date, t.description, t.amount, c.name as category_name, a.name as account_name, t.type, a.id as account_id
-            FROM transactions t
-            LEFT JOIN categories c ON t.category = c.id
-            LEFT JOIN accounts a ON t.account = a.id
-            WHERE t.date BETWEEN %s AND %s
-            ORDER BY t.date DESC, t.id DESC
-            """
-            result = self.db_connector.execute_query(query, (start_date, end_date))
+        return rows, next_cursor
+
+    def explain_account_ledger(self, account_id, page_size=500, cursor=None):
+        """Returns the execution plan of account_ledger_page, to confirm it scans the account index
+
+            plan = transaction_db_service.explain_account_ledger(1)
+            db.index_used(plan, 'idx_transactions_account')
+        """
+        return self.db_connector.explain(*self._account_ledger_query(account_id, page_size + 1, cursor))
+
+    def _account_ledger_query(self, account_id, limit, cursor):
+        # What the row did to the account balance, as AccountDBService.add_transaction applies it;
+        # transfer legs are stored signed
+        delta = """
+        CASE WHEN a.is_credit = 1 THEN -1 ELSE 1 END
+            * CASE WHEN t.type = 'Expense' THEN -t.amount ELSE t.amount END
+        """
+        if cursor is None:
+            opening = "(SELECT balance FROM accounts WHERE id = %s)"
+            opening_params = [account_id]
+            after_cursor = ""
+            cursor_params = []
         else:
-            query = """
-            SELECT t.id, t.date, t.description, t.amount, c.name as category_name, a.name as account_name, t.type, a.id as account_id
+            opening = "%s"
+            opening_params = [cursor[2]]
+            after_cursor = "AND t.date <= %s AND (t.date < %s OR t.id < %s)"
+            cursor_params = [cursor[0], cursor[0], cursor[1]]
+
+        # The page is cut first, so the window only runs over its rows
+        query = f"""
+        SELECT p.id, p.date, p.description, p.category_name, p.type, p.amount,
+            {opening} - SUM(p.delta) OVER w + p.delta AS balance,
+            {opening} - SUM(p.delta) OVER w AS balance_before
+        FROM (
+            SELECT t.id, t.date, t.description, c.name AS category_name, t.type, t.amount, {delta} AS delta
             FROM transactions t
-            LEFT JOIN categories c ON t.category = c.id
-            LEFT JOIN accounts a ON t.account = a.id
+            JOIN accounts a ON a.id = t.account
+            LEFT JOIN categories c ON c.id = t.category
+            WHERE t.account = %s {after_cursor}
             ORDER BY t.date DESC, t.id DESC
-            """
-            result = self.db_connector.execute_query(query)
+            LIMIT %s
+        ) p
+        WINDOW w AS (ORDER BY p.date DESC, p.id DESC ROWS UNBOUNDED PRECEDING)
+        ORDER BY p.date DESC, p.id DESC
+        """
+        params = opening_params * 2 + [account_id] + cursor_params + [limit]
+        return query, tuple(params)
+
+    def search_all(self, stream=False, batch_size=500):
+        """With stream=True returns an iterator that reads rows batch_size at a time"""
+        return self.search(stream=stream, batch_size=batch_size)
+
+    def search_all_page(self, page_size=500, cursor=None):
+        return self.search_page(page_size=page_size, cursor=cursor)
+
+    def search_by_date_range(self, start_date, end_date, stream=False, batch_size=500):
+        """With stream=True returns an iterator that reads rows batch_size at a time"""
+        return self.search(TransactionFilter(start_date=start_date, end_date=end_date), stream=stream, batch_size=batch_size)
+
+    def search_by_date_range_page(self, start_date, end_date, page_size=500, cursor=None):
+        return self.search_page(TransactionFilter(start_date=start_date, end_date=end_date), page_size=page_size, cursor=cursor)
+
+    def search_by_category(self, category_id):
+        return self.search(TransactionFilter(category_id=category_id))
+
+    def search_by_category_page(self, category_id, page_size=500, cursor=None):
+        return self.search_page(TransactionFilter(category_id=category_id), page_size=page_size, cursor=cursor)
+
+    def search_by_account(self, account_id):
+        return self.search(TransactionFilter(account_id=account_id))
+
+    def search_by_account_page(self, account_id, page_size=500, cursor=None):
+        return self.search_page(TransactionFilter(account_id=account_id), page_size=page_size, cursor=cursor)
+
+    def search_for_deletion(self, start_date=None, end_date=None, stream=False, batch_size=500):
+        """Search transactions with ID for deletion purposes.
+        With stream=True returns an iterator that reads rows batch_size at a time"""
+        return self.search(self._deletion_filter(start_date, end_date), DELETION_COLUMNS, stream=stream, batch_size=batch_size)
+
+    def search_for_deletion_page(self, start_date=None, end_date=None, page_size=500, cursor=None):
+        return self.search_page(self._deletion_filter(start_date, end_date), DELETION_COLUMNS, page_size=page_size, cursor=cursor)
+
+    def _deletion_filter(self, start_date, end_date):
+        if start_date and end_date:
+            return TransactionFilter(start_date=start_date, end_date=end_date)
+        return None
 
-        self.db_connector.close()
 
-        return result 
+def _money(value):
+    """Balances computed by SQLite come back as floats, MySQL already returns Decimal"""
+    return None if value is None else Decimal(str(value)).quantize(Decimal("0.01"))
@@ -0,0 +1,123 @@
+import hashlib
+import re
+from decimal import Decimal
+
+from database_connector import DatabaseConnector, TransactionError
+
+# What add_transactions_bulk does with a row whose fingerprint is already stored:
+# write it anyway, drop it, write it with DUPLICATE_NOTE in its notes, or drop
+# it after filling the stored copy's missing category and notes from it
+DUPLICATE_POLICIES = ('insert', 'skip', 'flag', 'merge')
+DUPLICATE_NOTE = "[possible duplicate]"
+
+_WORDS = re.compile(r"\w+")
+
+
+def normalize_description(description):
+    """Lowercases and drops punctuation and extra spaces: 'AMAZON.COM*Mktp  ' -> 'amazon com mktp'"""
+    return " ".join(_WORDS.findall(str(description or '').lower()))
+
+
+def transaction_fingerprint(transaction_date, amount, account_id, description, transaction_type):
+    """Returns the 40 character hex digest identifying a transaction by its content.
+
+    Two rows get the same fingerprint when they have the same date, amount (to
+    the cent), account, type and normalized description.
+    """
+    cents = int((Decimal(str(amount)) * 100).to_integral_value())
+    key = f"{str(transaction_date)[:10]}|{cents}|{account_id}|{transaction_type}|{normalize_description(description)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints(db_connector, batch_size=1000):
+    """Computes the fingerprint of every transaction stored without one, batch_size rows
+    per transaction. Returns the number of rows updated."""
+    select_query = """
+    SELECT id, date, description, amount, type, account
+    FROM transactions
+    WHERE fingerprint IS NULL AND id > %s
+    ORDER BY id
+    LIMIT %s
+    """
+    update_query = """
+    UPDATE transactions SET fingerprint = %s WHERE id = %s
+    """
+
+    db_connector.connect()
+
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db_connector.execute_query(select_query, (last_id, batch_size))
+        if not isinstance(rows, list) or not rows:
+            break
+
+        params = [
+            (transaction_fingerprint(row_date, amount, account_id, description, transaction_type), id)
+            for id, row_date, description, amount, transaction_type, account_id in rows
+        ]
+        try:
+            with db_connector.transaction():
+                if db_connector.execute_many(update_query, params) is None:
+                    raise TransactionError("Fingerprints could not be stored")
+        except TransactionError as e:
+            print(f"Error backfilling fingerprints after {updated} rows: {e}")
+            break
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+    db_connector.close()
+    return updated
+
+
+class DuplicateFinder():
+    """Tells which new rows are already stored, by fingerprint.
+
+    Only transactions stored when the finder was created count, so rows
+    written while it is in use never match each other. Stored copies are
+    counted: a fingerprint stored twice matches the first two new rows that
+    carry it, a third one is new. Each lookup is one query on the fingerprint
+    index for the batch's fingerprints, whatever the size of the table.
+    """
+    def __init__(self, db_connector) -> None:
+        self.db_connector: DatabaseConnector = db_connector
+        self.last_existing_id = self._last_transaction_id()
+        # Stored copies not yet matched, only for fingerprints that have copies
+        self.unmatched = {}
+
+    def matches(self, fingerprints):
+        """Returns one bool per fingerprint, True when it matches a stored transaction"""
+        lookup = list(set(fingerprints) - self.unmatched.keys())
+        if lookup:
+            query = f"""
+            SELECT fingerprint, COUNT(*)
+            FROM transactions
+            WHERE fingerprint IN ({", ".join(["%s"] * len(lookup))}) AND id <= %s
+            GROUP BY fingerprint
+            """
+
+            self.db_connector.connect()
+
+            result = self.db_connector.execute_query(query, tuple(lookup) + (self.last_existing_id,))
+
+            self.db_connector.close()
+
+            for fingerprint, count in result if isinstance(result, list) else []:
+                self.unmatched[fingerprint] = count
+
+        duplicates = []
+        for fingerprint in fingerprints:
+            duplicate = self.unmatched.get(fingerprint, 0) > 0
+            if duplicate:
+                self.unmatched[fingerprint] -= 1
+            duplicates.append(duplicate)
+        return duplicates
+
+    def _last_transaction_id(self):
+        self.db_connector.connect()
+
+        result = self.db_connector.execute_query("SELECT MAX(id) FROM transactions")
+
+        self.db_connector.close()
+
+        return (result[0][0] or 0) if isinstance(result, list) and result else 0
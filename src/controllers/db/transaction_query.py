@@ -0,0 +1,186 @@
+import re
+
+# Columns a projection can name, with the SQL expression selecting each
+COLUMNS = {
+    'id': 't.id',
+    'date': 't.date',
+    'description': 't.description',
+    'amount': 't.amount',
+    'category_id': 't.category',
+    'category_name': 'c.name',
+    'account_id': 't.account',
+    'account_name': 'a.name',
+    'type': 't.type',
+    'notes': 't.notes',
+    'transfer_id': 't.transfer_id',
+}
+
+# Columns covered by the full-text index, see DatabaseInitializer.ensure_text_search
+TEXT_SEARCH_COLUMNS = ('description', 'notes')
+
+# Columns of the transaction searches, and of the deletion list
+SEARCH_COLUMNS = ('date', 'description', 'amount', 'category_name', 'account_name', 'type')
+DELETION_COLUMNS = ('id', 'date', 'description', 'amount', 'category_name', 'account_name', 'type', 'account_id')
+
+
+class TransactionFilter():
+    """Any combination of conditions on the transactions table.
+
+    Dates and amounts are inclusive bounds, either side may be left open.
+    account_id, category_id and transaction_type take one value or a list of
+    values. Conditions left as None are not applied.
+    """
+    def __init__(self, start_date=None, end_date=None, account_id=None, category_id=None,
+                 transaction_type=None, min_amount=None, max_amount=None) -> None:
+        self.start_date = start_date
+        self.end_date = end_date
+        self.account_id = account_id
+        self.category_id = category_id
+        self.transaction_type = transaction_type
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def conditions(self):
+        """Returns (conditions, params) with one SQL condition per filter that is set.
+
+        Every condition compares a bare column, so the date range stays a range
+        scan on the date indexes and the equality filters can use theirs.
+        """
+        conditions = []
+        params = []
+
+        _add_range(conditions, params, "t.date", self.start_date, self.end_date)
+        _add_equal(conditions, params, "t.account", self.account_id)
+        _add_equal(conditions, params, "t.category", self.category_id)
+        _add_equal(conditions, params, "t.type", self.transaction_type)
+        _add_range(conditions, params, "t.amount", self.min_amount, self.max_amount)
+
+        return conditions, params
+
+
+def build_transaction_query(transaction_filter=None, columns=SEARCH_COLUMNS, cursor=None, limit=None):
+    """Returns (query, params) selecting `columns` of the transactions matching the filter.
+
+    Rows are ordered by t.date DESC, t.id DESC. Only the joins the columns need
+    are added. With a (date, id) cursor only rows after it are returned, and
+    limit caps the number of rows.
+    """
+    select, joins = _projection(columns)
+
+    conditions, params = (transaction_filter or TransactionFilter()).conditions()
+    if cursor is not None:
+        conditions.append("t.date <= %s AND (t.date < %s OR t.id < %s)")
+        params += [cursor[0], cursor[0], cursor[1]]
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+
+    query = f"""
+        SELECT {select}
+        FROM transactions t
+        {" ".join(joins)}
+        {where}
+        ORDER BY t.date DESC, t.id DESC
+        {limit_clause}
+        """
+    return query, tuple(params) if params else None
+
+
+def build_text_search_query(text, mode, transaction_filter=None, columns=SEARCH_COLUMNS, limit=100):
+    """Returns (query, params) finding transactions whose description or notes contain every word of `text`.
+
+    Words match as prefixes ("amaz" finds "Amazon"). mode picks the index:
+    'fulltext' uses MySQL's FULLTEXT index and 'fts5' the SQLite FTS5 table,
+    both ranking the best matches first; 'like' scans with LIKE and orders by
+    date. Returns (None, None) when `text` has no words.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None, None
+
+    select, joins = _projection(columns)
+    conditions, params = (transaction_filter or TransactionFilter()).conditions()
+    columns_sql = ", ".join(f"t.{name}" for name in TEXT_SEARCH_COLUMNS)
+    source = "transactions t"
+
+    if mode == 'fulltext':
+        match = f"MATCH({columns_sql}) AGAINST (%s IN BOOLEAN MODE)"
+        terms = " ".join(f"+{word}*" for word in words)
+        conditions.insert(0, match)
+        params = [terms] + params + [terms]
+        order = f"{match} DESC, t.date DESC, t.id DESC"
+    elif mode == 'fts5':
+        source = "transactions_fts f JOIN transactions t ON t.id = f.rowid"
+        conditions.insert(0, "transactions_fts MATCH %s")
+        params.insert(0, " ".join(f'"{word}"*' for word in words))
+        order = "f.rank, t.date DESC, t.id DESC"
+    elif mode == 'like':
+        like = "(" + " OR ".join(f"t.{name} LIKE %s" for name in TEXT_SEARCH_COLUMNS) + ")"
+        conditions[:0] = [like] * len(words)
+        params = [f"%{word}%" for word in words for _ in TEXT_SEARCH_COLUMNS] + params
+        order = "t.date DESC, t.id DESC"
+    else:
+        raise ValueError(f"Unknown text search mode '{mode}'")
+
+    params.append(limit)
+    query = f"""
+        SELECT {select}
+        FROM {source}
+        {" ".join(joins)}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {order}
+        LIMIT %s
+        """
+    return query, tuple(params)
+
+
+def _projection(columns):
+    """Returns the select list for `columns` and the joins it needs"""
+    unknown = [name for name in columns if name not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown transaction columns: {', '.join(unknown)}")
+
+    select = ", ".join(_select(name) for name in columns)
+
+    joins = []
+    if any(COLUMNS[name].startswith("c.") for name in columns):
+        joins.append("LEFT JOIN categories c ON t.category = c.id")
+    if any(COLUMNS[name].startswith("a.") for name in columns):
+        joins.append("LEFT JOIN accounts a ON t.account = a.id")
+
+    return select, joins
+
+
+def _select(name):
+    expression = COLUMNS[name]
+    return expression if expression == f"t.{name}" else f"{expression} as {name}"
+
+
+def _add_range(conditions, params, column, low, high):
+    if low is not None and high is not None:
+        conditions.append(f"{column} BETWEEN %s AND %s")
+        params += [low, high]
+    elif low is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(low)
+    elif high is not None:
+        conditions.append(f"{column} <= %s")
+        params.append(high)
+
+
+def _add_equal(conditions, params, column, value):
+    if value is None:
+        return
+    if isinstance(value, (list, tuple, set)):
+        values = list(value)
+        if not values:
+            conditions.append("1 = 0")
+            return
+        conditions.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+        params += values
+    else:
+        conditions.append(f"{column} = %s")
+        params.append(value)
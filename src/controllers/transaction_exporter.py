@@ -0,0 +1,249 @@
+import csv
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import date
+from decimal import Decimal
+
+from database_connector import DatabaseConnector
+from controllers.db.account_db_service import AccountDBService
+from controllers.db.categories_db_service import CategoriesDBService
+
+MANIFEST = "manifest.json"
+COLUMNAR_MAGIC = b"TXCOL1\n"
+
+CSV_HEADER = ['id', 'date', 'description', 'amount', 'category_id', 'category', 'type', 'account_id', 'account', 'notes']
+
+# Columnar columns and their array typecodes; 'str' columns are stored as
+# uint32 end offsets plus one UTF-8 blob. Dates are day ordinals (0 = NULL),
+# amounts are cents, missing ids are -1 and type is a code into the
+# manifest's 'type' dictionary.
+COLUMNAR_COLUMNS = [
+    ('id', 'q'),
+    ('date', 'i'),
+    ('description', 'str'),
+    ('amount', 'q'),
+    ('category_id', 'i'),
+    ('type', 'b'),
+    ('account_id', 'i'),
+    ('notes', 'str'),
+]
+
+
+class TransactionExporter():
+    """Streams the whole ledger to chunked CSV and/or columnar files.
+
+    Rows are read in id order from a server-side cursor (iter_query) and
+    written `chunk_rows` at a time, as chunk-00000.csv / chunk-00000.cols and
+    so on. Only the current chunk is held in memory. Each chunk is written to
+    a temporary file and renamed when complete, then recorded in
+    manifest.json, so an interrupted export resumes after the last finished
+    chunk. The manifest also holds the dictionaries the columnar files refer
+    to: category and account names by id, and the transaction types.
+    """
+    def __init__(self, db_connector, chunk_rows=100000, batch_size=5000) -> None:
+        self.db_connector: DatabaseConnector = db_connector
+        self.chunk_rows = chunk_rows
+        self.batch_size = batch_size
+
+        self.account_db_service = AccountDBService(self.db_connector)
+        self.categories_db_service = CategoriesDBService(self.db_connector)
+
+    def export(self, directory, formats=('csv', 'columnar'), resume=True):
+        """Exports every transaction into directory and returns a report.
+
+        With resume, an unfinished export with the same formats and chunk size
+        continues from its last finished chunk. Returns {'rows', 'chunks',
+        'bytes', 'seconds', 'rows_per_second', 'complete'}; rows, chunks and
+        bytes count this run only.
+        """
+        os.makedirs(directory, exist_ok=True)
+        manifest = self._load_manifest(directory) if resume else None
+        if manifest is None or manifest['formats'] != list(formats) or manifest['chunk_rows'] != self.chunk_rows:
+            manifest = {'formats': list(formats), 'chunk_rows': self.chunk_rows, 'chunks': [], 'complete': False, 'dictionaries': {'type': []}}
+        elif manifest['complete']:
+            print(f"Export in {directory} is already complete")
+            return {'rows': 0, 'chunks': 0, 'bytes': 0, 'seconds': 0.0, 'rows_per_second': 0.0, 'complete': True}
+
+        # Small lookup tables are stored once, the chunks only carry ids
+        manifest['dictionaries']['category'] = {str(row[0]): row[1] for row in self.categories_db_service.select_category_names() or []} # type: ignore
+        manifest['dictionaries']['account'] = {str(row[0]): row[1] for row in self.account_db_service.select_name_id_all_accounts() or []} # type: ignore
+        types = manifest['dictionaries']['type']
+
+        last_id = manifest['chunks'][-1]['last_id'] if manifest['chunks'] else 0
+        if manifest['chunks']:
+            print(f"Resuming export after transaction id {last_id} ({len(manifest['chunks'])} chunks done)")
+
+        report = {'rows': 0, 'chunks': 0, 'bytes': 0, 'seconds': 0.0, 'rows_per_second': 0.0, 'complete': False}
+        started = time.perf_counter()
+
+        query = """
+        SELECT t.id, t.date, t.description, t.amount, t.category, t.type, t.account, t.notes
+        FROM transactions t
+        WHERE t.id > %s
+        ORDER BY t.id
+        """
+        rows = self.db_connector.iter_query(query, (last_id,), batch_size=self.batch_size)
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk_rows:
+                self._finish_chunk(directory, manifest, chunk, types, report, started)
+                last_id = chunk[-1][0]
+                chunk = []
+        if chunk:
+            self._finish_chunk(directory, manifest, chunk, types, report, started)
+            last_id = chunk[-1][0]
+
+        # iter_query stops quietly when the cursor fails, so check nothing is left
+        report['complete'] = self._count_after(last_id) == 0
+        manifest['complete'] = report['complete']
+        self._save_manifest(directory, manifest)
+
+        report['seconds'] = time.perf_counter() - started
+        if report['seconds'] > 0:
+            report['rows_per_second'] = report['rows'] / report['seconds']
+        status = "finished" if report['complete'] else "incomplete, run it again to resume"
+        print(
+            f"Export {status}: {report['rows']} rows in {report['chunks']} chunks, "
+            f"{report['bytes'] / 1e6:.1f} MB in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s)"
+        )
+        return report
+
+    def _finish_chunk(self, directory, manifest, chunk, types, report, started):
+        index = len(manifest['chunks'])
+        written = 0
+        if 'csv' in manifest['formats']:
+            written += self._write_csv(os.path.join(directory, f"chunk-{index:05d}.csv"), chunk, manifest['dictionaries'])
+        if 'columnar' in manifest['formats']:
+            written += self._write_columnar(os.path.join(directory, f"chunk-{index:05d}.cols"), chunk, types)
+
+        manifest['chunks'].append({'index': index, 'rows': len(chunk), 'first_id': chunk[0][0], 'last_id': chunk[-1][0]})
+        self._save_manifest(directory, manifest)
+
+        report['rows'] += len(chunk)
+        report['chunks'] += 1
+        report['bytes'] += written
+        elapsed = time.perf_counter() - started
+        print(f"Exported chunk {index}: {report['rows']} rows ({report['rows'] / elapsed:.0f} rows/s)")
+
+    def _write_csv(self, path, chunk, dictionaries):
+        categories = dictionaries['category']
+        accounts = dictionaries['account']
+        with open(path + ".tmp", 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            for id, transaction_date, description, amount, category_id, transaction_type, account_id, notes in chunk:
+                writer.writerow([
+                    id, transaction_date, description, amount,
+                    '' if category_id is None else category_id, categories.get(str(category_id), ''),
+                    transaction_type, account_id, accounts.get(str(account_id), ''), notes or ''
+                ])
+        os.replace(path + ".tmp", path)
+        return os.path.getsize(path)
+
+    def _write_columnar(self, path, chunk, types):
+        type_codes = {name: code for code, name in enumerate(types)}
+        values = {name: [] for name, _ in COLUMNAR_COLUMNS}
+        for id, transaction_date, description, amount, category_id, transaction_type, account_id, notes in chunk:
+            if transaction_type not in type_codes:
+                type_codes[transaction_type] = len(types)
+                types.append(transaction_type)
+            values['id'].append(id)
+            values['date'].append(_day(transaction_date))
+            values['description'].append(description)
+            values['amount'].append(_cents(amount))
+            values['category_id'].append(-1 if category_id is None else category_id)
+            values['type'].append(type_codes[transaction_type])
+            values['account_id'].append(-1 if account_id is None else account_id)
+            values['notes'].append(notes)
+
+        buffers = []
+        columns = []
+        for name, typecode in COLUMNAR_COLUMNS:
+            if typecode == 'str':
+                blob = bytearray()
+                offsets = array('I')
+                for text in values[name]:
+                    blob += (text or '').encode('utf-8')
+                    offsets.append(len(blob))
+                buffers += [offsets.tobytes(), bytes(blob)]
+                columns.append({'name': name, 'type': 'str', 'offsets_bytes': len(buffers[-2]), 'bytes': len(blob)})
+            else:
+                data = array(typecode, values[name]).tobytes()
+                buffers.append(data)
+                columns.append({'name': name, 'type': typecode, 'bytes': len(data)})
+
+        header = json.dumps({'rows': len(chunk), 'byteorder': sys.byteorder, 'columns': columns}).encode('utf-8')
+        with open(path + ".tmp", 'wb') as file:
+            file.write(COLUMNAR_MAGIC)
+            file.write(struct.pack('<I', len(header)))
+            file.write(header)
+            for data in buffers:
+                file.write(data)
+        os.replace(path + ".tmp", path)
+        return os.path.getsize(path)
+
+    @staticmethod
+    def read_columnar(path):
+        """Reads a .cols chunk into {column: array}; 'str' columns become lists of str"""
+        with open(path, 'rb') as file:
+            if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+                raise ValueError(f"{path} is not a columnar transaction export")
+            header = json.loads(file.read(struct.unpack('<I', file.read(4))[0]))
+
+            columns = {}
+            for column in header['columns']:
+                if column['type'] == 'str':
+                    offsets = array('I')
+                    offsets.frombytes(file.read(column['offsets_bytes']))
+                    if header['byteorder'] != sys.byteorder:
+                        offsets.byteswap()
+                    blob = file.read(column['bytes'])
+                    starts = [0] + list(offsets[:-1])
+                    columns[column['name']] = [blob[start:end].decode('utf-8') for start, end in zip(starts, offsets)]
+                else:
+                    data = array(column['type'])
+                    data.frombytes(file.read(column['bytes']))
+                    if header['byteorder'] != sys.byteorder:
+                        data.byteswap()
+                    columns[column['name']] = data
+            return columns
+
+    def _count_after(self, last_id):
+        self.db_connector.connect()
+
+        result = self.db_connector.execute_query("SELECT COUNT(*) FROM transactions WHERE id > %s", (last_id,))
+
+        self.db_connector.close()
+
+        return result[0][0] if result else None # type: ignore
+
+    def _load_manifest(self, directory):
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, directory, manifest):
+        path = os.path.join(directory, MANIFEST)
+        with open(path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        os.replace(path + ".tmp", path)
+
+
+def _day(value):
+    if value is None:
+        return 0
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return value.toordinal()
+
+
+def _cents(value):
+    return int((Decimal(str(value)) * 100).to_integral_value())
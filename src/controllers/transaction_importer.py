@@ -0,0 +1,240 @@
+import csv
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from database_connector import DatabaseConnector, TransactionError
+from controllers.db.account_db_service import AccountDBService
+from controllers.db.categories_db_service import CategoriesDBService
+from controllers.db.transaction_db_service import TransactionDBService
+from controllers.db.transaction_fingerprint import DuplicateFinder, transaction_fingerprint
+
+# Header names accepted for each field of a bank CSV, compared case-insensitively
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'posted date', 'posting date'),
+    'description': ('description', 'payee', 'name', 'merchant'),
+    'amount': ('amount',),
+    'debit': ('debit', 'withdrawal'),
+    'credit': ('credit', 'deposit'),
+    'category': ('category',),
+    'notes': ('notes', 'memo'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%Y%m%d')
+
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.I | re.S)
+_OFX_OPENING = re.compile(r"<STMTTRN>", re.I)
+
+
+class TransactionImporter():
+    """Streams bank CSV and OFX statements into the transactions table.
+
+    Every stage is a generator, so only one batch of `batch_size` rows is in
+    memory at a time: read -> normalize -> classify -> dedupe -> write. Each
+    batch is written with one bulk insert, and the account balance is moved
+    once by the batch's net amount, in the same DB transaction.
+
+    Rows already in the account before the import started (same fingerprint:
+    date, amount, type and normalized description) are skipped, so importing
+    an overlapping statement again only adds the new rows. Identical rows
+    within the file are kept.
+    """
+    def __init__(self, db_connector, batch_size=1000) -> None:
+        self.db_connector: DatabaseConnector = db_connector
+        self.batch_size = batch_size
+
+        self.transaction_db_service = TransactionDBService(self.db_connector)
+        self.account_db_service = AccountDBService(self.db_connector)
+        self.categories_db_service = CategoriesDBService(self.db_connector)
+
+    def import_file(self, path, account_id, file_format=None, category_rules=None, default_category_id=None, update_balance=True):
+        """Imports a CSV or OFX/QFX file into account_id and returns the report of import_records.
+        file_format ('csv' or 'ofx') defaults to the file extension."""
+        if file_format is None:
+            file_format = 'ofx' if path.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+        with open(path, newline='', encoding='utf-8-sig', errors='replace') as file:
+            records = self.read_ofx(file) if file_format == 'ofx' else self.read_csv(file)
+            return self.import_records(records, account_id, category_rules, default_category_id, update_balance)
+
+    def import_records(self, records, account_id, category_rules=None, default_category_id=None, update_balance=True):
+        """Writes raw records (dicts with date, description, amount, category, notes) in batches.
+
+        category_rules is a list of (text, category_id): the first rule whose text
+        appears in the description picks the category. Otherwise a category
+        named in the record is used, then default_category_id.
+        Returns {'read', 'imported', 'duplicates', 'invalid', 'batches', 'seconds',
+        'rows_per_second', 'error'}. A batch that fails stops the import; the
+        batches before it stay imported.
+        """
+        report = {
+            'read': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0,
+            'batches': 0, 'seconds': 0.0, 'rows_per_second': 0.0, 'error': None
+        }
+        started = time.perf_counter()
+
+        rows = self.classify(self.normalize(records, report), account_id, category_rules, default_category_id)
+        duplicate_finder = DuplicateFinder(self.db_connector)
+
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+
+            batch = self.dedupe(batch, duplicate_finder, report)
+            report['batches'] += 1
+            if batch:
+                try:
+                    self._write_batch(batch, account_id, update_balance)
+                except TransactionError as e:
+                    print(f"Import stopped at batch {report['batches']}: {e}")
+                    report['error'] = str(e)
+                    break
+                report['imported'] += len(batch)
+
+            elapsed = time.perf_counter() - started
+            print(f"Import batch {report['batches']}: {report['imported']} imported, {report['read']} read ({report['read'] / elapsed:.0f} rows/s)")
+
+        report['seconds'] = time.perf_counter() - started
+        if report['seconds'] > 0:
+            report['rows_per_second'] = report['read'] / report['seconds']
+        print(
+            f"Import finished: {report['imported']} imported, {report['duplicates']} duplicates, "
+            f"{report['invalid']} invalid in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s)"
+        )
+        return report
+
+    def read_csv(self, file):
+        """Yields one record per CSV row, mapping the bank's headers through CSV_COLUMNS"""
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        positions = {name.strip().lower(): i for i, name in enumerate(header)}
+        columns = {}
+        for field, names in CSV_COLUMNS.items():
+            for name in names:
+                if name in positions:
+                    columns[field] = positions[name]
+                    break
+
+        for row in reader:
+            if not any(row):
+                continue
+            record = {field: row[i] if i < len(row) else '' for field, i in columns.items()}
+            if 'amount' not in record:
+                # Separate debit and credit columns, one of them empty
+                credit, debit = _parse_amount(record.get('credit')), _parse_amount(record.get('debit'))
+                record['amount'] = '' if credit is None and debit is None else str((credit or 0) - (debit or 0))
+            yield record
+
+    def read_ofx(self, file, chunk_size=65536):
+        """Yields one record per <STMTTRN> block, reading the file chunk_size characters at a time"""
+        buffer = ""
+        while True:
+            chunk = file.read(chunk_size)
+            buffer += chunk
+
+            # Offsets come from the original text; upper() can change its length (ß -> SS)
+            start = 0
+            for match in _OFX_TRANSACTION.finditer(buffer):
+                start = match.end()
+                fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(match.group(1))}
+                yield {
+                    'date': fields.get('DTPOSTED', '')[:8],
+                    'description': fields.get('NAME') or fields.get('PAYEE') or fields.get('MEMO', ''),
+                    'amount': fields.get('TRNAMT', ''),
+                    'notes': fields.get('MEMO', '') if fields.get('NAME') else '',
+                }
+
+            # Keep only the unfinished transaction, or a tail that may hold a split tag
+            opening = _OFX_OPENING.search(buffer, start)
+            buffer = buffer[opening.start():] if opening else buffer[max(start, len(buffer) - 16):]
+
+            if not chunk:
+                break
+
+    def normalize(self, records, report):
+        """Yields (date, description, signed amount, category name, notes), counting rows that cannot be parsed"""
+        for record in records:
+            report['read'] += 1
+            transaction_date = _parse_date(record.get('date'))
+            amount = _parse_amount(record.get('amount'))
+            if transaction_date is None or amount is None:
+                report['invalid'] += 1
+                continue
+
+            notes = (record.get('notes') or '').strip()
+            description = (record.get('description') or '').strip() or notes or "Imported transaction"
+            yield transaction_date, description[:255], amount, (record.get('category') or '').strip(), notes[:1000]
+
+    def classify(self, rows, account_id, category_rules=None, default_category_id=None):
+        """Yields add_transactions_bulk rows: negative amounts are expenses, positive ones income"""
+        rules = [(text.lower(), category_id) for text, category_id in (category_rules or [])]
+        categories = {str(name).lower(): category_id for category_id, name in (self.categories_db_service.select_category_names() or [])} # type: ignore
+
+        for transaction_date, description, amount, category_name, notes in rows:
+            lowered = description.lower()
+            category_id = next((category_id for text, category_id in rules if text in lowered), None)
+            if category_id is None:
+                category_id = categories.get(category_name.lower(), default_category_id)
+
+            transaction_type = "Income" if amount > 0 else "Expense"
+            yield (transaction_date, description, abs(amount), category_id, transaction_type, account_id, notes)
+
+    def dedupe(self, batch, duplicate_finder, report):
+        """Drops the rows of a batch that were already in the account before the import.
+
+        Rows gain their fingerprint, which add_transactions_bulk reuses. Existing
+        copies are counted, so a row appearing twice in both the file and the
+        database is skipped twice.
+        """
+        batch = [row + (transaction_fingerprint(row[0], row[2], row[5], row[1], row[4]),) for row in batch]
+        matches = duplicate_finder.matches([row[7] for row in batch])
+        report['duplicates'] += sum(matches)
+        return [row for row, duplicate in zip(batch, matches) if not duplicate]
+
+    def _write_batch(self, batch, account_id, update_balance):
+        with self.db_connector.transaction():
+            inserted_ids, _ = self.transaction_db_service.add_transactions_bulk(batch, chunk_size=len(batch))
+            if len(inserted_ids) != len(batch):
+                raise TransactionError("Transactions could not be inserted, the batch was not imported.")
+
+            delta = sum(row[2] if row[4] == "Income" else -row[2] for row in batch)
+            if update_balance and delta:
+                if self.account_db_service.add_transaction(account_id, delta) != 1:
+                    raise TransactionError("Account balance could not be updated, the batch was not imported.")
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    value = (value or '').strip()
+    try:
+        # Fast path for ISO dates, far cheaper than strptime
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value):
+    """Parses '1,234.56', '$-12.00' or '(12.00)' into a Decimal"""
+    text = str(value or '').strip().replace(',', '').replace('$', '')
+    if not text:
+        return None
+    negative = text.startswith('(') and text.endswith(')')
+    try:
+        amount = Decimal(text.strip('()')).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+    return -amount if negative else amount
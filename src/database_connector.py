@@ -1,7 +1,30 @@
+import os
+import time
+from contextlib import contextmanager
+
 import mysql.connector
+from mysql.connector import errorcode
+
+from connection_pool import ConnectionPool
+from statement_cache import StatementCache
+from query_stats import QueryStats
+
+class TransactionError(Exception):
+    """Raised when a transaction scope could not start or had to be rolled back."""
+
 
 class DatabaseConnector:
-    def __init__(self, host, user, password, database):
+    # SQL dialect spoken by the connections this connector opens
+    dialect = 'mysql'
+    explain_prefix = 'EXPLAIN'
+    # EXPLAIN access types that look rows up through the key instead of reading all of it
+    index_lookup_types = ('const', 'eq_ref', 'ref', 'range')
+    # Driver error numbers meaning the server closed the connection
+    connection_lost_errors = (
+        errorcode.CR_SERVER_GONE_ERROR, errorcode.CR_SERVER_LOST, errorcode.CR_SERVER_LOST_EXTENDED
+    )
+
+    def __init__(self, host, user, password, database, pool_size=5, idle_timeout=300, statement_cache_size=32, query_stats=None):
         self.host = host
         self.user = user
         self.password = password
@@ -9,52 +32,408 @@ class DatabaseConnector:
         self.connection = None
         self.cursor = None
 
+        # pool_size=0 disables pooling and opens a fresh connection on every connect()
+        self.pool = ConnectionPool(self._open_connection, max_size=pool_size, idle_timeout=idle_timeout) if pool_size > 0 else None
+        self._lease = None
+        self._lease_depth = 0
+        self._in_transaction = False
+        self._transaction_depth = 0
+        self._transaction_failed = False
+        # Callbacks waiting for the outermost transaction() scope to end, see after_transaction
+        self._after_transaction = []
+
+        # Prepared statements are cached per connection; the counters are shared across the pool
+        self.statement_cache_size = statement_cache_size
+        self.statement_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._unpooled_statement_cache = None
+        self._last_cursor = None
+
+        # Timing of every statement, plus connection open/lease/release overhead
+        self.query_stats = query_stats if query_stats is not None else QueryStats()
+
+    def _open_connection(self):
+        started = time.perf_counter()
+        connection = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database
+        )
+        if self.pool is not None:
+            # Pooled connections outlive a single service call, so they must not
+            # keep a read snapshot open between leases
+            connection.autocommit = True
+        self.query_stats.record_connection('open', time.perf_counter() - started)
+        return connection
+
+    def _driver_errors(self):
+        """Exception type raised by the database driver for failed statements"""
+        return mysql.connector.Error
+
     def connect(self):
+        """Leases a connection from the pool. Nested calls share the current lease."""
+        if self._lease_depth > 0 and self.connection is not None:
+            self._lease_depth += 1
+            return
+
+        started = time.perf_counter()
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
+            if self.pool is not None:
+                self._lease = self.pool.acquire()
+                self._lease.autocommit = True
+                self.connection = self._lease.connection
+            else:
+                self.connection = self._open_connection()
             self.cursor = self.connection.cursor()
+            self._lease_depth = 1
+            self.query_stats.record_connection('lease', time.perf_counter() - started)
 #            print("Successfully connected to the database.")
         except (mysql.connector.Error, Exception) as e:
             print(f"Error connecting to MySQL: {e}")
+            if self._lease is not None:
+                self.pool.release(self._lease, discard=True) # type: ignore
+                self._lease = None
             self.connection = None
             self.cursor = None
+            self._lease_depth = 0
+
+    def execute_query(self, query, params=None, specific_column=None, prepared=False):
+            """prepared=True runs the statement through the connection's prepared statement cache.
+            Use it for fixed SQL that is executed over and over with new parameters.
 
-    def execute_query(self, query, params=None, specific_column=None):
-            if self.connection and self.connection.is_connected(): # type: ignore
+            There is no ping before each statement: the pool checks connections at
+            checkout, and a statement that finds its connection gone reconnects
+            and runs once more unless a transaction was open on it."""
+            if self.connection is None:
+                print("Not connected to the database.")
+                return None
+
+            for attempt in range(2):
+                started = time.perf_counter()
                 try:
-                    self.cursor.execute(query, params) # type: ignore
+                    cursor = self.cursor
+                    if prepared and self.statement_cache_size > 0:
+                        query, cursor = self._statement_cache().get(query)
+                    cursor.execute(query, params) # type: ignore
+                    self._last_cursor = cursor
                     # Check if the query is a SELECT statement
-                    if query.strip().lower().startswith('select'):
-                        results = self.cursor.fetchall() # type: ignore
+                    if query.strip().lower().startswith(('select', 'explain')):
+                        results = cursor.fetchall() # type: ignore
+                        self.query_stats.record_query(query, time.perf_counter() - started, len(results))
                         if specific_column is None:
                             return results
                         else:
                             return [row[specific_column] for row in results]
                     else:
                         # For INSERT, UPDATE, DELETE statements
-                        self.connection.commit() # type: ignore
+                        if not self._in_transaction and not (self._lease and self._lease.autocommit):
+                            self.connection.commit() # type: ignore
+                        self.query_stats.record_query(query, time.perf_counter() - started, cursor.rowcount) # type: ignore
                         # Return the number of affected rows
-                        return self.cursor.rowcount # type: ignore
-                except mysql.connector.Error as e:
+                        return cursor.rowcount # type: ignore
+                except self._driver_errors() as e:
+                    self.query_stats.record_query(query, time.perf_counter() - started, error=True)
+                    if attempt == 0 and self._reconnect_after(e):
+                        continue
                     print(f"Error executing '{query}':\n\n {e}")
+                    self._transaction_failed = self._in_transaction
                     return None
+
+    def execute_many(self, query, seq_params):
+        """Executes an INSERT/UPDATE once per parameter tuple and returns the total affected rows.
+        
+        mysql.connector rewrites a plain INSERT ... VALUES into a single multi-row
+        INSERT, so a whole chunk costs one round trip.
+        """
+        if self.connection is None:
+            print("Not connected to the database.")
+            return None
+
+        for attempt in range(2):
+            started = time.perf_counter()
+            try:
+                self.cursor.executemany(query, seq_params) # type: ignore
+                self._last_cursor = self.cursor
+                if not self._in_transaction and not (self._lease and self._lease.autocommit):
+                    self.connection.commit() # type: ignore
+                self.query_stats.record_query(query, time.perf_counter() - started, self.cursor.rowcount) # type: ignore
+                return self.cursor.rowcount # type: ignore
+            except self._driver_errors() as e:
+                self.query_stats.record_query(query, time.perf_counter() - started, error=True)
+                if attempt == 0 and self._reconnect_after(e):
+                    continue
+                print(f"Error executing '{query}':\n\n {e}")
+                self._transaction_failed = self._in_transaction
+                return None
+
+    def _reconnect_after(self, error):
+        """Replaces a connection the server dropped, unless a transaction was open on it.
+        Returns True when a new connection is ready for the statement to run again."""
+        if self._in_transaction or getattr(error, 'errno', None) not in self.connection_lost_errors:
+            return False
+
+        depth = self._lease_depth
+        if self._lease is not None:
+            self.pool.release(self._lease, discard=True) # type: ignore
+            self._lease = None
+        else:
+            try:
+                self.connection.close() # type: ignore
+            except Exception:
+                pass
+        self.connection = None
+        self.cursor = None
+        self._last_cursor = None
+        self._unpooled_statement_cache = None
+        self._lease_depth = 0
+
+        self.connect()
+        if self.connection is None:
+            return False
+        # The caller's connect()/close() pairs still refer to this lease
+        self._lease_depth = depth
+        return True
+
+    def last_insert_ids(self, row_count):
+        """Returns the ids generated by the last (multi-row) INSERT on the current cursor"""
+        cursor = self._last_cursor if self._last_cursor is not None else self.cursor
+        first_id = cursor.lastrowid # type: ignore
+        if not first_id or not row_count:
+            return []
+        # MySQL reports the first id of a multi-row insert and allocates the rest consecutively
+        return list(range(first_id, first_id + row_count))
+
+    def _statement_cache(self):
+        if self._lease is not None:
+            if self._lease.statement_cache is None:
+                self._lease.statement_cache = StatementCache(self.connection, self.statement_cache_size, self.statement_cache_stats)
+            return self._lease.statement_cache
+
+        if self._unpooled_statement_cache is None or self._unpooled_statement_cache.connection is not self.connection:
+            self._unpooled_statement_cache = StatementCache(self.connection, self.statement_cache_size, self.statement_cache_stats)
+        return self._unpooled_statement_cache
+
+    def begin(self):
+        """Starts an explicit transaction on the current connection. Writes are not committed until commit()."""
+        if self.connection is None:
+            print("Not connected to the database.")
+            return False
+        try:
+            if not self.connection.in_transaction:
+                self.connection.start_transaction()
+            self._in_transaction = True
+            return True
+        except self._driver_errors() as e:
+            print(f"Error starting transaction: {e}")
+            return False
+
+    def commit(self):
+        self._in_transaction = False
+        self._transaction_depth = 0
+        self._transaction_failed = False
+        if self.connection is not None:
+            started = time.perf_counter()
+            self.connection.commit()
+            self.query_stats.record_query("COMMIT", time.perf_counter() - started)
+
+    def rollback(self):
+        self._in_transaction = False
+        self._transaction_depth = 0
+        self._transaction_failed = False
+        if self.connection is not None:
+            try:
+                self.connection.rollback()
+            except self._driver_errors() as e:
+                print(f"Error rolling back transaction: {e}")
+
+    @contextmanager
+    def transaction(self):
+        """Unit of work spanning several service calls.
+
+        Service methods called inside the block lease the scope's connection
+        through their usual connect()/close() calls, and their writes share a
+        single commit at the end of the outermost block. Nested scopes join the
+        outer one. Any exception, or any statement that fails inside the scope,
+        rolls everything back, even when a nested scope's exception is caught
+        before it reaches the outermost block.
+
+            with db.transaction():
+                transaction_db_service.add_transaction(...)
+                account_db_service.add_transaction(...)
+        """
+        if self._transaction_depth > 0:
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                # The caller may swallow the error, so the outermost scope must still roll back
+                self._transaction_failed = True
+                raise
+            finally:
+                self._transaction_depth -= 1
+            return
+
+        self.connect()
+        if self.connection is None:
+            raise TransactionError("Not connected to the database.")
+        if not self.begin():
+            self.close()
+            raise TransactionError("Could not start a transaction.")
+
+        self._transaction_depth = 1
+        self._transaction_failed = False
+        try:
+            yield self
+            if self._transaction_failed:
+                raise TransactionError("A statement failed inside the transaction, all changes were rolled back.")
+            try:
+                self.commit()
+            except self._driver_errors() as e:
+                # e.g. a deadlock or a lost connection at COMMIT, or a locked SQLite file
+                raise TransactionError(f"The transaction could not be committed, all changes were rolled back: {e}") from e
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            self._transaction_depth = 0
+            self._transaction_failed = False
+            self.close()
+            callbacks, self._after_transaction = self._after_transaction, []
+            for callback in callbacks:
+                callback()
+
+    def after_transaction(self, callback):
+        """Calls callback once the outermost transaction() scope has committed or rolled back,
+        or straight away outside a scope.
+
+        Caches use it to drop entries a write made stale: until the scope ends,
+        reads on the shared connection still see the uncommitted rows, and after
+        a rollback anything cached from them is wrong as well.
+        """
+        if self._transaction_depth > 0:
+            self._after_transaction.append(callback)
+        else:
+            callback()
+
+    def iter_query(self, query, params=None, batch_size=500):
+        """Yields the rows of a SELECT without materializing the result set.
+
+        Rows are read from an unbuffered cursor `batch_size` at a time on a
+        connection of their own, so other queries can run while the caller
+        iterates. Stopping early discards that connection instead of draining
+        the remaining rows. Only time spent in the driver is recorded, not the
+        time the caller spends between batches.
+        """
+        lease = None
+        try:
+            if self.pool is not None:
+                lease = self.pool.acquire()
+                connection = lease.connection
             else:
-                print("Not connected to the database.")
+                connection = self._open_connection()
+        except (mysql.connector.Error, Exception) as e:
+            print(f"Error connecting to MySQL: {e}")
+            return
+
+        cursor = None
+        exhausted = False
+        failed = False
+        elapsed = 0.0
+        row_count = 0
+        try:
+            started = time.perf_counter()
+            cursor = connection.cursor(buffered=False)
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                elapsed += time.perf_counter() - started
+                if not rows:
+                    break
+                row_count += len(rows)
+                yield from rows
+                started = time.perf_counter()
+            exhausted = True
+        except self._driver_errors() as e:
+            failed = True
+            print(f"Error executing '{query}':\n\n {e}")
+        finally:
+            self.query_stats.record_query(query, elapsed, row_count, error=failed)
+            if exhausted and cursor is not None:
+                cursor.close()
+            if lease is not None:
+                self.pool.release(lease, discard=not exhausted) # type: ignore
+            else:
+                connection.close()
+
+    def explain(self, query, params=None):
+        """Returns the execution plan of a SELECT as a list of dicts keyed by EXPLAIN column name"""
+        self.connect()
+        try:
+            result = self.execute_query(f"{self.explain_prefix} {query.strip()}", params)
+            if result is None:
                 return None
+            columns = [column[0] for column in self._last_cursor.description] # type: ignore
+            return [dict(zip(columns, row)) for row in result]
+        finally:
+            self.close()
+
+    def index_used(self, plan, index_name):
+        """True if any step of an explain() plan looks rows up through `index_name`.
+        A full scan of the index (type 'index') does not count."""
+        return any(
+            step.get('key') == index_name and step.get('type') in self.index_lookup_types
+            for step in plan or []
+        )
 
     def close(self):
-        if self.connection and self.connection.is_connected(): # type: ignore
+        """Releases the current lease. The connection goes back to the pool when pooling is enabled."""
+        if self._lease_depth > 1:
+            self._lease_depth -= 1
+            return
+        self._lease_depth = 0
+        started = time.perf_counter()
+
+        if self._in_transaction:
+            # Never hand a connection back with uncommitted work on it
+            self.rollback()
+        self._last_cursor = None
+
+        if self._lease is not None:
+            try:
+                if self.cursor is not None:
+                    self.cursor.close()
+                self.pool.release(self._lease) # type: ignore
+            except (mysql.connector.Error, Exception) as e:
+                print(f"Error releasing MySQL connection: {e}")
+                self.pool.release(self._lease, discard=True) # type: ignore
+            self._lease = None
+            self.connection = None
+            self.cursor = None
+        elif self.connection and self.connection.is_connected(): # type: ignore
+            if self._unpooled_statement_cache is not None:
+                self._unpooled_statement_cache.clear()
+                self._unpooled_statement_cache = None
             self.cursor.close() # type: ignore
             self.connection.close() # type: ignore
+            self.connection = None
+            self.cursor = None
 #            print("MySQL connection is closed")
+        else:
+            # Nothing open, or a handle the server already dropped
+            self.connection = None
+            self.cursor = None
+            return
+        self.query_stats.record_connection('release', time.perf_counter() - started)
+
+    def shutdown(self):
+        """Releases any open lease and closes every pooled connection"""
+        self._lease_depth = min(self._lease_depth, 1)
+        self.close()
+        if self.pool is not None:
+            self.pool.close_all()
 
     def set_safe_updates(self, is_safe: bool):
-        if self.connection and self.connection.is_connected(): # type: ignore
+        if self.connection is not None:
             query = """
             SET SQL_SAFE_UPDATES = %s
             """
@@ -62,3 +441,31 @@ class DatabaseConnector:
         else:
             return None
 
+
+def create_database_connector(env=None):
+    """Builds the connector selected by DB_BACKEND ("mysql" by default, or "sqlite").
+
+    MySQL reads DB_HOST, DB_USER, DB_PASSWORD and DB_NAME. SQLite reads DB_PATH
+    and needs no server. DB_SLOW_QUERY_MS sets the slow-query threshold
+    (default 200) and DB_SLOW_QUERY_LOG a file slow statements are appended to.
+    """
+    env = os.environ if env is None else env
+    backend = (env.get('DB_BACKEND') or 'mysql').lower()
+    query_stats = QueryStats(
+        slow_query_threshold=float(env.get('DB_SLOW_QUERY_MS') or 200) / 1000,
+        slow_log_path=env.get('DB_SLOW_QUERY_LOG') or None
+    )
+
+    if backend == 'sqlite':
+        from sqlite_connector import SQLiteConnector
+        return SQLiteConnector(env.get('DB_PATH') or 'budget.db', query_stats=query_stats)
+    if backend != 'mysql':
+        raise ValueError(f"Unknown DB_BACKEND '{backend}', expected 'mysql' or 'sqlite'")
+
+    return DatabaseConnector(
+        host=env.get('DB_HOST'),
+        user=env.get('DB_USER'),
+        password=env.get('DB_PASSWORD'),
+        database=env.get('DB_NAME'),
+        query_stats=query_stats
+    )
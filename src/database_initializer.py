@@ -1,9 +1,20 @@
-import mysql.connector
+import hashlib
+import json
+from datetime import date
+
 from database_connector import DatabaseConnector
+from schema_migrator import SchemaMigrator
+from controllers.db.category_totals_db_service import CategoryTotalsDBService
+from controllers.db.transaction_db_service import TransactionDBService
+from controllers.db.transaction_query import TEXT_SEARCH_COLUMNS
 
 class DatabaseInitializer:
-    def __init__(self, db_connector: DatabaseConnector):
+    def __init__(self, db_connector: DatabaseConnector, partition_transactions=False):
         self.db = db_connector
+
+        # MySQL only: RANGE partition transactions by YEAR(date), see ensure_transaction_partitions
+        self.partition_transactions = partition_transactions
+        self.partition_years_ahead = 1
         
         # Define the exact schema from README.md
         self.required_tables = {
@@ -15,7 +26,11 @@ class DatabaseInitializer:
                 'category': 'INT DEFAULT NULL',
                 'type': 'VARCHAR(10) NOT NULL',
                 'notes': 'VARCHAR(1000)',
-                'account': 'INT NOT NULL'
+                'account': 'INT NOT NULL',
+                # Content hash used to spot duplicates, see transaction_fingerprint
+                'fingerprint': 'VARCHAR(40)',
+                # Shared by the two legs of a transfer, see TransactionDBService.add_transfer
+                'transfer_id': 'INT DEFAULT NULL'
             },
             'accounts': {
                 'id': 'INT AUTO_INCREMENT PRIMARY KEY',
@@ -36,30 +51,138 @@ class DatabaseInitializer:
                 'category_id': 'INT NOT NULL',
                 'goal': 'DECIMAL(10,2) NOT NULL',
                 'date_created': 'DATE'
+            },
+            # Net amount and count per category and month (period = year * 100 + month),
+            # kept up to date by the transaction writes and read by the budget
+            'category_month_totals': {
+                'id': 'INT AUTO_INCREMENT PRIMARY KEY',
+                'category_id': 'INT NOT NULL',
+                'period': 'INT NOT NULL',
+                'net_amount': 'DECIMAL(12,2) NOT NULL',
+                'txn_count': 'INT NOT NULL'
+            },
+            # Single row holding the checksum of the schema last validated
+            'schema_version': {
+                'id': 'INT PRIMARY KEY',
+                'checksum': 'VARCHAR(64) NOT NULL',
+                'date_applied': 'DATE'
             }
         }
+
+        # Applies column and index differences to existing tables in place
+        self.migrator = SchemaMigrator(self.db, self._column_types_match)
+
+        # Secondary indexes per table: index name -> indexed columns
+        self.required_indexes = {
+            'transactions': {
+                # Every TransactionDBService search orders by t.date DESC, t.id DESC
+                'idx_transactions_date_id': ['date', 'id'],
+                # Per-account ledger scans in (date, id) order, see TransactionDBService.account_ledger_page
+                'idx_transactions_account': ['account', 'date', 'id'],
+                'idx_transactions_category': ['category'],
+                'idx_transactions_type': ['type'],
+                # Bulk writes look up each batch's fingerprints to find duplicates
+                'idx_transactions_fingerprint': ['fingerprint'],
+                'idx_transactions_transfer_id': ['transfer_id']
+            },
+            'accounts': {
+                'idx_accounts_name': ['name']
+            },
+            'categories': {
+                'idx_categories_name': ['name']
+            },
+            'budget_goals': {
+                'idx_budget_goals_category_id': ['category_id']
+            },
+            'category_month_totals': {
+                # The budget reads one period (or a range of them) for every category
+                'uq_category_month_totals_period_category': ['period', 'category_id']
+            }
+        }
+
+        # Indexes from required_indexes that are created UNIQUE
+        self.unique_indexes = {'uq_category_month_totals_period_category'}
+
+        # Indexes created by earlier versions that are dropped when found
+        self.retired_indexes = {
+            'transactions': ['idx_transactions_date_category'],
+            'category_month_totals': ['uq_category_month_totals_category_period']
+        }
+
+        # Transaction columns covered by full-text search, see ensure_text_search
+        self.text_search_columns = list(TEXT_SEARCH_COLUMNS)
     
-    def initialize_database(self):
+    def initialize_database(self, force_validation=False):
+        """Creates or validates the schema.
+
+        When the checksum stored in schema_version matches schema_checksum(),
+        startup costs a single lookup. Full validation only runs after the
+        declared schema changed, or when force_validation is set.
+        """
         try:
             # Connect to database
             self.db.connect()
             if not self.db.connection or not self.db.connection.is_connected():
                 print("Failed to connect to database")
                 return False
+
+            checksum = self.schema_checksum()
+            if not force_validation and self._stored_checksum() == checksum:
+                print("Database schema up to date")
+                if self.partition_transactions:
+                    self.ensure_transaction_partitions(self.partition_years_ahead)
+                return True
             
             print("Checking database schema...")
             
             # Check and create each required table
+            created_tables = []
             for table_name, schema in self.required_tables.items():
                 if not self._table_exists(table_name):
                     print(f"Creating missing table: {table_name}")
                     self._create_table(table_name, schema)
+                    created_tables.append(table_name)
                 elif not self._validate_table_schema(table_name, schema):
-                    print(f"Table {table_name} schema mismatch - recreating")
-                    self._drop_table(table_name)
-                    self._create_table(table_name, schema)
+                    print(f"Table {table_name} schema mismatch - migrating")
+                    self.migrator.migrate_table(table_name, schema, self.migrator.current_columns(table_name))
+                    print(f"Table {table_name} - migrated")
                 else:
                     print(f"Table {table_name} - OK")
+
+            current_indexes = self.migrator.current_indexes()
+            for table_name, indexes in self.required_indexes.items():
+                self.migrator.migrate_indexes(table_name, indexes, current_indexes, self.unique_indexes)
+            # After the replacements exist, so a retired unique index is never missing in between
+            for table_name, index_names in self.retired_indexes.items():
+                self.migrator.drop_indexes(table_name, index_names, current_indexes)
+
+            self.ensure_text_search()
+
+            if 'category_month_totals' in created_tables:
+                # New summary table next to an existing ledger: fill it from the raw transactions
+                CategoryTotalsDBService(self.db).rebuild()
+
+            # Rows stored before the fingerprint column existed
+            backfilled = TransactionDBService(self.db).backfill_fingerprints()
+            if backfilled:
+                print(f"Fingerprinted {backfilled} existing transactions")
+
+            # Transfers recorded as a single row before they had two legs
+            linked = TransactionDBService(self.db).link_legacy_transfers()
+            if linked:
+                print(f"Added the outgoing leg to {linked} earlier transfers")
+
+            missing = self.missing_indexes()
+            if missing:
+                for table_name, index_name in missing:
+                    print(f"WARNING: index {index_name} on {table_name} is missing")
+            else:
+                print("Indexes - OK")
+                # Only a fully valid schema is recorded, so problems are rechecked next launch
+                self._store_checksum(checksum)
+
+            if self.partition_transactions:
+                self.ensure_transaction_partitions(self.partition_years_ahead)
             
             print("Database schema validation complete")
             return True
@@ -67,41 +190,199 @@ class DatabaseInitializer:
         except Exception as e:
             print(f"Database initialization failed: {e}")
             return False
+        finally:
+            self.db.close()
     
-    def _table_exists(self, table_name):
+    def ensure_text_search(self):
+        """Creates the full-text index TransactionDBService.search_text uses.
+
+        On MySQL this is the FULLTEXT index ft_transactions_text. MySQL cannot
+        combine FULLTEXT indexes with partitioning, so with partition_transactions
+        the index is dropped instead and search_text falls back to a LIKE scan.
+        On SQLite an FTS5 table, transactions_fts, indexes the transactions table
+        and is kept in sync by triggers; it is rebuilt whenever part of it had to
+        be created, e.g. after a migration replaced the transactions table.
+        Expects an open connection; returns True when an index had to be created.
+        """
+        columns = ", ".join(self.text_search_columns)
+
+        if self.db.dialect != 'sqlite':
+            exists = ('transactions', 'ft_transactions_text') in self.migrator.current_indexes()
+            if self.partition_transactions:
+                print("Full-text search is not available on partitioned transactions - using LIKE")
+                if exists:
+                    self.migrator.execute("DROP INDEX ft_transactions_text ON transactions")
+                return False
+            if exists:
+                return False
+            print("Creating full-text index: ft_transactions_text")
+            self.migrator.execute(f"CREATE FULLTEXT INDEX ft_transactions_text ON transactions ({columns})")
+            return True
+
+        old_values = ", ".join(f"old.{name}" for name in self.text_search_columns)
+        new_values = ", ".join(f"new.{name}" for name in self.text_search_columns)
+        delete = f"INSERT INTO transactions_fts (transactions_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+        insert = f"INSERT INTO transactions_fts (rowid, {columns}) VALUES (new.id, {new_values});"
+        statements = {
+            'transactions_fts': f"CREATE VIRTUAL TABLE transactions_fts USING fts5({columns}, content='transactions', content_rowid='id')",
+            'transactions_fts_insert': f"CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN {insert} END",
+            'transactions_fts_delete': f"CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN {delete} END",
+            'transactions_fts_update': f"CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN {delete} {insert} END",
+        }
+
+        result = self.db.execute_query("SELECT name FROM sqlite_master WHERE name LIKE 'transactions_fts%'")
+        existing = {row[0] for row in result} if isinstance(result, list) else set()
+        missing = [name for name in statements if name not in existing]
+        if not missing:
+            return False
+
+        print("Creating full-text index: transactions_fts")
+        for name in missing:
+            self.migrator.execute(statements[name])
+        self.migrator.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+        return True
+
+    def ensure_transaction_partitions(self, years_ahead=1, current_year=None):
+        """Partitions transactions by year and keeps empty partitions ready for the next `years_ahead` years.
+
+        The first call converts the table: the primary key becomes (id, date),
+        since MySQL requires the partition column in every unique key, and one
+        partition per year is created from the oldest transaction on, plus a
+        catch-all `pfuture`. Later calls split upcoming years out of `pfuture`
+        while it is still empty, which is instant. Date range filters (like the
+        budget's half-open month ranges) then only read the matching partition.
+        Note that MySQL does not support FULLTEXT indexes on partitioned tables.
+        Expects an open connection; returns the partitions created.
+        """
+        if self.db.dialect != 'mysql':
+            print("Partitioning is only available on MySQL - skipped")
+            return []
+
+        current_year = current_year or date.today().year
+        last_year = current_year + years_ahead
+        partitions = self._transaction_partitions()
+
+        if not partitions:
+            result = self.db.execute_query("SELECT MIN(YEAR(date)) FROM transactions")
+            first_year = result[0][0] if result and result[0][0] else current_year # type: ignore
+            years = list(range(first_year, last_year + 1))
+
+            print(f"Partitioning transactions by year ({first_year}-{last_year})")
+            self.migrator.execute("ALTER TABLE transactions DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)")
+            definitions = ", ".join(f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in years)
+            self.migrator.execute(
+                f"ALTER TABLE transactions PARTITION BY RANGE (YEAR(date)) ({definitions}, PARTITION pfuture VALUES LESS THAN MAXVALUE)"
+            )
+            return [f"p{year}" for year in years]
+
+        created = []
+        partitioned_years = [int(name[1:]) for name, _ in partitions if name != 'pfuture']
+        for year in range(max(partitioned_years, default=current_year - 1) + 1, last_year + 1):
+            print(f"Creating partition p{year}")
+            self.migrator.execute(
+                f"ALTER TABLE transactions REORGANIZE PARTITION pfuture INTO "
+                f"(PARTITION p{year} VALUES LESS THAN ({year + 1}), PARTITION pfuture VALUES LESS THAN MAXVALUE)"
+            )
+            created.append(f"p{year}")
+        return created
+
+    def prune_transaction_partitions(self, before_year):
+        """Drops the yearly partitions older than `before_year`, deleting their transactions.
+
+        Their months are removed from category_month_totals as well. Account
+        balances are stored separately and are not changed. Returns the
+        partitions dropped.
+        """
+        if self.db.dialect != 'mysql':
+            print("Partitioning is only available on MySQL - skipped")
+            return []
+
+        self.db.connect()
+        try:
+            old = [name for name, _ in self._transaction_partitions() if name != 'pfuture' and int(name[1:]) < before_year]
+            if old:
+                print(f"Dropping partitions: {', '.join(old)}")
+                self.migrator.execute(f"ALTER TABLE transactions DROP PARTITION {', '.join(old)}")
+                # DROP PARTITION bypasses the services, so their totals are removed here
+                if CategoryTotalsDBService(self.db).delete_before(before_year * 100) is None:
+                    print("Error removing category totals of the dropped partitions, run a rebuild")
+            return old
+        finally:
+            self.db.close()
+
+    def _transaction_partitions(self):
+        query = """
+        SELECT partition_name, partition_description
+        FROM information_schema.partitions
+        WHERE table_schema = %s AND table_name = 'transactions' AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+        """
+        result = self.db.execute_query(query, (self.db.database,))
+        return result if isinstance(result, list) else []
+
+    def schema_checksum(self):
+        """SHA-256 of the declared tables and indexes"""
+        schema = json.dumps(
+            {
+                'tables': self.required_tables,
+                'indexes': self.required_indexes,
+                'unique': sorted(self.unique_indexes),
+                'retired': self.retired_indexes,
+                'text_search': self.text_search_columns,
+                'partitioned': self.partition_transactions
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(schema.encode()).hexdigest()
+
+    def _stored_checksum(self):
+        # Fails on databases created before schema_version existed, which then get a full validation
+        result = self.db.execute_query("SELECT checksum FROM schema_version WHERE id = 1")
+        if not result or not isinstance(result, list):
+            return None
+        return result[0][0]
+
+    def _store_checksum(self, checksum):
         query = """
-        SELECT COUNT(*) 
-        FROM information_schema.tables 
-        WHERE table_schema = %s AND table_name = %s
+        REPLACE INTO schema_version (id, checksum, date_applied)
+        VALUES (1, %s, %s)
         """
-        result = self.db.execute_query(query, (self.db.database, table_name))
+        self.db.execute_query(query, (checksum, date.today()))
+
+    def missing_indexes(self):
+        """Returns (table, index) pairs from required_indexes that do not exist. Expects an open connection."""
+        existing = self.migrator.current_indexes()
+        return [
+            (table_name, index_name)
+            for table_name, indexes in self.required_indexes.items()
+            for index_name in indexes
+            if (table_name, index_name) not in existing
+        ]
+
+    def _table_exists(self, table_name):
+        if self.db.dialect == 'sqlite':
+            query = """
+            SELECT COUNT(*)
+            FROM sqlite_master
+            WHERE type = 'table' AND name = %s
+            """
+            result = self.db.execute_query(query, (table_name,))
+        else:
+            query = """
+            SELECT COUNT(*) 
+            FROM information_schema.tables 
+            WHERE table_schema = %s AND table_name = %s
+            """
+            result = self.db.execute_query(query, (self.db.database, table_name))
         if result is None or not isinstance(result, list) or len(result) == 0:
             return False
         return result[0][0] > 0 # type: ignore
     
     def _validate_table_schema(self, table_name, expected_schema):
-        query = """
-        SELECT column_name, column_type, is_nullable, column_key, extra
-        FROM information_schema.columns 
-        WHERE table_schema = %s AND table_name = %s
-        ORDER BY ordinal_position
-        """
-        
-        result = self.db.execute_query(query, (self.db.database, table_name))
-        if not result or not isinstance(result, list):
+        current_columns = self.migrator.current_columns(table_name)
+        if not current_columns:
             return False
         
-        # Convert result to a more manageable format
-        current_columns = {}
-        for row in result:
-            col_name, col_type, is_nullable, col_key, extra = row
-            current_columns[col_name] = {
-                'type': col_type,
-                'nullable': is_nullable == 'YES',
-                'key': col_key,
-                'extra': extra
-            }
-        
         # Check if all expected columns exist with correct properties
         for col_name, col_def in expected_schema.items():
             if col_name not in current_columns:
@@ -144,8 +425,3 @@ class DatabaseInitializer:
         create_query = f"CREATE TABLE {table_name} ({', '.join(columns)})"
         self.db.execute_query(create_query)
         print(f"Created table: {table_name}")
-    
-    def _drop_table(self, table_name):
-        drop_query = f"DROP TABLE IF EXISTS {table_name}"
-        self.db.execute_query(drop_query)
-        print(f"Dropped table: {table_name}") 
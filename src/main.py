@@ -3,7 +3,7 @@ import os
 from dotenv import load_dotenv
 from PyQt6.QtWidgets import QApplication
 from views.main_window import MainWindow
-from database_connector import DatabaseConnector
+from database_connector import create_database_connector
 from database_initializer import DatabaseInitializer
 
 def main():
@@ -13,17 +13,14 @@ def main():
     else:
         load_dotenv()
     
-    # Initialize database connection
-    db = DatabaseConnector(
-        host=os.getenv('DB_HOST'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD'),
-        database=os.getenv('DB_NAME')
-    )
+    # Initialize database connection (MySQL, or embedded SQLite when DB_BACKEND=sqlite)
+    db = create_database_connector()
     
     # Initialize and validate database schema before UI starts
-    db_initializer = DatabaseInitializer(db)
-    if not db_initializer.initialize_database():
+    # (DB_VALIDATE_SCHEMA=1 forces a full check even when the stored schema checksum matches)
+    # (DB_PARTITION_TRANSACTIONS=1 partitions transactions by year on MySQL)
+    db_initializer = DatabaseInitializer(db, partition_transactions=os.getenv('DB_PARTITION_TRANSACTIONS') == '1')
+    if not db_initializer.initialize_database(force_validation=os.getenv('DB_VALIDATE_SCHEMA') == '1'):
         print("Failed to initialize database. Exiting...")
         sys.exit(1)
     
@@ -0,0 +1,162 @@
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=512)
+def fingerprint(query):
+    """Normalizes a statement so executions that only differ in literals,
+    placeholders or whitespace are counted together"""
+    query = _STRING_LITERAL.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    query = query.replace("%s", "?")
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+class TimingStats:
+    """Counters for one statement fingerprint or connection event.
+
+    Percentiles are computed over the most recent `sample_size` timings so
+    memory stays bounded on long running sessions.
+    """
+    def __init__(self, sample_size=1000):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self._samples = deque(maxlen=sample_size)
+
+    def record(self, seconds, rows=0, error=False):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        if error:
+            self.errors += 1
+        self._samples.append(seconds)
+
+    def snapshot(self):
+        samples = sorted(self._samples)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': _percentile(samples, 0.50),
+            'p95': _percentile(samples, 0.95),
+            'max': self.max,
+            'rows': self.rows,
+        }
+
+
+class QueryStats:
+    """Per-statement timing, connection overhead counters and a slow-query log.
+
+    Statements slower than `slow_query_threshold` seconds are kept in a bounded
+    in-memory log and, when `slow_log_path` is set, appended to that file.
+    """
+    def __init__(self, slow_query_threshold=0.2, slow_log_size=100, slow_log_path=None, sample_size=1000):
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_log_path = slow_log_path
+        self.sample_size = sample_size
+
+        self._statements = {}
+        self._connections = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record_query(self, query, seconds, rows=0, error=False):
+        key = fingerprint(query)
+        rows = rows if isinstance(rows, int) and rows > 0 else 0
+
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = TimingStats(self.sample_size)
+            stats.record(seconds, rows, error)
+
+            if self.slow_query_threshold is not None and seconds >= self.slow_query_threshold:
+                entry = {
+                    'time': time.time(),
+                    'seconds': seconds,
+                    'rows': rows,
+                    'fingerprint': key,
+                }
+                self._slow_queries.append(entry)
+                self._write_slow_query(entry)
+
+    def record_connection(self, event, seconds):
+        """Times connection handling apart from statements: 'open' is a new
+        physical connection (handshake and auth), 'lease' and 'release' are
+        connect()/close() calls."""
+        with self._lock:
+            stats = self._connections.get(event)
+            if stats is None:
+                stats = self._connections[event] = TimingStats(self.sample_size)
+            stats.record(seconds)
+
+    def snapshot(self):
+        """Returns a point in time copy of every counter and the slow-query log"""
+        with self._lock:
+            return {
+                'statements': {key: stats.snapshot() for key, stats in self._statements.items()},
+                'connections': {event: stats.snapshot() for event, stats in self._connections.items()},
+                'slow_queries': list(self._slow_queries),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._connections.clear()
+            self._slow_queries.clear()
+
+    def report(self, limit=20):
+        """Formats the snapshot as a plain text table, slowest total time first"""
+        snapshot = self.snapshot()
+        lines = [f"{'count':>8} {'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'rows':>8}  statement"]
+
+        statements = sorted(snapshot['statements'].items(), key=lambda item: item[1]['total'], reverse=True)
+        for key, stats in statements[:limit]:
+            lines.append(_format_row(stats, key[:100]))
+
+        if snapshot['connections']:
+            lines.append("")
+            for event, stats in sorted(snapshot['connections'].items()):
+                lines.append(_format_row(stats, f"[{event}]"))
+
+        if snapshot['slow_queries']:
+            lines.append("")
+            lines.append(f"{len(snapshot['slow_queries'])} slow queries over {self.slow_query_threshold * 1000:.0f} ms")
+
+        return "\n".join(lines)
+
+    def _write_slow_query(self, entry):
+        if not self.slow_log_path:
+            return
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))
+        try:
+            with open(self.slow_log_path, 'a') as f:
+                f.write(f"{timestamp}\t{entry['seconds'] * 1000:.1f} ms\t{entry['rows']} rows\t{entry['fingerprint']}\n")
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+
+def _percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def _format_row(stats, label):
+    return (
+        f"{stats['count']:>8} {stats['total'] * 1000:>10.1f} {stats['p50'] * 1000:>8.2f} "
+        f"{stats['p95'] * 1000:>8.2f} {stats['max'] * 1000:>8.2f} {stats['rows']:>8}  {label}"
+    )
@@ -0,0 +1,229 @@
+import time
+
+
+class SchemaMigrator:
+    """Brings existing tables in line with their declared schema without losing data.
+
+    Missing columns are added and mismatched columns modified with ALTER TABLE.
+    When an ALTER cannot be done in place (any column change on SQLite, or a
+    column type change on a table with at least `copy_threshold` rows), the
+    table is rebuilt instead: a shadow table with the new definition is
+    filled `chunk_size` rows at a time in id order and then swapped in.
+    Columns that exist in the database but not in the declared schema are kept.
+
+    `column_matches(definition, current_column)` decides whether a column
+    already satisfies its declared definition.
+    """
+    def __init__(self, db, column_matches, chunk_size=10000, copy_threshold=100000):
+        self.db = db
+        self.column_matches = column_matches
+        self.chunk_size = chunk_size
+        self.copy_threshold = copy_threshold
+
+    def current_columns(self, table_name):
+        """Returns {column: {'type', 'nullable', 'key', 'extra'}} in table order. Expects an open connection."""
+        if self.db.dialect == 'sqlite':
+            query = """
+            SELECT name, type, CASE WHEN "notnull" = 1 OR pk > 0 THEN 'NO' ELSE 'YES' END, CASE WHEN pk > 0 THEN 'PRI' ELSE '' END, ''
+            FROM pragma_table_info(%s)
+            ORDER BY cid
+            """
+            result = self.db.execute_query(query, (table_name,))
+        else:
+            query = """
+            SELECT column_name, column_type, is_nullable, column_key, extra
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+            """
+            result = self.db.execute_query(query, (self.db.database, table_name))
+        if not result or not isinstance(result, list):
+            return {}
+
+        current_columns = {}
+        for row in result:
+            col_name, col_type, is_nullable, col_key, extra = row
+            current_columns[col_name] = {
+                'type': col_type,
+                'nullable': is_nullable == 'YES',
+                'key': col_key,
+                'extra': extra
+            }
+        return current_columns
+
+    def current_indexes(self):
+        """Returns {(table, index): [columns]} for every secondary index. Expects an open connection."""
+        if self.db.dialect == 'sqlite':
+            query = """
+            SELECT m.tbl_name, m.name, i.name
+            FROM sqlite_master m, pragma_index_info(m.name) i
+            WHERE m.type = 'index'
+            ORDER BY m.tbl_name, m.name, i.seqno
+            """
+            result = self.db.execute_query(query)
+        else:
+            query = """
+            SELECT table_name, index_name, column_name
+            FROM information_schema.statistics
+            WHERE table_schema = %s AND index_name != 'PRIMARY'
+            ORDER BY table_name, index_name, seq_in_index
+            """
+            result = self.db.execute_query(query, (self.db.database,))
+        if result is None or not isinstance(result, list):
+            return {}
+
+        indexes = {}
+        for table_name, index_name, column_name in result:
+            indexes.setdefault((table_name, index_name), []).append(column_name)
+        return indexes
+
+    def plan_columns(self, expected_schema, current_columns):
+        """Returns the column changes as (action, column) pairs in declared order, action being 'add' or 'modify'"""
+        changes = []
+        for col_name, col_def in expected_schema.items():
+            if col_name not in current_columns:
+                changes.append(('add', col_name))
+            elif not self.column_matches(col_def, current_columns[col_name]):
+                changes.append(('modify', col_name))
+        return changes
+
+    def migrate_table(self, table_name, expected_schema, current_columns):
+        """Applies the column changes for one table and returns them"""
+        changes = self.plan_columns(expected_schema, current_columns)
+        if not changes:
+            return changes
+
+        if self._needs_copy(table_name, expected_schema, changes):
+            self._copy_table(table_name, expected_schema, current_columns)
+            return changes
+
+        for action, col_name in changes:
+            definition = expected_schema[col_name]
+            if action == 'modify' and current_columns[col_name]['key'] == 'PRI':
+                # The primary key itself stays, only the column definition changes
+                definition = definition.replace('PRIMARY KEY', '').strip()
+            keyword = 'ADD COLUMN' if action == 'add' else 'MODIFY COLUMN'
+            print(f"Migrating {table_name}: {action} column {col_name}")
+            self.execute(f"ALTER TABLE {table_name} {keyword} {col_name} {definition}")
+        return changes
+
+    def migrate_indexes(self, table_name, expected_indexes, current_indexes, unique_indexes=()):
+        """Recreates indexes whose columns changed and creates missing ones, returning their names.
+        Names listed in `unique_indexes` are created as UNIQUE indexes."""
+        changed = []
+        for index_name, columns in expected_indexes.items():
+            existing = current_indexes.get((table_name, index_name))
+            if existing == list(columns):
+                continue
+            if existing is not None:
+                print(f"Migrating {table_name}: rebuilding index {index_name}")
+                if self.db.dialect == 'sqlite':
+                    self.execute(f"DROP INDEX {index_name}")
+                else:
+                    self.execute(f"DROP INDEX {index_name} ON {table_name}")
+            else:
+                print(f"Creating missing index: {index_name}")
+            unique = "UNIQUE " if index_name in unique_indexes else ""
+            self.execute(f"CREATE {unique}INDEX {index_name} ON {table_name} ({', '.join(columns)})")
+            changed.append(index_name)
+        return changed
+
+    def drop_indexes(self, table_name, index_names, current_indexes):
+        """Drops the named indexes that still exist, returning their names"""
+        dropped = []
+        for index_name in index_names:
+            if (table_name, index_name) not in current_indexes:
+                continue
+            print(f"Migrating {table_name}: dropping index {index_name}")
+            if self.db.dialect == 'sqlite':
+                self.execute(f"DROP INDEX {index_name}")
+            else:
+                self.execute(f"DROP INDEX {index_name} ON {table_name}")
+            dropped.append(index_name)
+        return dropped
+
+    def _needs_copy(self, table_name, expected_schema, changes):
+        if self.db.dialect == 'sqlite':
+            # SQLite can only ADD COLUMN, and only nullable columns without a key
+            return any(
+                action == 'modify' or 'NOT NULL' in expected_schema[col_name].upper() or 'KEY' in expected_schema[col_name].upper()
+                for action, col_name in changes
+            )
+        if not any(action == 'modify' for action, _ in changes):
+            return False
+        return self._row_count(table_name) >= self.copy_threshold
+
+    def _row_count(self, table_name):
+        result = self.db.execute_query(f"SELECT COUNT(*) FROM {table_name}")
+        return result[0][0] if result else 0 # type: ignore
+
+    def _copy_table(self, table_name, expected_schema, current_columns):
+        shadow = f"{table_name}_migration"
+        total = self._row_count(table_name)
+        print(f"Migrating {table_name}: rebuilding table ({total} rows)")
+
+        # Columns only the database knows about are carried over unchanged
+        definitions = dict(expected_schema)
+        for col_name, col in current_columns.items():
+            if col_name not in definitions:
+                definitions[col_name] = col['type'] + ('' if col['nullable'] else ' NOT NULL')
+
+        target_columns = list(definitions)
+        source_columns = [
+            col_name if col_name in current_columns else _fill_value(definitions[col_name])
+            for col_name in target_columns
+        ]
+
+        self.execute(f"DROP TABLE IF EXISTS {shadow}")
+        self.execute(f"CREATE TABLE {shadow} ({', '.join(f'{name} {definition}' for name, definition in definitions.items())})")
+
+        insert = f"INSERT INTO {shadow} ({', '.join(target_columns)}) SELECT {', '.join(source_columns)} FROM {table_name}"
+        started = time.perf_counter()
+        copied = 0
+        last_id = None
+        while True:
+            # Keyset chunks: find the id ending this chunk, then copy (last_id, upper_id]
+            lower = "" if last_id is None else "WHERE id > %s"
+            lower_params = () if last_id is None else (last_id,)
+            upper = self.db.execute_query(
+                f"SELECT id FROM {table_name} {lower} ORDER BY id LIMIT 1 OFFSET %s",
+                lower_params + (self.chunk_size - 1,)
+            )
+
+            if upper:
+                upper_id = upper[0][0] # type: ignore
+                where = "WHERE id <= %s" if last_id is None else "WHERE id > %s AND id <= %s"
+                copied += self.execute(f"{insert} {where}", lower_params + (upper_id,))
+                last_id = upper_id
+                print(f"Migrating {table_name}: copied {copied}/{total} rows ({time.perf_counter() - started:.1f}s)")
+            else:
+                copied += self.execute(f"{insert} {lower}", lower_params or None)
+                break
+
+        print(f"Migrating {table_name}: copied {copied}/{total} rows, swapping tables")
+        if self.db.dialect == 'sqlite':
+            with self.db.transaction():
+                self.execute(f"DROP TABLE {table_name}")
+                self.execute(f"ALTER TABLE {shadow} RENAME TO {table_name}")
+        else:
+            self.execute(f"RENAME TABLE {table_name} TO {table_name}_old, {shadow} TO {table_name}")
+            self.execute(f"DROP TABLE {table_name}_old")
+
+    def execute(self, query, params=None):
+        """Runs one migration statement, raising if it fails so no later step runs"""
+        result = self.db.execute_query(query, params)
+        if result is None:
+            raise RuntimeError(f"Migration statement failed: {query}")
+        return result
+
+
+def _fill_value(definition):
+    """Value used for a new NOT NULL column on rows copied from the old table"""
+    definition = definition.upper()
+    if 'NOT NULL' not in definition:
+        return 'NULL'
+    if 'CHAR' in definition:
+        return "''"
+    if 'DATE' in definition:
+        return 'CURRENT_DATE'
+    return '0'
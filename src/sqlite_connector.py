@@ -0,0 +1,227 @@
+import re
+import sqlite3
+import itertools
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from database_connector import DatabaseConnector
+
+# Store dates as ISO text and money as exact decimal text, and read them back
+# as the same Python types mysql.connector returns
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+
+_memory_database_ids = itertools.count(1)
+
+_SAFE_UPDATES = re.compile(r"^\s*SET\s+SQL_SAFE_UPDATES\b", re.IGNORECASE)
+_AUTO_INCREMENT_KEY = re.compile(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE)
+_ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_FUNCTION = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_UPDATE_JOIN = re.compile(
+    r"\bUPDATE\s+(?P<table>\w+)\s+JOIN\s+(?P<joined>\w+)\s+ON\s+(?P<on>.+?)\s+SET\s+(?P<set>.+?)(?:\s+WHERE\s+(?P<where>.+?))?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+@lru_cache(maxsize=256)
+def translate_query(query, has_params):
+    """Rewrites the MySQL statements the services use into SQLite.
+
+    Returns None for statements that have no SQLite equivalent and can be skipped.
+    """
+    if _SAFE_UPDATES.match(query):
+        return None
+
+    if has_params:
+        # mysql.connector only interprets %s and %% when parameters are passed
+        query = query.replace("%s", "?").replace("%%", "%")
+
+    query = _AUTO_INCREMENT_KEY.sub("INTEGER PRIMARY KEY AUTOINCREMENT", query)
+
+    # INSERT ... ON DUPLICATE KEY UPDATE col = VALUES(col) becomes an upsert on
+    # whichever unique constraint conflicts, reading the new row from `excluded`
+    match = _ON_DUPLICATE_KEY.search(query)
+    if match:
+        update = _VALUES_FUNCTION.sub(r"excluded.\1", query[match.end():])
+        query = f"{query[:match.start()]}ON CONFLICT DO UPDATE SET{update}"
+
+    # MySQL's multi-table UPDATE ... JOIN ... SET becomes SQLite's UPDATE ... SET ... FROM
+    match = _UPDATE_JOIN.search(query)
+    if match:
+        where = match.group('on')
+        if match.group('where'):
+            where = f"({where}) AND ({match.group('where')})"
+        query = (
+            f"{query[:match.start()]}UPDATE {match.group('table')}\n"
+            f"SET {match.group('set')}\n"
+            f"FROM {match.group('joined')}\n"
+            f"WHERE {where}"
+        )
+
+    return query
+
+
+class SQLiteCursor:
+    """Cursor wrapper that accepts the MySQL flavoured SQL the services send."""
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.cursor()
+        self._skipped = False
+        self._rowcount = -1
+
+    def execute(self, query, params=None):
+        self._run(self._cursor.execute, translate_query(query, params is not None), tuple(params) if params is not None else ())
+
+    def executemany(self, query, seq_params):
+        self._run(self._cursor.executemany, translate_query(query, True), seq_params)
+
+    def _run(self, method, sql, params):
+        self._skipped = sql is None
+        if self._skipped:
+            self._rowcount = 0
+            return
+        changes_before = self._connection.total_changes
+        method(sql, params)
+        self._rowcount = self._cursor.rowcount
+        if self._rowcount == -1:
+            # sqlite3 only reports rowcount for statements that start with
+            # INSERT/UPDATE/DELETE, not for WITH ... UPDATE
+            self._rowcount = self._connection.total_changes - changes_before
+
+    def fetchall(self):
+        return [] if self._skipped else self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return [] if self._skipped else self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+    @property
+    def rowcount(self):
+        return self._rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+
+class SQLiteConnection:
+    """Gives a sqlite3 connection the parts of the mysql.connector API DatabaseConnector uses."""
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, **kwargs):
+        # buffered/prepared only matter to MySQL: sqlite3 always steps rows
+        # lazily and keeps its own compiled statement cache
+        return SQLiteCursor(self._connection)
+
+    def is_connected(self):
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def start_transaction(self):
+        self._connection.execute("BEGIN")
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+    def last_insert_rowid(self):
+        return self._connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+
+class SQLiteConnector(DatabaseConnector):
+    """Embedded SQLite backend behind the DatabaseConnector interface.
+
+    `database` is a file path, or ":memory:" for a private in-memory database
+    shared by every connection in the pool.
+    """
+    dialect = 'sqlite'
+    explain_prefix = 'EXPLAIN QUERY PLAN'
+    # A database file cannot drop the connection the way a server can
+    connection_lost_errors = ()
+
+    def __init__(self, database, pool_size=5, idle_timeout=300, timeout=5, query_stats=None):
+        self.timeout = timeout
+        self._uri = False
+        self._anchor = None
+        if database == ":memory:":
+            # Pooled connections must all see the same in-memory database, which
+            # lives as long as one connection to it stays open
+            database = f"file:budget_memory_{next(_memory_database_ids)}?mode=memory&cache=shared"
+            self._uri = True
+
+        # sqlite3 caches compiled statements itself, so the prepared statement cache is not needed
+        super().__init__(None, None, None, database, pool_size=pool_size, idle_timeout=idle_timeout, statement_cache_size=0, query_stats=query_stats)
+
+        if self._uri:
+            self._anchor = self._open_connection()
+
+    def _driver_errors(self):
+        return sqlite3.Error
+
+    def _open_connection(self):
+        started = time.perf_counter()
+        connection = sqlite3.connect(
+            self.database,
+            timeout=self.timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            check_same_thread=False,
+            uri=self._uri
+        )
+        connection.create_function("YEAR", 1, _year, deterministic=True)
+        connection.create_function("MONTH", 1, _month, deterministic=True)
+        self.query_stats.record_connection('open', time.perf_counter() - started)
+        return SQLiteConnection(connection)
+
+    def index_used(self, plan, index_name):
+        # SQLite plan steps read e.g. "SEARCH t USING INDEX idx_name (date>? AND date<?)";
+        # a "SCAN t USING INDEX idx_name" walks the whole index and does not count
+        return any(
+            step.get('detail', '').startswith('SEARCH ') and f"INDEX {index_name} " in f"{step.get('detail', '')} "
+            for step in plan or []
+        )
+
+    def last_insert_ids(self, row_count):
+        if not row_count or self.connection is None:
+            return []
+        # last_insert_rowid() is the id of the final row of a multi-row insert
+        last_id = self.connection.last_insert_rowid()
+        return list(range(last_id - row_count + 1, last_id + 1))
+
+    def shutdown(self):
+        super().shutdown()
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+
+def _year(value):
+    return int(str(value)[:4]) if value is not None else None
+
+
+def _month(value):
+    return int(str(value)[5:7]) if value is not None else None
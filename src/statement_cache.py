@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+
+class StatementCache:
+    """LRU cache of server-side prepared statements for one connection.
+
+    Each entry is a prepared cursor keyed by its SQL text. The first execute on
+    a cursor prepares the statement on the server; later executes only send the
+    parameters. Evicting an entry closes its cursor, which deallocates the
+    statement on the server.
+    """
+    def __init__(self, connection, max_size=32, stats=None):
+        self.connection = connection
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        # Shared with the connector so hit/miss counts add up across the pool
+        self.stats = stats if stats is not None else {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, sql):
+        """Returns (sql, cursor) for the statement, preparing a new cursor on a miss.
+
+        mysql.connector only skips re-preparing when it is handed the exact
+        string object it prepared, so callers must execute with the returned sql.
+        """
+        entry = self._entries.get(sql)
+        if entry is not None:
+            self._entries.move_to_end(sql)
+            self.stats['hits'] += 1
+            return entry
+
+        self.stats['misses'] += 1
+        entry = (sql, self.connection.cursor(prepared=True))
+        self._entries[sql] = entry
+
+        if len(self._entries) > self.max_size:
+            _, (_, evicted_cursor) = self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+            try:
+                evicted_cursor.close()
+            except Exception:
+                pass
+
+        return entry
+
+    def clear(self):
+        while self._entries:
+            _, (_, cursor) = self._entries.popitem()
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
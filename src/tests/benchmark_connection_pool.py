@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Connection pool benchmark
+
+Measures per-call latency of TransactionDBService.search_all and
+TransactionDBService.add_transaction with pooling disabled (a fresh MySQL
+connection for every call, the old behaviour) and enabled (connections leased
+from the pool). Uses the database configured in your .env file; the
+benchmark transactions are deleted again afterwards.
+"""
+
+import os
+import sys
+import time
+import statistics
+from datetime import date
+from dotenv import load_dotenv
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_connector import DatabaseConnector
+from controllers.db.account_db_service import AccountDBService
+from controllers.db.categories_db_service import CategoriesDBService
+from controllers.db.category_totals_db_service import CategoryTotalsDBService
+from controllers.db.transaction_db_service import TransactionDBService
+
+BENCHMARK_DESCRIPTION = "Connection pool benchmark"
+
+
+def time_calls(func, iterations):
+    """Call func `iterations` times and return the per-call latencies in milliseconds."""
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:<32} mean {statistics.mean(latencies):8.2f} ms   p50 {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def run_benchmark(db_config, pool_size, iterations, category_id, account_id):
+    db = DatabaseConnector(**db_config, pool_size=pool_size)
+    transaction_service = TransactionDBService(db)
+
+    search_latencies = time_calls(lambda i: transaction_service.search_all(), iterations)
+    add_latencies = time_calls(
+        lambda i: transaction_service.add_transaction(
+            date.today(), BENCHMARK_DESCRIPTION, 1.00, category_id, "Expense", account_id, f"run {i}"
+        ),
+        iterations
+    )
+
+    db.shutdown()
+    return search_latencies, add_latencies
+
+
+def cleanup(db_config):
+    db = DatabaseConnector(**db_config)
+    totals_service = CategoryTotalsDBService(db)
+    db.connect()
+    # Take the rows out of category_month_totals too, or the budget keeps counting them
+    with db.transaction():
+        totals_service.subtract_where("t.description = %s", (BENCHMARK_DESCRIPTION,))
+        db.execute_query("DELETE FROM transactions WHERE description = %s", (BENCHMARK_DESCRIPTION,))
+    db.shutdown()
+
+
+def main():
+    load_dotenv()
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'database': os.getenv('DB_NAME')
+    }
+
+    missing_vars = [key for key, value in db_config.items() if value is None]
+    if missing_vars:
+        print("Error: Missing required environment variables in .env file")
+        return
+
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    setup_db = DatabaseConnector(**db_config)
+    categories = CategoriesDBService(setup_db).select_category_names()
+    accounts = AccountDBService(setup_db).select_name_id_all_accounts()
+    setup_db.shutdown()
+    if not categories or not accounts:
+        print("Error: the benchmark needs at least one category and one account")
+        return
+
+    category_id = categories[0][0] # type: ignore
+    account_id = accounts[0][0] # type: ignore
+
+    print("Connection Pool Benchmark")
+    print("=" * 50)
+    print(f"Database: {db_config['database']} on {db_config['host']}, {iterations} calls per operation")
+
+    try:
+        for label, pool_size in (("Before (connect per call)", 0), ("After (pooled)", 5)):
+            search_latencies, add_latencies = run_benchmark(db_config, pool_size, iterations, category_id, account_id)
+            print(f"\n{label}:")
+            summarize("TransactionDBService.search_all", search_latencies)
+            summarize("TransactionDBService.add_transaction", add_latencies)
+    finally:
+        cleanup(db_config)
+
+
+if __name__ == "__main__":
+    main()
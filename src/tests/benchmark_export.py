@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Ledger export benchmark
+
+Fills a temporary SQLite database with N generated transactions and times
+TransactionExporter writing them as CSV, as columnar files and as both,
+reporting rows per second, output size and peak resident memory. Memory
+should stay flat as N grows, since only one chunk is held at a time.
+
+    python benchmark_export.py                  # 1M and 10M rows
+    python benchmark_export.py 200000           # custom row counts
+"""
+
+import os
+import sys
+import time
+import resource
+import tempfile
+from unittest.mock import patch
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_connector import SQLiteConnector
+from database_initializer import DatabaseInitializer
+from controllers.db.account_db_service import AccountDBService
+from controllers.db.categories_db_service import CategoriesDBService
+from controllers.transaction_exporter import TransactionExporter
+
+
+def build_database(path, rows):
+    db = SQLiteConnector(path)
+    with patch('builtins.print'):
+        DatabaseInitializer(db).initialize_database()
+        AccountDBService(db).add_account("Checking", 0, "Chequing")
+        CategoriesDBService(db).add_category("Food", "Expense")
+
+    db.connect()
+    # Full-text maintenance is irrelevant to the export and slows the fill down
+    for trigger in ("transactions_fts_insert", "transactions_fts_delete", "transactions_fts_update"):
+        db.execute_query(f"DROP TRIGGER IF EXISTS {trigger}")
+    db.execute_query(f"""
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {rows})
+        INSERT INTO transactions (date, description, amount, category, type, notes, account)
+        SELECT date('2015-01-01', '+' || (n % 3650) || ' days'), 'Transaction ' || (n % 1000),
+               (n % 100000) / 100.0, 1, CASE WHEN n % 10 = 0 THEN 'Income' ELSE 'Expense' END, '', 1
+        FROM seq
+    """)
+    db.close()
+    return db
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main():
+    row_counts = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+
+    print("Ledger Export Benchmark")
+    print("=" * 50)
+
+    for rows in row_counts:
+        with tempfile.TemporaryDirectory() as workdir:
+            started = time.perf_counter()
+            db = build_database(os.path.join(workdir, "ledger.db"), rows)
+            print(f"\n{rows:,} rows (generated in {time.perf_counter() - started:.1f}s):")
+
+            for formats in (('csv',), ('columnar',), ('csv', 'columnar')):
+                output = os.path.join(workdir, "-".join(formats))
+                with patch('builtins.print'):
+                    report = TransactionExporter(db).export(output, formats=formats, resume=False)
+                peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                print(
+                    f"  {' + '.join(formats):<16} {report['rows_per_second']:>10,.0f} rows/s"
+                    f"   {directory_size(output) / 1e6:8.1f} MB   peak RSS {peak_mb:7.1f} MB"
+                )
+
+            db.shutdown()
+
+
+if __name__ == "__main__":
+    main()
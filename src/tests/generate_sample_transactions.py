@@ -231,38 +231,23 @@ class TransactionGenerator:
         
         return transactions
 
-    def save_transactions_to_database(self, transactions: List[Dict]):
-        """Save generated transactions to the database."""
+    def save_transactions_to_database(self, transactions: List[Dict], chunk_size: int = 1000):
+        """Save generated transactions to the database in bulk, skipping ones already saved."""
         print(f"Saving {len(transactions)} transactions to database...")
         
-        successful = 0
-        failed = 0
+        inserted_ids, chunk_timings = self.transactions_service.add_transactions_bulk(transactions, chunk_size=chunk_size, duplicates='skip')
         
-        for transaction in transactions:
-            try:
-                result = self.transactions_service.add_transaction(
-                    date=transaction['date'],
-                    description=transaction['description'],
-                    amount=transaction['amount'],
-                    category_id=transaction['category_id'],
-                    transaction_type=transaction['transaction_type'],
-                    account_id=transaction['account_id'],
-                    notes=transaction['notes']
-                )
-                
-                if result == 1:
-                    successful += 1
-                else:
-                    failed += 1
-                    print(f"Failed to save transaction: {transaction['description']}")
-                    
-            except Exception as e:
-                failed += 1
-                print(f"Error saving transaction: {e}")
+        successful = len(inserted_ids)
+        duplicates = sum(timing['duplicates'] for timing in chunk_timings)
+        failed = len(transactions) - successful - duplicates
+        elapsed = sum(timing['seconds'] for timing in chunk_timings)
         
         print(f"Transaction generation complete!")
         print(f"Successfully saved: {successful}")
+        print(f"Skipped duplicates: {duplicates}")
         print(f"Failed to save: {failed}")
+        if elapsed > 0:
+            print(f"Insert throughput: {successful / elapsed:.0f} transactions/second over {len(chunk_timings)} chunks")
         
         return successful, failed
 
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestAccountLedger(SQLiteTestCase):
+    """Test running balances computed by the database."""
+
+    def setUp(self):
+        super().setUp()
+        with patch('builtins.print'):
+            for transaction_date, description, amount, transaction_type, account_id in [
+                ("2024-01-03", "Groceries", 50.00, "Expense", 1),
+                ("2024-01-01", "Paycheque", 200.00, "Income", 1),
+                ("2024-01-05", "Dinner", 30.00, "Expense", 2),
+                ("2024-01-03", "Coffee", 5.00, "Expense", 1),
+            ]:
+                self.transaction_service.add_transaction(transaction_date, description, amount, 1, transaction_type, account_id)
+                self.account_service.add_transaction(account_id, amount if transaction_type == "Income" else -amount)
+            self.transaction_service.add_transfer("2024-01-04", 100.00, 1, 2, "card payment")
+
+    def ledger(self, account_id, page_size=500):
+        rows, cursor = [], None
+        while True:
+            page, cursor = self.transaction_service.account_ledger_page(account_id, page_size=page_size, cursor=cursor)
+            rows += [(row[2], row[5], row[6]) for row in page] # type: ignore
+            if cursor is None:
+                return rows
+
+    def test_running_balance(self):
+        """Test each row shows the balance after it, ending at the account balance."""
+        self.assertEqual(self.balances()["Checking"], Decimal("1045"))
+        self.assertEqual(self.ledger(1), [
+            ("Transfer from Checking to Visa", Decimal("-100.00"), Decimal("1045.00")),
+            ("Coffee", Decimal("5.00"), Decimal("1145.00")),
+            ("Groceries", Decimal("50.00"), Decimal("1150.00")),
+            ("Paycheque", Decimal("200.00"), Decimal("1200.00")),
+        ])
+
+    def test_credit_account_sign(self):
+        """Test expenses raise and payments lower what a credit account owes."""
+        self.assertEqual(self.balances()["Visa"], Decimal("-70"))
+        self.assertEqual(self.ledger(2), [
+            ("Dinner", Decimal("30.00"), Decimal("-70.00")),
+            ("Transfer from Checking to Visa", Decimal("100.00"), Decimal("-100.00")),
+        ])
+
+    def test_pages_continue_the_balance(self):
+        """Test paging with the cursor gives the same balances as one page."""
+        self.assertEqual(self.ledger(1, page_size=1), self.ledger(1))
+        self.assertEqual(self.ledger(1, page_size=3), self.ledger(1))
+
+    def test_ledger_scans_the_account_index(self):
+        """Test a page is a range scan of the (account, date, id) index."""
+        _, cursor = self.transaction_service.account_ledger_page(1, page_size=1)
+
+        for page_cursor in (None, cursor):
+            plan = self.transaction_service.explain_account_ledger(1, cursor=page_cursor)
+            self.assertTrue(self.db.index_used(plan, 'idx_transactions_account'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
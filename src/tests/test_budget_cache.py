@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.db.budget_cache import BudgetCache
+from controllers.db.budget_db_service import BudgetDBService
+from controllers.db.metadata_cache import MetadataCache
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestBudgetCache(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small cache."""
+        self.cache = BudgetCache(max_size=2)
+
+    def test_lru_eviction(self):
+        """Test the least recently read month is evicted first."""
+        self.cache.put(2024, 1, [("Food",)])
+        self.cache.put(2024, 2, [("Food",)])
+        self.cache.get(2024, 1)
+        self.cache.put(2024, 3, [("Food",)])
+
+        self.assertIsNone(self.cache.get(2024, 2))
+        self.assertEqual(self.cache.get(2024, 1), [("Food",)])
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_invalidate_periods(self):
+        """Test only the touched month and the all-time budget are dropped."""
+        self.cache.max_size = 3
+        self.cache.put(None, None, [])
+        self.cache.put(2024, 1, [])
+        self.cache.put(2024, 2, [])
+
+        self.cache.invalidate_periods([202401])
+
+        self.assertIsNone(self.cache.get(None, None))
+        self.assertIsNone(self.cache.get(2024, 1))
+        self.assertEqual(self.cache.get(2024, 2), [])
+
+    def test_shared_per_connector(self):
+        """Test services on the same connector share one cache."""
+        db = Mock()
+        self.assertIs(BudgetCache.for_connector(db), BudgetCache.for_connector(db))
+        self.assertIsNot(BudgetCache.for_connector(db), BudgetCache.for_connector(Mock()))
+        # Each cache class keeps its own instances
+        self.assertIsInstance(MetadataCache.for_connector(db), MetadataCache)
+        self.assertIsInstance(BudgetCache.for_connector(db), BudgetCache)
+
+    def test_search_all_hit(self):
+        """Test a cached month is returned without a query."""
+        db = Mock()
+        db.execute_query.return_value = [("Food", "Expense", 85.50, 300.00)]
+        service = BudgetDBService(db)
+
+        service.search_all(month=3, year=2024)
+        result = service.search_all(month=3, year=2024)
+
+        self.assertEqual(result, [("Food", "Expense", 85.50, 300.00)])
+        db.execute_query.assert_called_once()
+
+
+class TestBudgetCacheInvalidation(SQLiteTestCase):
+    """Test writes through the services drop the cached months they change."""
+
+    def balance(self, month):
+        return float(self.budget_service.search_all(month=month, year=2024)[0][2]) # type: ignore
+
+    def test_writes_invalidate(self):
+        """Test transaction and goal writes are visible on the next read."""
+        with patch('builtins.print'):
+            self.assertEqual(self.balance(1), 0.0)
+            self.assertEqual(self.balance(2), 0.0)
+
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.assertEqual(len(self.budget_service.budget_cache), 1)
+            self.assertEqual(self.balance(1), 85.5)
+
+            self.transaction_service.del_transaction(1)
+            self.assertEqual(self.balance(1), 0.0)
+
+            self.categories_service.modify_goal(1, 500.00)
+            self.assertEqual(float(self.budget_service.search_all(month=2, year=2024)[0][3]), 500.0) # type: ignore
+
+
+    def test_outer_rollback_drops_months_read_inside_it(self):
+        """Test a month cached from uncommitted rows is dropped when the outer scope rolls back."""
+        with patch('builtins.print'):
+            with self.assertRaises(ValueError):
+                with self.db.transaction():
+                    self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+                    # The shared connection sees the uncommitted row
+                    self.assertEqual(self.balance(1), 85.5)
+                    raise ValueError("later step failed")
+
+            self.assertEqual(self.balance(1), 0.0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.db.budget_db_service import BudgetDBService
+
+
+class TestBudgetDBService(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.mock_db = Mock()
+        self.service = BudgetDBService(self.mock_db)
+
+    def test_search_all_single_round_trip(self):
+        """Test the budget is fetched with one connection and one query."""
+        rows = [("Food", "Expense", 85.50, 300.00), ("Salary", "Income", -2000.00, 0)]
+        self.mock_db.execute_query.return_value = rows
+
+        result = self.service.search_all()
+
+        self.assertEqual(result, rows)
+        self.mock_db.connect.assert_called_once()
+        self.mock_db.close.assert_called_once()
+        self.mock_db.execute_query.assert_called_once()
+
+        query, params = self.mock_db.execute_query.call_args[0]
+        self.assertIn("FROM categories c", query)
+        self.assertIn("LEFT JOIN", query)
+        self.assertIn("ORDER BY c.id", query)
+        self.assertIsNone(params)
+
+    def test_search_all_month(self):
+        """Test the selected month is passed as parameters."""
+        self.mock_db.execute_query.return_value = []
+
+        self.service.search_all(month=3, year=2024)
+
+        query, params = self.mock_db.execute_query.call_args[0]
+        self.assertIn("FROM category_month_totals", query)
+        self.assertIn("WHERE period = %s", query)
+        self.assertEqual(params, (202403,))
+
+    def test_explain_search_all(self):
+        """Test the plan is requested for the same statement search_all runs."""
+        self.mock_db.explain.return_value = [{'key': 'uq_category_month_totals_period_category'}]
+
+        plan = self.service.explain_search_all(month=3, year=2024)
+
+        self.assertEqual(plan, [{'key': 'uq_category_month_totals_period_category'}])
+        query, params = self.mock_db.explain.call_args[0]
+        self.assertIn("WHERE period = %s", query)
+        self.assertEqual(params, (202403,))
+
+    def test_search_all_month_without_year(self):
+        """Test a month without a year is rejected without querying."""
+        with patch('builtins.print'):
+            self.assertIsNone(self.service.search_all(month=3))
+
+        self.mock_db.connect.assert_not_called()
+
+    def test_search_matrix_one_query(self):
+        """Test the matrix spans the trailing months and is filled from a single query."""
+        self.mock_db.execute_query.return_value = [
+            (1, "Food", "Expense", 300.00, 202312, 40.00),
+            (1, "Food", "Expense", 300.00, 202402, 85.50),
+            (2, "Salary", "Income", 0, None, None),
+        ]
+
+        matrix = self.service.search_matrix(months=3, month=2, year=2024)
+
+        self.mock_db.execute_query.assert_called_once()
+        self.assertEqual(self.mock_db.execute_query.call_args[0][1], (202312, 202402))
+        self.assertEqual(matrix.periods, [202312, 202401, 202402]) # type: ignore
+        self.assertEqual(matrix.categories, [(1, "Food", "Expense"), (2, "Salary", "Income")]) # type: ignore
+        self.assertEqual(matrix.balances.typecode, 'd') # type: ignore
+        self.assertEqual(list(matrix.row(0)), [40.0, 0.0, 85.5]) # type: ignore
+        self.assertEqual(list(matrix.column(202402)), [85.5, 0.0]) # type: ignore
+        self.assertEqual(list(matrix.goals), [300.0, 0.0]) # type: ignore
+
+    def test_search_matrix_needs_a_month(self):
+        """Test an empty span is rejected before any query runs."""
+        for months in (0, -1):
+            with self.assertRaises(ValueError):
+                self.service.search_matrix(months=months, month=2, year=2024)
+
+        self.mock_db.execute_query.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
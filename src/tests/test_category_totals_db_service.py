@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.db.category_totals_db_service import CategoryTotalsDBService
+from sqlite_connector import translate_query
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestCategoryTotals(SQLiteTestCase):
+    """Test category_month_totals stays equal to the raw aggregate through every write."""
+
+    def setUp(self):
+        super().setUp()
+        self.totals_service = CategoryTotalsDBService(self.db)
+
+    def totals(self):
+        self.db.connect()
+        rows = self.db.execute_query("SELECT category_id, period, net_amount, txn_count FROM category_month_totals WHERE txn_count <> 0 ORDER BY category_id, period")
+        self.db.close()
+        return [(row[0], row[1], float(row[2]), row[3]) for row in rows] # type: ignore
+
+    def test_writes_keep_totals_consistent(self):
+        """Test add, bulk add, reassign and delete all update the summary."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-01-31", "Pay", 2000.00, 2, "Income", 1)
+            self.transaction_service.add_transactions_bulk([
+                ("2024-02-01", "Groceries", 20.00, 1, "Expense", 2, ""),
+                ("2024-02-03", "Groceries", 5.00, 1, "Expense", 2, ""),
+            ])
+
+            self.assertEqual(self.totals(), [(1, 202401, 85.5, 1), (1, 202402, 25.0, 2), (2, 202401, -2000.0, 1)])
+
+            self.transaction_service.reassign_category(1, 2)
+            self.assertEqual(self.totals(), [(1, 202402, 25.0, 2), (2, 202401, -1914.5, 2)])
+
+            self.transaction_service.del_transaction(2)
+            self.transaction_service.del_account_transactions(2)
+
+        self.assertEqual(self.totals(), [(2, 202401, 85.5, 1)])
+        self.assertEqual(self.totals_service.check_consistency(), [])
+
+    def test_failed_insert_leaves_totals_unchanged(self):
+        """Test the summary is not updated when the transaction insert fails."""
+        with patch('builtins.print'):
+            result = self.transaction_service.add_transaction("2024-01-15", None, 85.50, 1, "Expense", 1)
+
+        self.assertIsNone(result)
+        self.assertEqual(self.totals(), [])
+
+    def test_check_and_rebuild(self):
+        """Test drift is reported by the consistency check and fixed by a rebuild."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.db.connect()
+            self.db.execute_query("UPDATE category_month_totals SET net_amount = 1")
+            self.db.close()
+
+            self.assertEqual(
+                self.totals_service.check_consistency(),
+                [(1, 202401, (Decimal("1.00"), 1), (Decimal("85.50"), 1))]
+            )
+            self.assertEqual(self.totals_service.rebuild(), 1)
+
+        self.assertEqual(self.totals_service.check_consistency(), [])
+
+    def test_delete_before(self):
+        """Test months dropped in bulk leave the summary and the cached budgets."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2023-12-15", "Groceries", 10.00, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.budget_service.search_all()
+
+        self.db.connect()
+        self.assertEqual(self.totals_service.delete_before(202401), 1)
+        self.db.close()
+
+        self.assertEqual(self.totals(), [(1, 202401, 85.5, 1)])
+        self.assertEqual(len(self.budget_service.budget_cache), 0)
+
+    def test_upsert_translation(self):
+        """Test ON DUPLICATE KEY UPDATE becomes an SQLite upsert."""
+        query = translate_query("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = b + VALUES(b)", True)
+        self.assertEqual(query, "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = b + excluded.b")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
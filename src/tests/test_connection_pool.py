@@ -0,0 +1,161 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the pool
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection_pool import ConnectionPool, PoolTimeoutError
+from database_connector import DatabaseConnector
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test checkout/return semantics of the connection pool."""
+
+    def setUp(self):
+        """Set up a pool backed by a mock connection factory."""
+        self.factory = Mock(side_effect=lambda: Mock())
+        self.pool = ConnectionPool(self.factory, max_size=2, checkout_timeout=0)
+
+    def test_release_makes_connection_reusable(self):
+        """Test a returned connection is handed out again instead of opening a new one."""
+        first = self.pool.acquire()
+        self.pool.release(first)
+
+        second = self.pool.acquire()
+
+        self.assertIs(first, second)
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(self.pool.stats['reused'], 1)
+
+    def test_pool_is_bounded(self):
+        """Test checkout fails once max_size connections are in use."""
+        self.pool.acquire()
+        self.pool.acquire()
+
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.acquire()
+
+    def test_idle_timeout_closes_connection(self):
+        """Test connections idle longer than idle_timeout are closed rather than reused."""
+        self.pool.idle_timeout = 0
+        first = self.pool.acquire()
+        self.pool.release(first)
+        first.last_used -= 1
+
+        second = self.pool.acquire()
+
+        self.assertIsNot(first, second)
+        first.connection.close.assert_called_once()
+        self.assertEqual(self.factory.call_count, 2)
+
+    def test_health_check_discards_dead_connection(self):
+        """Test a connection failing its ping is replaced on checkout."""
+        self.pool.health_check_interval = 0
+        first = self.pool.acquire()
+        first.connection.is_connected.return_value = False
+        self.pool.release(first)
+
+        second = self.pool.acquire()
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.pool.stats['discarded'], 1)
+
+    def test_factory_failure_frees_slot(self):
+        """Test a failed connect does not permanently consume pool capacity."""
+        self.factory.side_effect = [Exception("Connection failed"), Mock(), Mock()]
+
+        with self.assertRaises(Exception):
+            self.pool.acquire()
+
+        self.pool.acquire()
+        self.pool.acquire()
+        self.assertEqual(self.pool.size(), (0, 2))
+
+    def test_close_all(self):
+        """Test close_all closes idle connections and refuses new checkouts."""
+        pooled = self.pool.acquire()
+        self.pool.release(pooled)
+
+        self.pool.close_all()
+
+        pooled.connection.close.assert_called_once()
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.acquire()
+
+
+class TestDatabaseConnectorPooling(unittest.TestCase):
+    """Test that DatabaseConnector connect/close lease and release pooled connections."""
+
+    def setUp(self):
+        """Set up a pooled connector."""
+        self.db = DatabaseConnector("localhost", "testuser", "testpass", "testdb", pool_size=2)
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_connect_close_reuses_connection(self, mock_connect):
+        """Test repeated connect/close pairs only open one MySQL connection."""
+        mock_connect.return_value = Mock()
+
+        for _ in range(3):
+            self.db.connect()
+            self.db.close()
+
+        mock_connect.assert_called_once()
+        mock_connect.return_value.close.assert_not_called()
+        self.assertIsNone(self.db.connection)
+        self.assertEqual(self.db.pool.size(), (1, 0)) # type: ignore
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_nested_connect_shares_lease(self, mock_connect):
+        """Test nested connect calls share one connection until the outer close."""
+        mock_connect.return_value = Mock()
+
+        self.db.connect()
+        self.db.connect()
+        self.db.close()
+
+        self.assertIs(self.db.connection, mock_connect.return_value)
+
+        self.db.close()
+
+        self.assertIsNone(self.db.connection)
+        mock_connect.assert_called_once()
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_pooled_connection_skips_commit(self, mock_connect):
+        """Test autocommit pooled connections do not send an extra COMMIT."""
+        mock_connect.return_value = Mock()
+        mock_connect.return_value.cursor.return_value.rowcount = 1
+
+        self.db.connect()
+        result = self.db.execute_query("UPDATE accounts SET balance = %s WHERE id = %s", (1, 1))
+
+        self.assertEqual(result, 1)
+        self.assertTrue(mock_connect.return_value.autocommit)
+        mock_connect.return_value.commit.assert_not_called()
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_unpooled_connector_closes_connection(self, mock_connect):
+        """Test pool_size=0 keeps the original connect/close per call behaviour."""
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb", pool_size=0)
+        mock_connect.return_value = Mock()
+
+        db.connect()
+        db.close()
+
+        mock_connect.return_value.close.assert_called_once()
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_shutdown_closes_pool(self, mock_connect):
+        """Test shutdown closes idle pooled connections."""
+        mock_connect.return_value = Mock()
+
+        self.db.connect()
+        self.db.shutdown()
+
+        mock_connect.return_value.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -6,7 +6,10 @@ import os
 # Add the parent directory to the path so we can import database_connector
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database_connector import DatabaseConnector
+from mysql.connector import errorcode
+from mysql.connector.errors import OperationalError
+
+from database_connector import DatabaseConnector, TransactionError
 
 
 class TestDatabaseConnector(unittest.TestCase):
@@ -154,14 +157,34 @@ class TestDatabaseConnector(unittest.TestCase):
         result = self.db.execute_query("SELECT * FROM transactions")
         self.assertIsNone(result)
     
-    def test_execute_query_connection_lost(self):
-        """Test query execution when connection is lost."""
-        # Mock connection that reports as disconnected
-        self.db.connection = Mock()
-        self.db.connection.is_connected.return_value = False
-        
+    @patch('database_connector.mysql.connector.connect')
+    def test_execute_query_connection_lost(self, mock_connect):
+        """Test a statement that finds its connection gone reconnects and runs again."""
+        self.db.connect()
+        mock_connect.return_value.cursor.return_value.execute.side_effect = OperationalError(errno=errorcode.CR_SERVER_LOST)
+        fresh_connection = Mock()
+        fresh_connection.cursor.return_value.fetchall.return_value = [(1,)]
+        mock_connect.return_value = fresh_connection
+
         result = self.db.execute_query("SELECT * FROM transactions")
-        self.assertIsNone(result)
+
+        self.assertEqual(result, [(1,)])
+        self.assertIs(self.db.connection, fresh_connection)
+        # No ping before the statement
+        fresh_connection.is_connected.assert_not_called()
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_connection_lost_in_transaction_is_not_retried(self, mock_connect):
+        """Test a lost connection fails the open transaction instead of running on a new one."""
+        mock_connect.return_value.in_transaction = False
+        mock_connect.return_value.cursor.return_value.execute.side_effect = OperationalError(errno=errorcode.CR_SERVER_LOST)
+
+        with patch('builtins.print'):
+            with self.assertRaises(TransactionError):
+                with self.db.transaction():
+                    self.assertIsNone(self.db.execute_query("UPDATE accounts SET balance = 0"))
+
+        self.assertEqual(mock_connect.call_count, 1)
     
     @patch('database_connector.mysql.connector.Error', Exception)
     def test_execute_query_mysql_error(self):
@@ -193,6 +216,9 @@ class TestDatabaseConnector(unittest.TestCase):
         # Verify close methods were called
         mock_cursor.close.assert_called_once()
         mock_connection.close.assert_called_once()
+        # The closed handle is not left behind for begin() or last_insert_ids()
+        self.assertIsNone(self.db.connection)
+        self.assertIsNone(self.db.cursor)
     
     def test_close_no_connection(self):
         """Test closing when no connection exists."""
@@ -200,6 +226,176 @@ class TestDatabaseConnector(unittest.TestCase):
         # Should not raise an exception
         self.db.close()
 
+    def test_index_used_needs_a_lookup(self):
+        """Test only plan rows that look rows up through the key count as using it."""
+        self.assertTrue(self.db.index_used([{'key': 'idx_a', 'type': 'range'}], 'idx_a'))
+        self.assertTrue(self.db.index_used([{'key': 'idx_a', 'type': 'ref'}], 'idx_a'))
+        self.assertFalse(self.db.index_used([{'key': 'idx_a', 'type': 'index'}], 'idx_a'))
+        self.assertFalse(self.db.index_used([{'key': 'idx_b', 'type': 'ref'}], 'idx_a'))
+
+
+class TestDatabaseConnectorTransactions(unittest.TestCase):
+    """Test explicit transactions and multi-row inserts."""
+    
+    def setUp(self):
+        """Set up a connector with a mocked connection."""
+        self.db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+        self.db.connection = Mock()
+        self.db.connection.is_connected.return_value = True
+        self.db.connection.in_transaction = False
+        self.db.cursor = Mock()
+    
+    def test_writes_inside_transaction_are_not_committed(self):
+        """Test execute_query and execute_many defer the commit until commit()."""
+        self.db.cursor.rowcount = 2
+        
+        self.assertTrue(self.db.begin())
+        self.db.execute_query("UPDATE accounts SET balance = %s WHERE id = %s", (1, 1))
+        result = self.db.execute_many("INSERT INTO transactions (amount) VALUES (%s)", [(1,), (2,)])
+        
+        self.assertEqual(result, 2)
+        self.db.connection.start_transaction.assert_called_once()
+        self.db.connection.commit.assert_not_called()
+        
+        self.db.commit()
+        self.db.connection.commit.assert_called_once()
+    
+    @patch('database_connector.mysql.connector.connect')
+    def test_transaction_scope_commits_once(self, mock_connect):
+        """Test service style connect/close calls inside a scope share one connection and one commit."""
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+        mock_connection = Mock()
+        mock_connection.in_transaction = False
+        mock_connect.return_value = mock_connection
+        
+        with db.transaction():
+            for _ in range(2):
+                db.connect()
+                db.execute_query("UPDATE accounts SET balance = %s WHERE id = %s", (1, 1))
+                db.close()
+            with db.transaction():
+                db.connect()
+                db.execute_query("DELETE FROM transactions WHERE id = %s", (1,))
+                db.close()
+        
+        mock_connect.assert_called_once()
+        mock_connection.start_transaction.assert_called_once()
+        mock_connection.commit.assert_called_once()
+        mock_connection.rollback.assert_not_called()
+        self.assertIsNone(db.connection)
+    
+    @patch('database_connector.mysql.connector.connect')
+    def test_transaction_scope_rolls_back_on_exception(self, mock_connect):
+        """Test an exception inside the scope rolls back and propagates."""
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+        mock_connection = Mock()
+        mock_connection.in_transaction = False
+        mock_connect.return_value = mock_connection
+        
+        with self.assertRaises(ValueError):
+            with db.transaction():
+                db.execute_query("UPDATE accounts SET balance = %s WHERE id = %s", (1, 1))
+                raise ValueError("second write failed")
+        
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+    
+    @patch('database_connector.mysql.connector.Error', Exception)
+    @patch('database_connector.mysql.connector.connect')
+    def test_transaction_scope_rolls_back_failed_statement(self, mock_connect):
+        """Test a statement error swallowed by execute_query still prevents the commit."""
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+        mock_connection = Mock()
+        mock_connection.in_transaction = False
+        mock_connection.cursor.return_value.execute.side_effect = Exception("SQL Error")
+        mock_connect.return_value = mock_connection
+        
+        with self.assertRaises(TransactionError):
+            with db.transaction():
+                self.assertIsNone(db.execute_query("UPDATE accounts SET balance = %s WHERE id = %s", (1, 1)))
+        
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+    
+    @patch('database_connector.mysql.connector.connect')
+    def test_failed_commit_raises_transaction_error(self, mock_connect):
+        """Test a driver error at COMMIT rolls back and surfaces as TransactionError."""
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+        mock_connection = Mock()
+        mock_connection.in_transaction = False
+        mock_connection.commit.side_effect = OperationalError(msg="Deadlock found when trying to get lock")
+        mock_connect.return_value = mock_connection
+
+        with self.assertRaises(TransactionError):
+            with db.transaction():
+                db.execute_query("UPDATE accounts SET balance = %s WHERE id = %s", (1, 1))
+
+        mock_connection.rollback.assert_called_once()
+        self.assertIsNone(db.connection)
+
+    def test_last_insert_ids(self):
+        """Test ids of a multi-row insert are derived from the first generated id."""
+        self.db.cursor.lastrowid = 10
+        
+        self.assertEqual(self.db.last_insert_ids(3), [10, 11, 12])
+        self.assertEqual(self.db.last_insert_ids(0), [])
+
+
+class TestDatabaseConnectorStreaming(unittest.TestCase):
+    """Test the streaming iter_query API."""
+    
+    def setUp(self):
+        """Set up a pooled connector."""
+        self.db = DatabaseConnector("localhost", "testuser", "testpass", "testdb", pool_size=2)
+    
+    @patch('database_connector.mysql.connector.connect')
+    def test_iter_query_fetches_in_batches(self, mock_connect):
+        """Test rows are read with fetchmany from an unbuffered cursor."""
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connect.return_value = mock_connection
+        
+        rows = list(self.db.iter_query("SELECT id FROM transactions", batch_size=2))
+        
+        self.assertEqual(rows, [(1,), (2,), (3,)])
+        mock_connection.cursor.assert_called_once_with(buffered=False)
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.fetchall.assert_not_called()
+        
+        # Fully consumed streams hand their connection back to the pool
+        self.assertEqual(self.db.pool.size(), (1, 0)) # type: ignore
+    
+    @patch('database_connector.mysql.connector.connect')
+    def test_iter_query_does_not_touch_current_lease(self, mock_connect):
+        """Test streaming runs on its own connection while a lease is held."""
+        stream_connection = Mock()
+        stream_connection.cursor.return_value.fetchmany.return_value = []
+        mock_connect.side_effect = [Mock(), stream_connection]
+        self.db.connect()
+        leased = self.db.connection
+        
+        stream = self.db.iter_query("SELECT id FROM transactions")
+        next(stream, None)
+        
+        self.assertIs(self.db.connection, leased)
+        self.assertEqual(mock_connect.call_count, 2)
+    
+    @patch('database_connector.mysql.connector.connect')
+    def test_iter_query_early_stop_discards_connection(self, mock_connect):
+        """Test abandoning a stream closes its connection instead of draining it."""
+        mock_connection = Mock()
+        mock_connection.cursor.return_value.fetchmany.return_value = [(1,), (2,)]
+        mock_connect.return_value = mock_connection
+        
+        stream = self.db.iter_query("SELECT id FROM transactions")
+        next(stream)
+        stream.close()
+        
+        mock_connection.close.assert_called_once()
+        self.assertEqual(self.db.pool.size(), (0, 0)) # type: ignore
+
 
 class TestDatabaseConnectorIntegration(unittest.TestCase):
     """Integration tests that demonstrate how to use the DatabaseConnector."""
@@ -0,0 +1,189 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the initializer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_initializer import DatabaseInitializer
+from sqlite_connector import SQLiteConnector
+from controllers.db.transaction_query import build_transaction_query
+
+
+class TestDatabaseInitializer(unittest.TestCase):
+    """Test schema creation against an in-memory SQLite database."""
+
+    def setUp(self):
+        """Set up an empty database and an initializer for it."""
+        self.db = SQLiteConnector(":memory:")
+        self.initializer = DatabaseInitializer(self.db)
+
+    def tearDown(self):
+        self.db.shutdown()
+
+    def initialize(self, force_validation=False):
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.initializer.initialize_database(force_validation))
+        return [call.args[0] for call in mock_print.call_args_list if call.args]
+
+    def missing_indexes(self):
+        self.db.connect()
+        try:
+            return self.initializer.missing_indexes()
+        finally:
+            self.db.close()
+
+    def test_creates_required_indexes(self):
+        """Test every declared index exists after initialization."""
+        output = self.initialize()
+
+        self.assertEqual(self.missing_indexes(), [])
+        self.assertIn("Creating missing index: idx_transactions_date_id", output)
+        self.assertIn("Indexes - OK", output)
+
+    def test_recreates_dropped_index(self):
+        """Test an index dropped outside the app is reported and created again."""
+        self.initialize()
+        self.db.connect()
+        self.db.execute_query("DROP INDEX idx_accounts_name")
+        self.db.close()
+
+        self.assertEqual(self.missing_indexes(), [('accounts', 'idx_accounts_name')])
+
+        output = self.initialize(force_validation=True)
+        self.assertEqual(output.count("Creating missing index: idx_accounts_name"), 1)
+        self.assertEqual(self.missing_indexes(), [])
+
+    def test_matching_checksum_skips_validation(self):
+        """Test a second launch does a single schema_version lookup."""
+        self.initialize()
+        self.db.query_stats.reset()
+
+        output = self.initialize()
+
+        self.assertIn("Database schema up to date", output)
+        statements = self.db.query_stats.snapshot()['statements']
+        self.assertEqual(list(statements), ["SELECT checksum FROM schema_version WHERE id = ?"])
+
+    def test_changed_schema_runs_full_validation(self):
+        """Test a schema upgrade invalidates the stored checksum."""
+        self.initialize()
+        self.initializer.required_indexes['transactions']['idx_transactions_notes'] = ['notes']
+
+        output = self.initialize()
+
+        self.assertIn("Checking database schema...", output)
+        self.assertIn("Creating missing index: idx_transactions_notes", output)
+        self.assertIn("Database schema up to date", self.initialize())
+
+    def test_retired_indexes_are_dropped(self):
+        """Test indexes left by earlier versions are replaced and dropped."""
+        self.initialize()
+        self.db.connect()
+        self.db.execute_query("DROP INDEX uq_category_month_totals_period_category")
+        self.db.execute_query("CREATE UNIQUE INDEX uq_category_month_totals_category_period ON category_month_totals (category_id, period)")
+        self.db.execute_query("CREATE INDEX idx_transactions_date_category ON transactions (date, category)")
+        self.db.close()
+
+        output = self.initialize(force_validation=True)
+
+        self.assertIn("Migrating transactions: dropping index idx_transactions_date_category", output)
+        self.assertIn("Migrating category_month_totals: dropping index uq_category_month_totals_category_period", output)
+        self.db.connect()
+        indexes = self.initializer.migrator.current_indexes()
+        self.db.close()
+        self.assertEqual(indexes[('category_month_totals', 'uq_category_month_totals_period_category')], ['period', 'category_id'])
+        self.assertNotIn(('transactions', 'idx_transactions_date_category'), indexes)
+
+    def test_search_uses_date_id_index(self):
+        """Test a keyset page seeks into the (date, id) index and needs no sort."""
+        self.initialize()
+
+        plan = self.db.explain(*build_transaction_query(columns=('id',), cursor=("2024-01-15", 10), limit=50))
+
+        self.assertTrue(self.db.index_used(plan, 'idx_transactions_date_id'))
+        self.assertFalse(any("TEMP B-TREE" in step['detail'] for step in plan)) # type: ignore
+
+    def test_full_index_scan_is_not_a_lookup(self):
+        """Test an index only walked from end to end is not reported as used."""
+        self.initialize()
+
+        plan = self.db.explain("SELECT id FROM transactions t ORDER BY t.date DESC, t.id DESC")
+
+        self.assertTrue(plan[0]['detail'].startswith("SCAN")) # type: ignore
+        self.assertFalse(self.db.index_used(plan, 'idx_transactions_date_id'))
+
+
+class TestTransactionPartitions(unittest.TestCase):
+    """Test yearly partition management statements for MySQL."""
+
+    def setUp(self):
+        """Set up an initializer on a mock MySQL connector."""
+        self.mock_db = Mock()
+        self.mock_db.dialect = 'mysql'
+        self.mock_db.database = 'budget'
+        self.initializer = DatabaseInitializer(self.mock_db, partition_transactions=True)
+        self.partitions = []
+
+        def execute_query(query, params=None):
+            if "information_schema.partitions" in query:
+                return self.partitions
+            if query.startswith("SELECT MIN"):
+                return [(2023,)]
+            return 0
+        self.mock_db.execute_query.side_effect = execute_query
+
+    def statements(self):
+        return [call.args[0] for call in self.mock_db.execute_query.call_args_list if call.args[0].startswith("ALTER")]
+
+    def test_first_run_partitions_table(self):
+        """Test the table is partitioned from the oldest year up to next year."""
+        with patch('builtins.print'):
+            created = self.initializer.ensure_transaction_partitions(current_year=2025)
+
+        self.assertEqual(created, ['p2023', 'p2024', 'p2025', 'p2026'])
+        self.assertEqual(self.statements(), [
+            "ALTER TABLE transactions DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)",
+            "ALTER TABLE transactions PARTITION BY RANGE (YEAR(date)) ("
+            "PARTITION p2023 VALUES LESS THAN (2024), PARTITION p2024 VALUES LESS THAN (2025), "
+            "PARTITION p2025 VALUES LESS THAN (2026), PARTITION p2026 VALUES LESS THAN (2027), "
+            "PARTITION pfuture VALUES LESS THAN MAXVALUE)",
+        ])
+
+    def test_next_year_split_from_future_partition(self):
+        """Test a new year gets its partition ahead of time and existing ones are left alone."""
+        self.partitions = [('p2024', '2025'), ('p2025', '2026'), ('pfuture', 'MAXVALUE')]
+
+        with patch('builtins.print'):
+            self.assertEqual(self.initializer.ensure_transaction_partitions(current_year=2025), ['p2026'])
+            self.partitions.insert(2, ('p2026', '2027'))
+            self.assertEqual(self.initializer.ensure_transaction_partitions(current_year=2025), [])
+
+        self.assertEqual(self.statements(), [
+            "ALTER TABLE transactions REORGANIZE PARTITION pfuture INTO "
+            "(PARTITION p2026 VALUES LESS THAN (2027), PARTITION pfuture VALUES LESS THAN MAXVALUE)"
+        ])
+
+    def test_prune(self):
+        """Test only partitions before the given year are dropped."""
+        self.partitions = [('p2022', '2023'), ('p2023', '2024'), ('p2024', '2025'), ('pfuture', 'MAXVALUE')]
+
+        with patch('builtins.print'):
+            self.assertEqual(self.initializer.prune_transaction_partitions(2024), ['p2022', 'p2023'])
+
+        self.assertEqual(self.statements(), ["ALTER TABLE transactions DROP PARTITION p2022, p2023"])
+        self.mock_db.execute_query.assert_any_call("DELETE FROM category_month_totals WHERE period < %s", (202400,))
+
+    def test_sqlite_is_skipped(self):
+        """Test partitioning is a no-op on the embedded backend."""
+        self.mock_db.dialect = 'sqlite'
+
+        with patch('builtins.print'):
+            self.assertEqual(self.initializer.ensure_transaction_partitions(), [])
+
+        self.mock_db.execute_query.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
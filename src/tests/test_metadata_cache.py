@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.db.metadata_cache import MetadataCache
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestMetadataCache(unittest.TestCase):
+    """Test the cache on its own."""
+
+    def test_put_get_and_invalidate(self):
+        """Test values are served until their part of the cache is invalidated."""
+        cache = MetadataCache()
+        self.assertIsNone(cache.account_names())
+
+        cache.put_account_names({1: "Checking"})
+        cache.put_transfer_category_id(5)
+        self.assertEqual(cache.account_names(), {1: "Checking"})
+        self.assertEqual(cache.transfer_category_id(), 5)
+
+        cache.invalidate_accounts()
+        self.assertIsNone(cache.account_names())
+        self.assertEqual(cache.transfer_category_id(), 5)
+
+        cache.invalidate_categories()
+        self.assertIsNone(cache.transfer_category_id())
+        self.assertEqual(cache.stats, {'hits': 3, 'misses': 3, 'invalidations': 2})
+
+
+class TestCachedTransfers(SQLiteTestCase):
+    """Test transfers and cache invalidation on a real database."""
+
+    def setUp(self):
+        super().setUp()
+        self.cache = MetadataCache.for_connector(self.db)
+
+    def test_transfer_moves_balances_with_the_insert(self):
+        """Test the transfer row and both balances are written together."""
+        with patch('builtins.print'):
+            self.assertEqual(self.transaction_service.add_transfer("2024-01-15", 100.00, 1, 2, "card payment"), 1)
+
+        self.assertEqual(self.balances(), {"Checking": Decimal("900"), "Visa": Decimal("-100")})
+        self.assertEqual(
+            sorted(self.transaction_service.search(columns=('description', 'category_name', 'account_id'))), # type: ignore
+            [("Transfer from Checking to Visa", "Transfer", 1), ("Transfer from Checking to Visa", "Transfer", 2)]
+        )
+
+    def test_failed_balance_update_rolls_back_the_transfer(self):
+        """Test nothing is recorded when the balances cannot be moved."""
+        with patch('builtins.print'):
+            with patch.object(self.transaction_service.account_db_service, 'add_transfer', return_value=1):
+                self.assertIsNone(self.transaction_service.add_transfer("2024-01-15", 100.00, 1, 2, ""))
+
+        self.assertEqual(self.transaction_service.search(), [])
+        self.assertEqual(self.balances(), {"Checking": Decimal("1000"), "Visa": Decimal("0")})
+
+    def test_account_and_category_changes_invalidate(self):
+        """Test adding accounts and deleting the Transfer category drop the cached values."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transfer("2024-01-15", 10.00, 1, 2, "")
+            self.assertIsNotNone(self.cache.account_names())
+
+            self.account_service.add_account("Savings", 0.00, "Savings")
+            self.assertIsNone(self.cache.account_names())
+
+            transfer_id = self.cache.transfer_category_id()
+            self.categories_service.del_category(transfer_id)
+            self.assertIsNone(self.cache.transfer_category_id())
+
+            # The category is created again on the next transfer
+            self.assertEqual(self.transaction_service.add_transfer("2024-01-16", 10.00, 1, 3, ""), 1)
+        self.assertNotEqual(self.cache.transfer_category_id(), transfer_id)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
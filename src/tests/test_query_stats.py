@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import the stats module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_stats import QueryStats, fingerprint
+from database_connector import DatabaseConnector
+from sqlite_connector import SQLiteConnector
+
+
+class TestQueryStats(unittest.TestCase):
+    """Test fingerprinting, counters and the slow-query log."""
+
+    def test_fingerprint_ignores_literals_and_whitespace(self):
+        """Test statements differing only in values share a fingerprint."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM accounts\n   WHERE id = 5 AND name = 'Visa'"),
+            fingerprint("SELECT * FROM accounts WHERE id = %s AND name = %s")
+        )
+        self.assertEqual(fingerprint("SELECT * FROM t WHERE id = %s"), "SELECT * FROM t WHERE id = ?")
+
+    def test_counters_and_percentiles(self):
+        """Test count, total, p50/p95/max and rows per fingerprint."""
+        stats = QueryStats(slow_query_threshold=None)
+        for i in range(1, 101):
+            stats.record_query("SELECT * FROM accounts WHERE id = %s", i / 1000, rows=1)
+        stats.record_query("SELECT * FROM accounts WHERE id = %s", 0.001, error=True)
+
+        snapshot = stats.snapshot()['statements']["SELECT * FROM accounts WHERE id = ?"]
+        self.assertEqual(snapshot['count'], 101)
+        self.assertEqual(snapshot['errors'], 1)
+        self.assertEqual(snapshot['rows'], 100)
+        self.assertAlmostEqual(snapshot['p50'], 0.050)
+        self.assertAlmostEqual(snapshot['p95'], 0.095)
+        self.assertAlmostEqual(snapshot['max'], 0.100)
+
+    def test_slow_query_log(self):
+        """Test statements over the threshold are logged in memory and to the file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "slow.log")
+            stats = QueryStats(slow_query_threshold=0.1, slow_log_path=path)
+
+            stats.record_query("SELECT 1", 0.05)
+            stats.record_query("SELECT * FROM transactions", 0.25, rows=10)
+
+            slow = stats.snapshot()['slow_queries']
+            self.assertEqual(len(slow), 1)
+            self.assertEqual(slow[0]['fingerprint'], "SELECT * FROM transactions")
+            with open(path) as f:
+                self.assertIn("250.0 ms\t10 rows\tSELECT * FROM transactions", f.read())
+
+    def test_report_and_reset(self):
+        """Test the text report lists statements and connection events."""
+        stats = QueryStats()
+        stats.record_query("SELECT 1", 0.01)
+        stats.record_connection('open', 0.02)
+
+        report = stats.report()
+        self.assertIn("SELECT ?", report)
+        self.assertIn("[open]", report)
+
+        stats.reset()
+        self.assertEqual(stats.snapshot(), {'statements': {}, 'connections': {}, 'slow_queries': []})
+
+
+class TestDatabaseConnectorQueryStats(unittest.TestCase):
+    """Test the connector times statements and connection handling separately."""
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_statements_and_connections_are_timed(self, mock_connect):
+        """Test one open, one lease/release per connect()/close() and one entry per statement."""
+        mock_connection = Mock()
+        mock_connection.cursor.return_value.fetchall.return_value = [(1,), (2,)]
+        mock_connect.return_value = mock_connection
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+
+        for _ in range(3):
+            db.connect()
+            db.execute_query("SELECT * FROM accounts")
+            db.close()
+
+        snapshot = db.query_stats.snapshot()
+        self.assertEqual(snapshot['statements']["SELECT * FROM accounts"]['count'], 3)
+        self.assertEqual(snapshot['statements']["SELECT * FROM accounts"]['rows'], 6)
+        self.assertEqual(snapshot['connections']['open']['count'], 1)
+        self.assertEqual(snapshot['connections']['lease']['count'], 3)
+        self.assertEqual(snapshot['connections']['release']['count'], 3)
+
+    def test_sqlite_errors_and_streams(self):
+        """Test failed statements and streamed rows are counted on a real backend."""
+        db = SQLiteConnector(":memory:")
+        db.connect()
+        db.execute_query("CREATE TABLE t (id INT)")
+        db.execute_many("INSERT INTO t (id) VALUES (%s)", [(i,) for i in range(5)])
+        with patch('builtins.print'):
+            db.execute_query("SELECT * FROM missing_table")
+        db.close()
+
+        self.assertEqual(len(list(db.iter_query("SELECT id FROM t", batch_size=2))), 5)
+
+        statements = db.query_stats.snapshot()['statements']
+        self.assertEqual(statements["INSERT INTO t (id) VALUES (?)"]['rows'], 5)
+        self.assertEqual(statements["SELECT * FROM missing_table"]['errors'], 1)
+        self.assertEqual(statements["SELECT id FROM t"]['rows'], 5)
+        db.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,169 @@
+import unittest
+from unittest.mock import Mock, call, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the migrator
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_initializer import DatabaseInitializer
+from schema_migrator import SchemaMigrator
+from sqlite_connector import SQLiteConnector
+from controllers.db.transaction_db_service import TransactionDBService
+from controllers.db.transaction_fingerprint import transaction_fingerprint
+
+
+class TestSchemaMigratorStatements(unittest.TestCase):
+    """Test the statements planned for MySQL."""
+
+    def setUp(self):
+        """Set up a migrator on a mock MySQL connector."""
+        self.mock_db = Mock()
+        self.mock_db.dialect = 'mysql'
+        self.mock_db.execute_query.return_value = 0
+        self.migrator = SchemaMigrator(self.mock_db, DatabaseInitializer(self.mock_db)._column_types_match, copy_threshold=1000)
+        self.schema = {'id': 'INT AUTO_INCREMENT PRIMARY KEY', 'name': 'VARCHAR(45) NOT NULL', 'balance': 'DECIMAL(10,2) NOT NULL'}
+        self.current = {
+            'id': {'type': 'int', 'nullable': False, 'key': 'PRI', 'extra': 'auto_increment'},
+            'name': {'type': 'int', 'nullable': False, 'key': '', 'extra': ''},
+        }
+
+    def statements(self):
+        return [call.args[0] for call in self.mock_db.execute_query.call_args_list]
+
+    def test_plan(self):
+        """Test missing columns are added and mismatched ones modified."""
+        self.assertEqual(self.migrator.plan_columns(self.schema, self.current), [('modify', 'name'), ('add', 'balance')])
+
+    def test_small_table_is_altered_in_place(self):
+        """Test a small table gets ALTER TABLE statements in declared order."""
+        self.mock_db.execute_query.side_effect = lambda query, params=None: [(10,)] if query.startswith("SELECT COUNT") else 0
+
+        with patch('builtins.print'):
+            self.migrator.migrate_table('accounts', self.schema, self.current)
+
+        self.assertEqual(self.statements()[1:], [
+            "ALTER TABLE accounts MODIFY COLUMN name VARCHAR(45) NOT NULL",
+            "ALTER TABLE accounts ADD COLUMN balance DECIMAL(10,2) NOT NULL",
+        ])
+
+    def test_large_table_is_copied(self):
+        """Test a type change on a large table rebuilds it through a shadow table."""
+        def execute_query(query, params=None):
+            if query.startswith("SELECT COUNT"):
+                return [(5000,)]
+            if query.startswith("SELECT id"):
+                return []
+            return 5000
+        self.mock_db.execute_query.side_effect = execute_query
+
+        with patch('builtins.print'):
+            self.migrator.migrate_table('accounts', self.schema, self.current)
+
+        statements = self.statements()
+        self.assertFalse(any(statement.startswith("ALTER TABLE") for statement in statements))
+        self.assertIn("INSERT INTO accounts_migration (id, name, balance) SELECT id, name, 0 FROM accounts ", statements)
+        self.assertEqual(statements[-2:], [
+            "RENAME TABLE accounts TO accounts_old, accounts_migration TO accounts",
+            "DROP TABLE accounts_old",
+        ])
+
+    def test_failed_statement_stops_migration(self):
+        """Test a failing ALTER raises instead of continuing with a half-migrated table."""
+        self.mock_db.execute_query.side_effect = lambda query, params=None: [(10,)] if query.startswith("SELECT COUNT") else None
+
+        with patch('builtins.print'):
+            with self.assertRaises(RuntimeError):
+                self.migrator.migrate_table('accounts', self.schema, self.current)
+
+    def test_changed_index_is_rebuilt(self):
+        """Test an index with different columns is dropped and created again."""
+        with patch('builtins.print'):
+            changed = self.migrator.migrate_indexes(
+                'transactions',
+                {'idx_a': ['date', 'id'], 'idx_b': ['account']},
+                {('transactions', 'idx_a'): ['date'], ('transactions', 'idx_b'): ['account']}
+            )
+
+        self.assertEqual(changed, ['idx_a'])
+        self.assertEqual(self.statements(), [
+            "DROP INDEX idx_a ON transactions",
+            "CREATE INDEX idx_a ON transactions (date, id)",
+        ])
+
+
+class TestSchemaMigrationSQLite(unittest.TestCase):
+    """Test migrations keep existing rows on a real database."""
+
+    def setUp(self):
+        """Set up a schema with a few transactions."""
+        self.db = SQLiteConnector(":memory:")
+        self.initializer = DatabaseInitializer(self.db)
+        self.initializer.migrator.chunk_size = 2
+        with patch('builtins.print'):
+            self.initializer.initialize_database()
+
+        self.db.connect()
+        for i in range(5):
+            self.db.execute_query(
+                "INSERT INTO transactions (date, description, amount, category, type, notes, account) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                ("2024-01-15", f"Row {i}", 1.00, 1, "Expense", "", 1)
+            )
+        self.db.close()
+
+    def tearDown(self):
+        self.db.shutdown()
+
+    def rows(self, columns="id, description"):
+        self.db.connect()
+        try:
+            return self.db.execute_query(f"SELECT {columns} FROM transactions ORDER BY id")
+        finally:
+            self.db.close()
+
+    def test_nullable_column_added_in_place(self):
+        """Test a new nullable column is added with ALTER TABLE."""
+        self.initializer.required_tables['transactions']['memo'] = 'VARCHAR(100)'
+
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.initializer.initialize_database())
+
+        self.assertIn(call("Migrating transactions: add column memo"), mock_print.call_args_list)
+        self.assertEqual(self.rows("id, memo"), [(i, None) for i in range(1, 6)])
+
+    def test_not_null_column_rebuilds_table_in_chunks(self):
+        """Test a NOT NULL column is added by copying the table and keeps ids and indexes."""
+        before = self.rows()
+        self.initializer.required_tables['transactions']['cleared'] = 'TINYINT NOT NULL'
+
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.initializer.initialize_database())
+
+        output = [call.args[0] for call in mock_print.call_args_list]
+        # Two full chunks of two rows, then the remaining row
+        self.assertEqual(sum(line.startswith("Migrating transactions: copied") for line in output), 3)
+        self.assertIn("Migrating transactions: copied 5/5 rows, swapping tables", output)
+        self.assertEqual(self.rows(), before)
+        self.assertEqual({row[0] for row in self.rows("cleared")}, {0}) # type: ignore
+
+        self.db.connect()
+        self.assertEqual(self.initializer.missing_indexes(), [])
+        self.db.close()
+
+        # The replaced table got its full-text triggers back and was reindexed
+        self.assertEqual(TransactionDBService(self.db).search_text("row 3", columns=('description',)), [("Row 3",)])
+
+    def test_validation_backfills_fingerprints(self):
+        """Test rows stored without a fingerprint get one during validation."""
+        self.assertEqual({row[0] for row in self.rows("fingerprint")}, {None}) # type: ignore
+
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.initializer.initialize_database(force_validation=True))
+
+        self.assertIn(call("Fingerprinted 5 existing transactions"), mock_print.call_args_list)
+        expected = [(transaction_fingerprint("2024-01-15", 1.00, 1, f"Row {i}", "Expense"),) for i in range(5)]
+        self.assertEqual(self.rows("fingerprint"), expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,262 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import sqlite3
+from datetime import date
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the connector
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_connector import DatabaseConnector, TransactionError, create_database_connector
+from database_initializer import DatabaseInitializer
+from sqlite_connector import SQLiteConnector, translate_query
+from controllers.db.account_db_service import AccountDBService
+from controllers.db.categories_db_service import CategoriesDBService
+from controllers.db.transaction_db_service import TransactionDBService
+from controllers.db.budget_db_service import BudgetDBService
+from controllers.db.transaction_fingerprint import transaction_fingerprint
+
+
+class SQLiteTestCase(unittest.TestCase):
+    """Base class running the real services against an in-memory SQLite database."""
+
+    def setUp(self):
+        """Create the schema and some sample accounts and categories."""
+        self.db = SQLiteConnector(":memory:")
+        with patch('builtins.print'):
+            self.assertTrue(DatabaseInitializer(self.db).initialize_database())
+
+        self.account_service = AccountDBService(self.db)
+        self.categories_service = CategoriesDBService(self.db)
+        self.transaction_service = TransactionDBService(self.db)
+        self.budget_service = BudgetDBService(self.db)
+
+        with patch('builtins.print'):
+            self.account_service.add_account("Checking", 1000.00, "Chequing")
+            self.account_service.add_account("Visa", 0.00, "Credit Card")
+            self.categories_service.add_category("Food", "Expense")
+            self.categories_service.add_category("Salary", "Income")
+            self.categories_service.add_goal("Food", 300.00)
+
+    def tearDown(self):
+        """Close every connection to the in-memory database."""
+        self.db.shutdown()
+
+    def balances(self):
+        return {row[1]: row[3] for row in self.account_service.search_all()} # type: ignore
+
+
+class TestSQLiteTranslation(unittest.TestCase):
+    """Test rewriting of MySQL statements into SQLite."""
+
+    def test_placeholders(self):
+        """Test %s placeholders become ? only when parameters are passed."""
+        self.assertEqual(translate_query("SELECT * FROM accounts WHERE id = %s", True), "SELECT * FROM accounts WHERE id = ?")
+        self.assertEqual(translate_query("SELECT '100%%'", True), "SELECT '100%'")
+        self.assertEqual(translate_query("SELECT '100%%'", False), "SELECT '100%%'")
+
+    def test_safe_updates_is_skipped(self):
+        """Test SET SQL_SAFE_UPDATES has no SQLite equivalent and is dropped."""
+        self.assertIsNone(translate_query("\n SET SQL_SAFE_UPDATES = %s\n", True))
+
+    def test_auto_increment(self):
+        """Test MySQL auto increment keys map to SQLite rowid aliases."""
+        query = translate_query("CREATE TABLE t (id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(45))", False)
+        self.assertIn("id INTEGER PRIMARY KEY AUTOINCREMENT", query)
+
+    def test_update_join(self):
+        """Test UPDATE ... JOIN ... SET is rewritten to UPDATE ... SET ... FROM."""
+        query = translate_query("UPDATE accounts JOIN d ON accounts.id = d.id SET balance = d.amount", False)
+        self.assertEqual(query, "UPDATE accounts\nSET balance = d.amount\nFROM d\nWHERE accounts.id = d.id")
+
+
+class TestSQLiteServices(SQLiteTestCase):
+    """Run the existing service queries for real on SQLite."""
+
+    def test_types_match_mysql(self):
+        """Test dates and amounts come back as date and Decimal like mysql.connector returns."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction(date(2024, 1, 15), "Groceries", Decimal("85.50"), 1, "Expense", 1, "")
+
+        row = self.transaction_service.search_all()[0] # type: ignore
+        self.assertEqual(row[0], date(2024, 1, 15))
+        self.assertEqual(row[2], Decimal("85.5"))
+
+    def test_account_transfer_update_join(self):
+        """Test the CTE based UPDATE ... JOIN in AccountDBService.add_transfer."""
+        result = self.account_service.add_transfer(1, 2, 100.00)
+
+        self.assertEqual(result, 2)
+        self.assertEqual(self.balances(), {"Checking": Decimal("900"), "Visa": Decimal("-100")})
+
+    def test_failed_service_call_rolls_back_outer_transaction(self):
+        """Test a service that catches its own failure inside an outer scope still rolls the scope back."""
+        with patch('builtins.print'):
+            with patch.object(self.transaction_service.account_db_service, 'add_transfer', return_value=1):
+                with self.assertRaises(TransactionError):
+                    with self.db.transaction():
+                        self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+                        # The legs are inserted, then the balance update fails and add_transfer returns None
+                        self.assertIsNone(self.transaction_service.add_transfer("2024-01-16", 100.00, 1, 2, ""))
+
+        self.assertEqual(self.transaction_service.search(), [])
+        self.assertEqual(self.balances(), {"Checking": Decimal("1000"), "Visa": Decimal("0")})
+
+    def test_month_budget_filter(self):
+        """Test month filtering in BudgetDBService.search_all."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-02-15", "Groceries", 40.00, 1, "Expense", 1)
+
+        budget = self.budget_service.search_all(month=1, year=2024)
+
+        self.assertEqual(budget[0][:3], ("Food", "Expense", 85.5)) # type: ignore
+
+    def test_month_budget_boundaries_and_plan(self):
+        """Test month boundaries and that the plan looks the month up by index."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-31", "Groceries", 10.00, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-02-01", "Groceries", 20.00, 1, "Expense", 1)
+
+        self.assertEqual(float(self.budget_service.search_all(month=1, year=2024)[0][2]), 10.0) # type: ignore
+
+        plan = self.budget_service.explain_search_all(month=1, year=2024)
+        self.assertTrue(self.db.index_used(plan, 'uq_category_month_totals_period_category'))
+
+    def test_budget_includes_every_category(self):
+        """Test categories without transactions or goals report zero and transfers are excluded."""
+        with patch('builtins.print'):
+            self.categories_service.add_category("Transfer", "Transfer")
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-01-31", "Pay", 2000.00, 2, "Income", 1)
+            self.transaction_service.add_transaction("2024-01-20", "Move", 50.00, 3, "Expense", 1)
+
+        budget = self.budget_service.search_all()
+
+        self.assertEqual([row[0] for row in budget], ["Food", "Salary", "Transfer"]) # type: ignore
+        self.assertEqual([float(row[2]) for row in budget], [85.5, -2000.0, 0.0]) # type: ignore
+        self.assertEqual([float(row[3]) for row in budget], [300.0, 0.0, 0.0]) # type: ignore
+
+    def test_budget_matrix(self):
+        """Test the matrix matches search_all for each month it covers."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2023-12-31", "Groceries", 10.00, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-01-31", "Pay", 2000.00, 2, "Income", 1)
+
+        matrix = self.budget_service.search_matrix(months=13, month=12, year=2024)
+
+        self.assertEqual(matrix.periods[0], 202312) # type: ignore
+        for period in (202312, 202401, 202402):
+            budget = self.budget_service.search_all(month=period % 100, year=period // 100)
+            self.assertEqual(list(matrix.column(period)), [float(row[2]) for row in budget]) # type: ignore
+
+    def test_keyset_pages(self):
+        """Test walking the pages returns every row once, in search_all order."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transactions_bulk(
+                [(f"2024-01-{day:02d}", f"Row {i}", 1.00, 1, "Expense", 1) for i, day in enumerate([3, 1, 2, 2, 2, 1, 3])]
+            )
+
+        pages = []
+        rows, cursor = self.transaction_service.search_all_page(page_size=2)
+        pages.append(rows)
+        while cursor is not None:
+            rows, cursor = self.transaction_service.search_all_page(page_size=2, cursor=cursor)
+            pages.append(rows)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1]) # type: ignore
+        self.assertEqual([row for page in pages for row in page], self.transaction_service.search_all()) # type: ignore
+
+    def test_safe_updates_statements(self):
+        """Test methods toggling SQL_SAFE_UPDATES work unchanged."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+
+        self.assertEqual(self.account_service.transfer_transactions(1, 2), 1)
+        self.assertEqual(self.transaction_service.del_account_transactions(2), 1)
+
+    def test_moved_transactions_are_fingerprinted_again(self):
+        """Test transactions moved to another account get the fingerprint of their new account."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+            self.transaction_service.add_transaction("2024-01-16", "Cafe", 4.50, 1, "Expense", 1)
+
+        self.assertEqual(self.account_service.transfer_transactions(1, 2), 2)
+
+        self.db.connect()
+        rows = self.db.execute_query("SELECT date, description, amount, type, account, fingerprint FROM transactions ORDER BY id")
+        self.db.close()
+        self.assertEqual(
+            [row[5] for row in rows], # type: ignore
+            [transaction_fingerprint(row[0], row[2], 2, row[1], row[3]) for row in rows] # type: ignore
+        )
+        self.assertEqual({row[4] for row in rows}, {2}) # type: ignore
+
+    def test_bulk_insert_ids(self):
+        """Test ids reported by a bulk insert match the stored rows."""
+        rows = [("2024-01-15", f"Row {i}", 1.00, 1, "Expense", 1, "") for i in range(5)]
+
+        with patch('builtins.print'):
+            inserted_ids, _ = self.transaction_service.add_transactions_bulk(rows, chunk_size=2)
+
+        self.assertEqual(len(inserted_ids), 5)
+        for transaction_id in inserted_ids:
+            self.assertEqual(len(self.transaction_service.search_transaction(id=transaction_id)), 1) # type: ignore
+
+    def test_stream(self):
+        """Test streaming search on a separate pooled connection."""
+        rows = [("2024-01-15", f"Row {i}", 1.00, 1, "Expense", 1, "") for i in range(7)]
+        with patch('builtins.print'):
+            self.transaction_service.add_transactions_bulk(rows)
+
+        self.assertEqual(len(list(self.transaction_service.search_all(stream=True, batch_size=3))), 7) # type: ignore
+
+    def test_transaction_scope_rolls_back(self):
+        """Test a failed balance update undoes the transaction insert."""
+        with patch('builtins.print'):
+            with self.assertRaises(TransactionError):
+                with self.db.transaction():
+                    self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+                    self.db.connect()
+                    self.db.execute_query("UPDATE missing_table SET balance = %s", (1,))
+                    self.db.close()
+
+        self.assertEqual(self.transaction_service.search_all(), [])
+
+
+    def test_failed_commit_is_reported_by_the_service(self):
+        """Test a locked database at COMMIT makes the service report an error instead of raising."""
+        with patch('builtins.print'):
+            with patch.object(self.db, 'commit', side_effect=sqlite3.OperationalError("database is locked")):
+                result = self.transaction_service.add_transaction("2024-01-15", "Groceries", 85.50, 1, "Expense", 1)
+
+        self.assertIsNone(result)
+        self.assertEqual(self.transaction_service.search_all(), [])
+
+class TestCreateDatabaseConnector(unittest.TestCase):
+    """Test backend selection through the environment."""
+
+    def test_sqlite_backend(self):
+        """Test DB_BACKEND=sqlite builds an SQLite connector on DB_PATH."""
+        db = create_database_connector({'DB_BACKEND': 'sqlite', 'DB_PATH': ':memory:'})
+        self.assertIsInstance(db, SQLiteConnector)
+        self.assertEqual(db.dialect, 'sqlite')
+        db.shutdown()
+
+    def test_mysql_is_default(self):
+        """Test MySQL remains the default backend."""
+        db = create_database_connector({'DB_HOST': 'localhost', 'DB_USER': 'u', 'DB_PASSWORD': 'p', 'DB_NAME': 'budget'})
+        self.assertIs(type(db), DatabaseConnector)
+        self.assertEqual(db.database, 'budget')
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected."""
+        with self.assertRaises(ValueError):
+            create_database_connector({'DB_BACKEND': 'oracle'})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from statement_cache import StatementCache
+from database_connector import DatabaseConnector
+
+
+class TestStatementCache(unittest.TestCase):
+    """Test LRU behaviour and counters of the prepared statement cache."""
+
+    def setUp(self):
+        """Set up a cache on a mock connection."""
+        self.connection = Mock()
+        self.connection.cursor.side_effect = lambda **kwargs: Mock()
+        self.cache = StatementCache(self.connection, max_size=2)
+
+    def test_hit_returns_same_cursor(self):
+        """Test the same SQL text reuses its prepared cursor."""
+        sql, cursor = self.cache.get("SELECT * FROM accounts WHERE id = %s")
+        sql_again, cursor_again = self.cache.get("SELECT * FROM accounts WHERE id = %s")
+
+        self.assertIs(cursor, cursor_again)
+        self.assertIs(sql, sql_again)
+        self.connection.cursor.assert_called_once_with(prepared=True)
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the oldest statement is closed when the cache is full."""
+        _, first = self.cache.get("SELECT 1")
+        self.cache.get("SELECT 2")
+        self.cache.get("SELECT 1")
+        _, third = self.cache.get("SELECT 3")
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.stats['evictions'], 1)
+        first.close.assert_not_called()
+
+        # "SELECT 2" was least recently used, so asking for it again is a miss
+        self.cache.get("SELECT 2")
+        self.assertEqual(self.cache.stats['misses'], 4)
+        third.close.assert_not_called()
+        first.close.assert_called_once()
+
+
+class TestDatabaseConnectorPreparedStatements(unittest.TestCase):
+    """Test execute_query routes prepared statements through the per-connection cache."""
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_cache_survives_pool_round_trip(self, mock_connect):
+        """Test a statement prepared in one lease is reused after the connection returns to the pool."""
+        mock_connection = Mock()
+        prepared_cursor = Mock()
+        prepared_cursor.fetchall.return_value = [(1, "Checking")]
+        mock_connection.cursor.side_effect = lambda **kwargs: prepared_cursor if kwargs.get('prepared') else Mock()
+        mock_connect.return_value = mock_connection
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+
+        query = "SELECT * FROM accounts WHERE id = %s"
+        for account_id in (1, 2, 3):
+            db.connect()
+            result = db.execute_query(query, (account_id,), prepared=True)
+            db.close()
+
+        self.assertEqual(result, [(1, "Checking")])
+        self.assertEqual(prepared_cursor.execute.call_count, 3)
+        self.assertEqual(db.statement_cache_stats, {'hits': 2, 'misses': 1, 'evictions': 0})
+
+    @patch('database_connector.mysql.connector.connect')
+    def test_unprepared_queries_bypass_cache(self, mock_connect):
+        """Test queries without prepared=True use the plain cursor."""
+        mock_connection = Mock()
+        mock_connection.cursor.return_value.fetchall.return_value = []
+        mock_connect.return_value = mock_connection
+        db = DatabaseConnector("localhost", "testuser", "testpass", "testdb")
+
+        db.connect()
+        db.execute_query("SELECT * FROM accounts")
+
+        db.cursor.execute.assert_called_once_with("SELECT * FROM accounts", None) # type: ignore
+        self.assertEqual(db.statement_cache_stats['misses'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
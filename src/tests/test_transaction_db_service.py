@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, MagicMock, Mock, patch
 import sys
 import os
 from datetime import datetime, date
@@ -8,6 +8,7 @@ from datetime import datetime, date
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from controllers.db.transaction_db_service import TransactionDBService
+from controllers.db.transaction_fingerprint import transaction_fingerprint
 
 
 class TestTransactionDBService(unittest.TestCase):
@@ -16,7 +17,7 @@ class TestTransactionDBService(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures before each test method."""
         # Create a mock database connector
-        self.mock_db = Mock()
+        self.mock_db = MagicMock()
         self.service = TransactionDBService(self.mock_db)
     
     def test_add_transaction_basic(self):
@@ -117,116 +118,189 @@ class TestTransactionDBService(unittest.TestCase):
         mock_print.assert_called_with("Error with insert query")
 
 
+class TestTransactionBulkInsert(unittest.TestCase):
+    """Test bulk insertion of transactions."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.mock_db = MagicMock()
+        self.mock_db.execute_many.side_effect = lambda query, chunk: len(chunk)
+        self.mock_db.last_insert_ids.side_effect = lambda count: list(range(1, count + 1))
+        self.service = TransactionDBService(self.mock_db)
+    
+    def test_add_transactions_bulk_chunks_rows(self):
+        """Test rows are split into chunks inside a single transaction."""
+        rows = [("2024-01-15", f"Row {i}", 10.00, 1, "Expense", 1, "") for i in range(5)]
+        
+        inserted_ids, chunk_timings = self.service.add_transactions_bulk(rows, chunk_size=2)
+        
+        self.assertEqual(len(inserted_ids), 5)
+        self.assertEqual([timing['rows'] for timing in chunk_timings], [2, 2, 1])
+        
+        # Every chunk is written inside one transaction scope, followed by its category totals
+        queries = [call[0][0] for call in self.mock_db.execute_many.call_args_list]
+        self.assertEqual(["INSERT INTO transactions" in query for query in queries], [True, False] * 3)
+        self.assertTrue(all("INSERT INTO category_month_totals" in query for query in queries[1::2]))
+        self.mock_db.transaction.assert_called_once()
+        self.mock_db.transaction.return_value.__exit__.assert_called_once_with(None, None, None)
+    
+    def test_add_transactions_bulk_accepts_dicts(self):
+        """Test generator style dict rows are mapped to insert parameters."""
+        rows = [{
+            'date': "2024-01-15", 'description': "Coffee", 'amount': 4.50, 'category_id': 2,
+            'transaction_type': "Expense", 'account_id': 3, 'notes': "Morning"
+        }]
+        
+        self.service.add_transactions_bulk(rows)
+        
+        chunk = self.mock_db.execute_many.call_args_list[0][0][1]
+        fingerprint = transaction_fingerprint("2024-01-15", 4.50, 3, "Coffee", "Expense")
+        self.assertEqual(chunk, [("2024-01-15", "Coffee", 4.50, 2, "Expense", 3, "Morning", fingerprint)])
+    
+    def test_add_transactions_bulk_skips_stored_fingerprints(self):
+        """Test each chunk's fingerprints are looked up once and stored ones are skipped."""
+        rows = [("2024-01-15", f"Row {i}", 10.00, 1, "Expense", 1, "") for i in range(3)]
+        stored = transaction_fingerprint("2024-01-15", 10.00, 1, "ROW 1!", "Expense")
+        self.mock_db.execute_query.side_effect = [[(40,)], [(stored, 1)]]
+        
+        inserted_ids, chunk_timings = self.service.add_transactions_bulk(rows, duplicates='skip')
+        
+        self.assertEqual(len(inserted_ids), 2)
+        self.assertEqual(chunk_timings[0]['duplicates'], 1)
+        lookup, params = self.mock_db.execute_query.call_args_list[1][0]
+        self.assertIn("WHERE fingerprint IN (%s, %s, %s) AND id <= %s", lookup)
+        self.assertEqual(params[-1], 40)
+        chunk = self.mock_db.execute_many.call_args_list[0][0][1]
+        self.assertEqual([row[1] for row in chunk], ["Row 0", "Row 2"])
+    
+    def test_add_transactions_bulk_rejects_unknown_policy(self):
+        """Test an unknown duplicate policy is refused before anything is written."""
+        with self.assertRaises(ValueError):
+            self.service.add_transactions_bulk([], duplicates='ignore')
+        self.mock_db.transaction.assert_not_called()
+    
+    def test_add_transactions_bulk_rolls_back_on_failure(self):
+        """Test a failed chunk rolls back everything and reports no ids."""
+        self.mock_db.execute_many.side_effect = [2, 1, None]
+        rows = [("2024-01-15", f"Row {i}", 10.00, 1, "Expense", 1, "") for i in range(4)]
+        
+        inserted_ids, chunk_timings = self.service.add_transactions_bulk(rows, chunk_size=2)
+        
+        self.assertEqual(inserted_ids, [])
+        
+        # The exception reaches the transaction scope so it can roll back
+        exit_args = self.mock_db.transaction.return_value.__exit__.call_args[0]
+        self.assertIs(exit_args[0], RuntimeError)
+
+
 class TestTransactionTransferMethods(unittest.TestCase):
     """Test transaction transfer functionality."""
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.mock_db = Mock()
+        self.mock_db = MagicMock()
+        self.mock_db.execute_many.return_value = 2
+        self.mock_db.execute_query.return_value = 2
+        self.mock_db.last_insert_ids.return_value = [10, 11]
         self.service = TransactionDBService(self.mock_db)
+        
+        # Account names and the Transfer category are looked up through the metadata cache
+        self.service.account_db_service.select_name_id_all_accounts = Mock(return_value=[
+            (1, "Checking Account"), (2, "Savings Account"), (3, "Credit Card")
+        ])
+        self.service.categories_db_service.search_categories = Mock(return_value=[(7, "Transfer", "2024-01-01", "Transfer")])
+        self.service.account_db_service.add_transfer = Mock(return_value=2)
+    
+    def insert_params(self):
+        """Returns the incoming leg, checking the outgoing one mirrors it"""
+        inserts = [call for call in self.mock_db.execute_many.call_args_list if "INSERT INTO transactions" in call[0][0]]
+        self.assertEqual(len(inserts), 1)
+        incoming, outgoing = inserts[0][0][1]
+        self.assertEqual(outgoing[2], -incoming[2])
+        self.assertEqual(outgoing[:2] + outgoing[3:5] + outgoing[6:7], incoming[:2] + incoming[3:5] + incoming[6:7])
+        return incoming
     
     def test_add_transfer_basic(self):
         """Test adding a basic transfer transaction."""
-        # Setup mock for account lookups and insert
-        # Mock the account search calls to return account names
-        self.service.account_db_service.search_account = Mock()
-        self.service.account_db_service.search_account.side_effect = [
-            [(1, "Checking Account", 1000.00, "Chequing", False)],  # from_account
-            [(2, "Savings Account", 2000.00, "Savings", False)]     # to_account
-        ]
-        self.mock_db.execute_query.return_value = 1
-        
-        # Test data
         transfer_date = "2024-01-15"
         amount = 500.00
-        from_account = 1
-        to_account = 2
         notes = "Monthly savings transfer"
         
-        # Call method
-        result = self.service.add_transfer(transfer_date, amount, from_account, to_account, notes)
+        result = self.service.add_transfer(transfer_date, amount, 1, 2, notes)
         
-        # Verify database interactions
-        self.mock_db.connect.assert_called_once()
-        self.mock_db.close.assert_called_once()
         self.assertEqual(result, 1)
-        
-        # Verify account searches were called
-        self.service.account_db_service.search_account.assert_any_call(id=from_account)
-        self.service.account_db_service.search_account.assert_any_call(id=to_account)
-        
-        # Verify the query was called correctly
-        call_args = self.mock_db.execute_query.call_args
-        query = call_args[0][0]
-        params = call_args[0][1]
-        
-        self.assertIn("INSERT INTO transactions", query)
-        self.assertIn("date, description, amount, type, account, notes", query)
-        
-        # Check parameters
+        params = self.insert_params()
         self.assertEqual(params[0], transfer_date)
         self.assertEqual(params[1], "Transfer from Checking Account to Savings Account")
         self.assertEqual(params[2], amount)
-        self.assertEqual(params[3], "Transfer")
-        self.assertEqual(params[4], to_account)  # Transfer goes to the destination account
-        self.assertEqual(params[5], notes)
+        self.assertEqual(params[3], 7)
+        self.assertEqual(params[4], "Transfer")
+        self.assertEqual(params[5], 2)  # The incoming leg is on the destination account
+        self.assertEqual(params[6], notes)
+        
+        # Both legs share the id of the incoming leg
+        self.mock_db.execute_query.assert_any_call(ANY, (10, 10, 11))
+        
+        # The balances move inside the same transaction as the insert
+        self.service.account_db_service.add_transfer.assert_called_once_with(1, 2, amount)
+        self.mock_db.transaction.assert_called_once()
     
     def test_add_transfer_description_format(self):
         """Test that transfer description is formatted correctly."""
-        # Setup mock
-        self.service.account_db_service.search_account = Mock()
-        self.service.account_db_service.search_account.side_effect = [
-            [(1, "Main Checking", 1500.00, "Chequing", False)],
-            [(3, "Credit Card", -200.00, "Credit Card", True)]
-        ]
-        self.mock_db.execute_query.return_value = 1
+        self.service.add_transfer("2024-01-15", 300.00, 1, 3, "Payment")
         
-        # Call method
-        result = self.service.add_transfer("2024-01-15", 300.00, 1, 3, "Payment")
+        self.assertEqual(self.insert_params()[1], "Transfer from Checking Account to Credit Card")
+    
+    def test_add_transfer_without_balance_update(self):
+        """Test the balances can be left alone."""
+        self.service.add_transfer("2024-01-15", 300.00, 1, 2, "", update_balances=False)
         
-        # Verify description format
-        call_args = self.mock_db.execute_query.call_args
-        params = call_args[0][1]
+        self.service.account_db_service.add_transfer.assert_not_called()
+    
+    def test_add_transfer_lookups_are_cached(self):
+        """Test account names and the Transfer category are only looked up once."""
+        self.service.add_transfer("2024-01-15", 10.00, 1, 2, "")
+        self.service.add_transfer("2024-01-16", 20.00, 2, 3, "")
+        
+        self.service.account_db_service.select_name_id_all_accounts.assert_called_once()
+        self.service.categories_db_service.search_categories.assert_called_once_with(name="Transfer")
+        self.mock_db.connect.assert_called()
+        self.assertEqual(self.service.metadata_cache.stats['hits'], 2)
+    
+    @patch('builtins.print')
+    def test_add_transfer_unknown_account(self, mock_print):
+        """Test an account missing from the cache is reloaded once, then the transfer is refused."""
+        self.service.add_transfer("2024-01-15", 10.00, 1, 2, "")
+        
+        result = self.service.add_transfer("2024-01-15", 10.00, 1, 9, "")
         
-        expected_description = "Transfer from Main Checking to Credit Card"
-        self.assertEqual(params[1], expected_description)
+        self.assertIsNone(result)
+        self.assertEqual(self.service.account_db_service.select_name_id_all_accounts.call_count, 2)
+        self.service.account_db_service.add_transfer.assert_called_once()
+    
+    @patch('builtins.print')
+    def test_add_transfer_creates_transfer_category(self, mock_print):
+        """Test the Transfer category is created when it does not exist yet."""
+        self.service.categories_db_service.search_categories.side_effect = [[], [(8, "Transfer", "2024-01-01", "Transfer")]]
+        self.service.categories_db_service.add_category = Mock(return_value=1)
+        
+        self.service.add_transfer("2024-01-15", 10.00, 1, 2, "")
+        
+        self.service.categories_db_service.add_category.assert_called_once_with("Transfer", "Transfer")
+        self.assertEqual(self.insert_params()[3], 8)
     
     def test_add_transfer_zero_amount(self):
         """Test transfer with zero amount (edge case)."""
-        # Setup mock
-        self.service.account_db_service.search_account = Mock()
-        self.service.account_db_service.search_account.side_effect = [
-            [(1, "Account A", 1000.00, "Chequing", False)],
-            [(2, "Account B", 2000.00, "Savings", False)]
-        ]
-        self.mock_db.execute_query.return_value = 1
-        
-        # Call method with zero amount
-        result = self.service.add_transfer("2024-01-15", 0.00, 1, 2, "Test zero transfer")
+        self.service.add_transfer("2024-01-15", 0.00, 1, 2, "Test zero transfer")
         
-        # Verify amount is passed correctly
-        call_args = self.mock_db.execute_query.call_args
-        params = call_args[0][1]
-        self.assertEqual(params[2], 0.00)
+        self.assertEqual(self.insert_params()[2], 0.00)
     
     def test_add_transfer_large_amount(self):
         """Test transfer with large amount."""
-        # Setup mock
-        self.service.account_db_service.search_account = Mock()
-        self.service.account_db_service.search_account.side_effect = [
-            [(1, "Business Checking", 50000.00, "Chequing", False)],
-            [(2, "Investment Account", 100000.00, "Savings", False)]
-        ]
-        self.mock_db.execute_query.return_value = 1
-        
-        # Call method with large amount
         large_amount = 25000.00
-        result = self.service.add_transfer("2024-01-15", large_amount, 1, 2, "Investment transfer")
+        self.service.add_transfer("2024-01-15", large_amount, 1, 2, "Investment transfer")
         
-        # Verify amount is passed correctly
-        call_args = self.mock_db.execute_query.call_args
-        params = call_args[0][1]
-        self.assertEqual(params[2], large_amount)
+        self.assertEqual(self.insert_params()[2], large_amount)
 
 
 class TestTransactionSearchMethods(unittest.TestCase):
@@ -234,7 +308,7 @@ class TestTransactionSearchMethods(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.mock_db = Mock()
+        self.mock_db = MagicMock()
         self.service = TransactionDBService(self.mock_db)
     
     def test_search_transaction_by_id(self):
@@ -315,6 +389,20 @@ class TestTransactionSearchMethods(unittest.TestCase):
         self.assertIn("LEFT JOIN accounts a ON t.account = a.id", query)
         self.assertIn("ORDER BY t.date DESC", query)
     
+    def test_search_all_stream(self):
+        """Test streaming search_all delegates to iter_query without leasing a connection."""
+        self.mock_db.iter_query.return_value = iter([("2024-01-15", "Gas", 45.00, "Transportation", "Checking", "Expense")])
+        
+        result = self.service.search_all(stream=True, batch_size=100)
+        
+        self.assertEqual(list(result), [("2024-01-15", "Gas", 45.00, "Transportation", "Checking", "Expense")]) # type: ignore
+        self.mock_db.connect.assert_not_called()
+        self.mock_db.execute_query.assert_not_called()
+        
+        call_args = self.mock_db.iter_query.call_args
+        self.assertIn("ORDER BY t.date DESC, t.id DESC", call_args[0][0])
+        self.assertEqual(call_args[1]['batch_size'], 100)
+    
     def test_search_by_date_range(self):
         """Test searching transactions by date range."""
         # Setup mock
@@ -365,13 +453,44 @@ class TestTransactionSearchMethods(unittest.TestCase):
         
         self.assertEqual(params[0], account_id)
 
+    def test_search_page_cursor(self):
+        """Test a page starts after the cursor and returns the last row's (date, id)."""
+        self.mock_db.execute_query.return_value = [
+            ("2024-01-15", "A", 10.00, "Food", "Checking", "Expense", "2024-01-15", 9),
+            ("2024-01-15", "B", 20.00, "Food", "Checking", "Expense", "2024-01-15", 7),
+            ("2024-01-14", "C", 30.00, "Food", "Checking", "Expense", "2024-01-14", 8),
+        ]
+
+        rows, cursor = self.service.search_by_account_page(1, page_size=2, cursor=("2024-01-16", 3))
+
+        self.assertEqual(rows, [
+            ("2024-01-15", "A", 10.00, "Food", "Checking", "Expense"),
+            ("2024-01-15", "B", 20.00, "Food", "Checking", "Expense"),
+        ])
+        self.assertEqual(cursor, ("2024-01-15", 7))
+
+        query, params = self.mock_db.execute_query.call_args[0]
+        self.assertIn("t.date <= %s AND (t.date < %s OR t.id < %s)", query)
+        self.assertNotIn("OFFSET", query)
+        self.assertEqual(params, (1, "2024-01-16", "2024-01-16", 3, 3))
+
+    def test_search_page_last(self):
+        """Test the last page has no next cursor."""
+        self.mock_db.execute_query.return_value = [("2024-01-15", "A", 10.00, "Food", "Checking", "Expense", "2024-01-15", 9)]
+
+        rows, cursor = self.service.search_all_page(page_size=2)
+
+        self.assertEqual(len(rows), 1) # type: ignore
+        self.assertIsNone(cursor)
+        self.assertEqual(self.mock_db.execute_query.call_args[0][1], (3,))
+
 
 class TestTransactionDeletionMethods(unittest.TestCase):
     """Test transaction deletion functionality."""
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.mock_db = Mock()
+        self.mock_db = MagicMock()
         self.service = TransactionDBService(self.mock_db)
     
     def test_del_transaction(self):
@@ -451,7 +570,7 @@ class TestTransactionServiceIntegration(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.mock_db = Mock()
+        self.mock_db = MagicMock()
         self.service = TransactionDBService(self.mock_db)
     
     def test_search_for_deletion_with_date_range(self):
@@ -495,6 +614,17 @@ class TestTransactionServiceIntegration(unittest.TestCase):
         self.assertNotIn("WHERE t.date BETWEEN", query)
         self.assertIn("ORDER BY t.date DESC", query)
     
+    def test_search_for_deletion_stream(self):
+        """Test streaming search for deletion passes the date range to iter_query."""
+        self.mock_db.iter_query.return_value = iter([])
+        
+        self.service.search_for_deletion("2024-01-01", "2024-01-31", stream=True)
+        
+        call_args = self.mock_db.iter_query.call_args
+        self.assertIn("WHERE t.date BETWEEN %s AND %s", call_args[0][0])
+        self.assertEqual(call_args[0][1], ("2024-01-01", "2024-01-31"))
+        self.mock_db.connect.assert_not_called()
+    
     def test_transaction_type_consistency(self):
         """Test that transaction types are handled consistently."""
         # Setup mock
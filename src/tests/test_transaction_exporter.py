@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import csv
+import json
+import tempfile
+from datetime import date
+
+# Add the parent directory to the path so we can import the exporter
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.transaction_exporter import TransactionExporter
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestTransactionExporter(SQLiteTestCase):
+    """Test exporting the ledger from a real database."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.exporter = TransactionExporter(self.db, chunk_rows=2, batch_size=1)
+
+        with patch('builtins.print'):
+            self.transaction_service.add_transactions_bulk([
+                ("2024-01-05", "Groceries", 85.50, 1, "Expense", 1, "weekly"),
+                ("2024-01-06", "Pay", 2000.00, 2, "Income", 1, ""),
+                ("2024-01-07", "Café", 4.25, None, "Expense", 2, None),
+                ("2024-01-08", "Groceries", 12.00, 1, "Expense", 2, ""),
+                ("2024-01-09", "Refund", 10.00, 1, "Income", 1, ""),
+            ])
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def export(self):
+        with patch('builtins.print'):
+            return self.exporter.export(self.directory.name)
+
+    def test_export_chunks(self):
+        """Test both formats are written in chunks with the same rows."""
+        report = self.export()
+
+        self.assertEqual((report['rows'], report['chunks'], report['complete']), (5, 3, True))
+
+        with open(self.path("chunk-00001.csv"), newline='', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[1], ['3', '2024-01-07', 'Café', '4.25', '', '', 'Expense', '2', 'Visa', ''])
+
+        columns = TransactionExporter.read_columnar(self.path("chunk-00000.cols"))
+        self.assertEqual(list(columns['id']), [1, 2])
+        self.assertEqual(list(columns['date']), [date(2024, 1, 5).toordinal(), date(2024, 1, 6).toordinal()])
+        self.assertEqual(list(columns['amount']), [8550, 200000])
+        self.assertEqual(columns['notes'], ['weekly', ''])
+
+        with open(self.path("manifest.json"), encoding='utf-8') as file:
+            manifest = json.load(file)
+        self.assertEqual(manifest['dictionaries']['type'], ['Expense', 'Income'])
+        self.assertEqual(manifest['dictionaries']['category'], {'1': 'Food', '2': 'Salary'})
+
+    def test_resume(self):
+        """Test an interrupted export continues after its last finished chunk."""
+        original = self.exporter._write_columnar
+        calls = []
+
+        def fail_on_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return original(*args)
+
+        with patch.object(self.exporter, '_write_columnar', side_effect=fail_on_second_chunk):
+            with self.assertRaises(KeyboardInterrupt):
+                self.export()
+
+        report = self.export()
+
+        self.assertEqual((report['rows'], report['chunks'], report['complete']), (3, 2, True))
+        ids = [list(TransactionExporter.read_columnar(self.path(f"chunk-{i:05d}.cols"))['id']) for i in range(3)]
+        self.assertEqual(ids, [[1, 2], [3, 4], [5]])
+
+        self.assertTrue(self.export()['complete'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.db.category_totals_db_service import CategoryTotalsDBService
+from controllers.db.transaction_fingerprint import DUPLICATE_NOTE, DuplicateFinder, normalize_description, transaction_fingerprint
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestTransactionFingerprint(unittest.TestCase):
+    """Test the content fingerprint of a transaction."""
+
+    def test_normalize_description(self):
+        """Test case, punctuation and spacing do not matter."""
+        self.assertEqual(normalize_description("  AMAZON.COM*Mktp   US "), "amazon com mktp us")
+        self.assertEqual(normalize_description(None), "")
+
+    def test_same_content_same_fingerprint(self):
+        """Test equal content gives one fingerprint whatever the value types."""
+        fingerprint = transaction_fingerprint(date(2024, 1, 5), Decimal("25.00"), 1, "Amazon Mktp", "Expense")
+
+        self.assertEqual(len(fingerprint), 40)
+        self.assertEqual(transaction_fingerprint("2024-01-05", 25, 1, "AMAZON  MKTP.", "Expense"), fingerprint)
+        self.assertNotEqual(transaction_fingerprint("2024-01-05", 25.01, 1, "Amazon Mktp", "Expense"), fingerprint)
+        self.assertNotEqual(transaction_fingerprint("2024-01-05", 25, 2, "Amazon Mktp", "Expense"), fingerprint)
+        self.assertNotEqual(transaction_fingerprint("2024-01-05", 25, 1, "Amazon Mktp", "Income"), fingerprint)
+
+
+class TestDuplicateDetection(SQLiteTestCase):
+    """Test bulk writes against stored fingerprints on a real database."""
+
+    def setUp(self):
+        super().setUp()
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2024-01-05", "Coffee Shop", 4.50, None, "Expense", 1, "")
+            self.transaction_service.add_transaction("2024-01-06", "Groceries", 20.00, 1, "Expense", 1, "weekly")
+
+        self.rows = [
+            ("2024-01-05", "COFFEE SHOP", 4.50, 1, "Expense", 1, "latte"),
+            ("2024-01-06", "Groceries", 20.00, 1, "Expense", 1, ""),
+            ("2024-01-07", "Bakery", 3.00, 1, "Expense", 1, ""),
+        ]
+
+    def stored(self):
+        return self.transaction_service.search(columns=('description', 'category_id', 'notes'))
+
+    def test_skip(self):
+        """Test stored rows are skipped and rerunning the same rows adds nothing."""
+        with patch('builtins.print'):
+            inserted_ids, chunk_timings = self.transaction_service.add_transactions_bulk(self.rows, chunk_size=2, duplicates='skip')
+            rerun_ids, _ = self.transaction_service.add_transactions_bulk(self.rows, duplicates='skip')
+
+        self.assertEqual(len(inserted_ids), 1)
+        self.assertEqual([timing['duplicates'] for timing in chunk_timings], [2, 0])
+        self.assertEqual(rerun_ids, [])
+        self.assertEqual(len(self.stored()), 3) # type: ignore
+
+    def test_copies_within_the_rows_are_kept(self):
+        """Test a stored copy only matches one new row, identical new rows are not matched together."""
+        with patch('builtins.print'):
+            inserted_ids, _ = self.transaction_service.add_transactions_bulk([self.rows[1]] * 3, chunk_size=1, duplicates='skip')
+
+        self.assertEqual(len(inserted_ids), 2)
+
+    def test_flag(self):
+        """Test duplicates are written with a note for review."""
+        with patch('builtins.print'):
+            inserted_ids, _ = self.transaction_service.add_transactions_bulk(self.rows, duplicates='flag')
+
+        self.assertEqual(len(inserted_ids), 3)
+        self.assertEqual(sorted(self.stored()), [ # type: ignore
+            ("Bakery", 1, ""),
+            ("COFFEE SHOP", 1, f"{DUPLICATE_NOTE} latte"),
+            ("Coffee Shop", None, ""),
+            ("Groceries", 1, DUPLICATE_NOTE),
+            ("Groceries", 1, "weekly"),
+        ])
+
+    def test_merge(self):
+        """Test duplicates fill the stored copy's missing category and notes and its totals follow."""
+        with patch('builtins.print'):
+            inserted_ids, _ = self.transaction_service.add_transactions_bulk(self.rows, duplicates='merge')
+
+        self.assertEqual(len(inserted_ids), 1)
+        self.assertEqual(sorted(self.stored()), [ # type: ignore
+            ("Bakery", 1, ""),
+            ("Coffee Shop", 1, "latte"),
+            ("Groceries", 1, "weekly"),
+        ])
+        # The coffee now counts towards Food
+        self.assertEqual(CategoryTotalsDBService(self.db).check_consistency(), [])
+
+    def test_finder_only_counts_rows_stored_before_it(self):
+        """Test rows written after the finder was created never match."""
+        finder = DuplicateFinder(self.db)
+        with patch('builtins.print'):
+            self.transaction_service.add_transactions_bulk([self.rows[2]])
+
+        fingerprints = [transaction_fingerprint(*[row[i] for i in (0, 2, 5, 1, 4)]) for row in self.rows]
+        self.assertEqual(finder.matches(fingerprints), [True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import io
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the importer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.transaction_importer import TransactionImporter
+from test_sqlite_connector import SQLiteTestCase
+
+CSV_STATEMENT = """Date,Description,Debit,Credit,Memo
+2024-01-05,AMAZON MKTPLACE,25.00,,order 1
+2024-01-05,AMAZON MKTPLACE,25.00,,order 2
+01/06/2024,Payroll,,"1,500.00",
+not a date,Broken,1.00,,
+2024-01-07,Coffee Shop,4.50,,
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240110120000<TRNAMT>-12.34<FITID>1<NAME>Grocer<MEMO>weekly shop</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240111<TRNAMT>100.00<FITID>2<NAME>Refund</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class TestTransactionImporter(SQLiteTestCase):
+    """Test importing statements into a real database."""
+
+    def setUp(self):
+        super().setUp()
+        self.importer = TransactionImporter(self.db, batch_size=2)
+
+    def import_csv(self, text=CSV_STATEMENT, **kwargs):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(text)
+        self.addCleanup(os.remove, file.name)
+        with patch('builtins.print'):
+            return self.importer.import_file(file.name, 1, **kwargs)
+
+    def test_csv_import(self):
+        """Test rows are normalized, categorized and written in batches."""
+        report = self.import_csv(category_rules=[("amazon", 1)], default_category_id=2)
+
+        self.assertEqual(
+            {key: report[key] for key in ('read', 'imported', 'duplicates', 'invalid', 'batches')},
+            {'read': 5, 'imported': 4, 'duplicates': 0, 'invalid': 1, 'batches': 2}
+        )
+        rows = self.transaction_service.search(columns=('date', 'description', 'amount', 'category_id', 'type', 'notes'))
+        self.assertEqual(rows[-1], (date(2024, 1, 5), "AMAZON MKTPLACE", Decimal("25.00"), 1, "Expense", "order 1")) # type: ignore
+        self.assertEqual(rows[1], (date(2024, 1, 6), "Payroll", Decimal("1500.00"), 2, "Income", "")) # type: ignore
+        self.assertEqual(self.balances()["Checking"], Decimal("1000") - 25 - 25 + 1500 - Decimal("4.50"))
+
+    def test_balance_updated_once_per_batch(self):
+        """Test the account balance moves once per batch by the batch's net amount."""
+        with patch.object(self.importer.account_db_service, 'add_transaction', return_value=1) as add_transaction:
+            self.import_csv()
+
+        self.assertEqual([call.args for call in add_transaction.call_args_list], [
+            (1, Decimal("-50.00")),
+            (1, Decimal("1495.50")),
+        ])
+
+    def test_reimport_skips_existing_rows(self):
+        """Test importing an overlapping statement again only adds new rows, keeping repeated rows."""
+        self.import_csv()
+        report = self.import_csv(CSV_STATEMENT + "2024-01-08,AMAZON MKTPLACE,25.00,,\n")
+
+        self.assertEqual((report['imported'], report['duplicates']), (1, 4))
+        self.assertEqual(len(self.transaction_service.search_all()), 5) # type: ignore
+
+    def test_ofx_import(self):
+        """Test OFX transactions are read even when split across chunks."""
+        records = list(self.importer.read_ofx(io.StringIO(OFX_STATEMENT), chunk_size=7))
+
+        self.assertEqual(records, [
+            {'date': '20240110', 'description': 'Grocer', 'amount': '-12.34', 'notes': 'weekly shop'},
+            {'date': '20240111', 'description': 'Refund', 'amount': '100.00', 'notes': ''},
+        ])
+
+
+    def test_ofx_import_non_ascii(self):
+        """Test blocks after text that changes length when upper-cased are still found."""
+        statement = OFX_STATEMENT.replace("Grocer", "Straße ﬁne ßßßß").replace("weekly shop", "Maß ﬂour")
+        records = list(self.importer.read_ofx(io.StringIO(statement), chunk_size=5))
+
+        self.assertEqual(records, [
+            {'date': '20240110', 'description': 'Straße ﬁne ßßßß', 'amount': '-12.34', 'notes': 'Maß ﬂour'},
+            {'date': '20240111', 'description': 'Refund', 'amount': '100.00', 'notes': ''},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
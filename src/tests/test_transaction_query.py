@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the query builder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.db.transaction_query import TransactionFilter, build_text_search_query, build_transaction_query
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestTransactionQuery(unittest.TestCase):
+
+    def test_combined_filter(self):
+        """Test every filter becomes one parameterized condition on a bare column."""
+        transaction_filter = TransactionFilter(
+            start_date="2024-01-01", end_date="2024-01-31", account_id=1,
+            category_id=[2, 3], transaction_type="Expense", min_amount=10
+        )
+
+        query, params = build_transaction_query(transaction_filter)
+
+        self.assertIn(
+            "WHERE t.date BETWEEN %s AND %s AND t.account = %s AND t.category IN (%s, %s) AND t.type = %s AND t.amount >= %s",
+            query
+        )
+        self.assertEqual(params, ("2024-01-01", "2024-01-31", 1, 2, 3, "Expense", 10))
+
+    def test_no_filter(self):
+        """Test an empty filter selects everything without parameters."""
+        query, params = build_transaction_query(TransactionFilter())
+
+        self.assertNotIn("WHERE", query)
+        self.assertIn("ORDER BY t.date DESC, t.id DESC", query)
+        self.assertIsNone(params)
+
+    def test_projection_skips_joins(self):
+        """Test only the requested columns are selected and unused joins are left out."""
+        query, _ = build_transaction_query(columns=('id', 'amount', 'category_name'))
+
+        self.assertIn("SELECT t.id, t.amount, c.name as category_name", query)
+        self.assertIn("LEFT JOIN categories c", query)
+        self.assertNotIn("LEFT JOIN accounts a", query)
+
+    def test_unknown_column(self):
+        """Test a projection naming an unknown column is rejected."""
+        with self.assertRaises(ValueError):
+            build_transaction_query(columns=('id', 'password'))
+
+    def test_fulltext_query(self):
+        """Test MySQL text search requires every word as a prefix and ranks by relevance."""
+        query, params = build_text_search_query("amazon prime!", 'fulltext', TransactionFilter(account_id=1), limit=20)
+
+        self.assertIn("WHERE MATCH(t.description, t.notes) AGAINST (%s IN BOOLEAN MODE) AND t.account = %s", query)
+        self.assertIn("ORDER BY MATCH(t.description, t.notes) AGAINST (%s IN BOOLEAN MODE) DESC", query)
+        self.assertEqual(params, ("+amazon* +prime*", 1, "+amazon* +prime*", 20))
+
+    def test_like_fallback_query(self):
+        """Test the LIKE fallback matches each word in either column."""
+        query, params = build_text_search_query("amazon", 'like')
+
+        self.assertIn("WHERE (t.description LIKE %s OR t.notes LIKE %s)", query)
+        self.assertEqual(params, ("%amazon%", "%amazon%", 100))
+
+    def test_text_without_words(self):
+        """Test punctuation alone does not build a query."""
+        self.assertEqual(build_text_search_query(" *! ", 'fts5'), (None, None))
+
+
+class TestTransactionSearchSQLite(SQLiteTestCase):
+    """Test combined filters against a real database."""
+
+    def test_search(self):
+        """Test a combined filter returns only the matching rows, newest first."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transactions_bulk([
+                ("2024-01-05", "Small", 5.00, 1, "Expense", 1),
+                ("2024-01-10", "Big", 150.00, 1, "Expense", 1),
+                ("2024-01-12", "Other account", 120.00, 1, "Expense", 2),
+                ("2024-01-20", "Pay", 2000.00, 2, "Income", 1),
+                ("2024-02-01", "Next month", 200.00, 1, "Expense", 1),
+            ])
+
+        rows = self.transaction_service.search(
+            TransactionFilter(start_date="2024-01-01", end_date="2024-01-31", account_id=1, min_amount=100),
+            columns=('description', 'category_name')
+        )
+
+        self.assertEqual(rows, [("Pay", "Salary"), ("Big", "Food")])
+
+    def test_search_text(self):
+        """Test text search ranks matches, combines with filters and follows edits."""
+        with patch('builtins.print'):
+            self.transaction_service.add_transaction("2023-03-01", "Amazon", 20.00, 1, "Expense", 1, "amazon prime")
+            self.transaction_service.add_transaction("2024-05-01", "Books", 35.00, 1, "Expense", 1, "bought on the amazon marketplace for a friend")
+            self.transaction_service.add_transaction("2024-06-01", "Groceries", 50.00, 1, "Expense", 2, "")
+
+            self.assertEqual(self.transaction_service.search_text("AMAZ", columns=('id',)), [(1,), (2,)])
+            self.assertEqual(
+                self.transaction_service.search_text("amazon", TransactionFilter(start_date="2024-01-01"), columns=('id',)),
+                [(2,)]
+            )
+
+            self.transaction_service.del_transaction(1)
+            self.transaction_service.reassign_category(3, 2)
+            self.db.connect()
+            self.db.execute_query("UPDATE transactions SET notes = %s WHERE id = %s", ("amazon fresh", 3))
+            self.db.close()
+
+            self.assertEqual(self.transaction_service.search_text("amazon", columns=('id',)), [(3,), (2,)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import call, patch
+import sys
+import os
+from decimal import Decimal
+
+# Add the parent directory to the path so we can import the service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_initializer import DatabaseInitializer
+from controllers.db.category_totals_db_service import CategoryTotalsDBService
+from database_connector import TransactionError
+from test_sqlite_connector import SQLiteTestCase
+
+
+class TestDoubleEntryTransfers(SQLiteTestCase):
+    """Test transfers stored as two linked legs on a real database."""
+
+    def setUp(self):
+        super().setUp()
+        with patch('builtins.print'):
+            self.assertEqual(self.transaction_service.add_transfer("2024-01-15", 100.00, 1, 2, "card payment"), 1)
+
+    def legs(self):
+        return sorted(self.transaction_service.search(columns=('account_id', 'amount', 'transfer_id'))) # type: ignore
+
+    def test_legs_are_linked(self):
+        """Test the outgoing and incoming legs mirror each other and share a transfer id."""
+        (from_account, outgoing, outgoing_id), (to_account, incoming, incoming_id) = self.legs()
+
+        self.assertEqual((from_account, to_account), (1, 2))
+        self.assertEqual((outgoing, incoming), (Decimal("-100.00"), Decimal("100.00")))
+        self.assertIsNotNone(outgoing_id)
+        self.assertEqual(outgoing_id, incoming_id)
+        self.assertEqual(CategoryTotalsDBService(self.db).check_consistency(), [])
+
+    def test_deleting_one_leg_deletes_both(self):
+        """Test del_transaction never leaves half a transfer behind."""
+        leg_id = self.transaction_service.search(columns=('id',))[0][0] # type: ignore
+        with patch('builtins.print'):
+            with patch.object(self.transaction_service, '_transfer_legs', wraps=self.transaction_service._transfer_legs) as transfer_legs:
+                self.assertEqual(self.transaction_service.del_transaction(leg_id), 1)
+
+        # The legs found by del_transaction are handed to del_transfer
+        transfer_legs.assert_called_once_with(leg_id)
+        self.assertEqual(self.legs(), [])
+        self.assertEqual(self.balances(), {"Checking": Decimal("900"), "Visa": Decimal("-100")})
+
+    def test_delete_and_reverse(self):
+        """Test reversing a transfer moves the amount back in the same transaction."""
+        leg_id = self.transaction_service.search(columns=('id',))[0][0] # type: ignore
+        with patch('builtins.print'):
+            self.assertEqual(self.transaction_service.del_transfer(leg_id, reverse_balances=True), 1)
+
+        self.assertEqual(self.legs(), [])
+        self.assertEqual(self.balances(), {"Checking": Decimal("1000"), "Visa": Decimal("0")})
+        self.assertEqual(CategoryTotalsDBService(self.db).check_consistency(), [])
+
+    def test_failed_second_leg_leaves_nothing(self):
+        """Test a transfer whose legs cannot both be stored keeps neither leg nor the balance change."""
+        with patch('builtins.print'):
+            with patch.object(self.db, 'last_insert_ids', return_value=[99]):
+                self.assertIsNone(self.transaction_service.add_transfer("2024-01-20", 50.00, 1, 2, ""))
+
+            # Inside a caller's transaction the whole unit is rolled back
+            with patch.object(self.transaction_service.account_db_service, 'add_transfer', return_value=1):
+                with self.assertRaises(TransactionError):
+                    with self.db.transaction():
+                        self.assertIsNone(self.transaction_service.add_transfer("2024-01-20", 50.00, 1, 2, ""))
+
+        self.assertEqual(len(self.legs()), 2)
+        self.assertEqual(self.balances(), {"Checking": Decimal("900"), "Visa": Decimal("-100")})
+
+    def test_failed_reversal_inside_outer_transaction_keeps_the_transfer(self):
+        """Test a failed del_transfer in a caller's transaction deletes no leg and moves no money."""
+        leg_id = self.transaction_service.search(columns=('id',))[0][0] # type: ignore
+        with patch('builtins.print'):
+            with patch.object(self.transaction_service.account_db_service, 'add_transfer', return_value=1):
+                with self.assertRaises(TransactionError):
+                    with self.db.transaction():
+                        self.assertIsNone(self.transaction_service.del_transfer(leg_id, reverse_balances=True))
+
+        self.assertEqual(len(self.legs()), 2)
+        self.assertEqual(self.balances(), {"Checking": Decimal("900"), "Visa": Decimal("-100")})
+        self.assertEqual(CategoryTotalsDBService(self.db).check_consistency(), [])
+
+    def test_legacy_transfers_are_linked(self):
+        """Test a transfer stored as one incoming row gets its outgoing leg during validation."""
+        transfer_category = self.transaction_service.search(columns=('category_id',))[0][0] # type: ignore
+        self.db.connect()
+        self.db.execute_query(
+            "INSERT INTO transactions (date, description, amount, category, type, account, notes) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            ("2023-12-01", "Transfer from Visa to Checking", 40.00, transfer_category, "Transfer", 1, "old")
+        )
+        legacy_id = self.db.execute_query("SELECT MAX(id) FROM transactions")[0][0] # type: ignore
+        self.db.close()
+        with patch('builtins.print'):
+            CategoryTotalsDBService(self.db).rebuild()
+
+        for expected in (1, 0):
+            with patch('builtins.print') as mock_print:
+                self.assertTrue(DatabaseInitializer(self.db).initialize_database(force_validation=True))
+            # Linked once, nothing is left to link the second time
+            self.assertEqual(mock_print.call_args_list.count(call("Added the outgoing leg to 1 earlier transfers")), expected)
+
+        self.assertIn((2, Decimal("-40.00"), legacy_id), self.legs())
+        self.assertIn((1, Decimal("40.00"), legacy_id), self.legs())
+        self.assertEqual(CategoryTotalsDBService(self.db).check_consistency(), [])
+
+    def test_single_row_transfer_cannot_be_reversed(self):
+        """Test a transfer without its other leg can be deleted but not reversed."""
+        self.db.connect()
+        self.db.execute_query(
+            "INSERT INTO transactions (date, description, amount, category, type, account, notes) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            ("2023-12-01", "Transfer from Savings to Checking", 40.00, None, "Transfer", 1, "")
+        )
+        legacy_id = self.db.execute_query("SELECT MAX(id) FROM transactions")[0][0] # type: ignore
+        self.db.close()
+
+        with patch('builtins.print'):
+            self.assertIsNone(self.transaction_service.del_transfer(legacy_id, reverse_balances=True))
+            self.assertEqual(self.transaction_service.del_transfer(legacy_id), 1)
+        self.assertEqual(len(self.legs()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
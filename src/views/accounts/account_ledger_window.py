@@ -0,0 +1,109 @@
+from PyQt6.QtWidgets import (
+    QComboBox, QFormLayout, QHBoxLayout, QLabel, QPushButton, QVBoxLayout,
+    QTableWidget, QTableWidgetItem, QMessageBox
+)
+from PyQt6.QtCore import Qt
+
+from views.common.popup_window import PopUpWindow
+from controllers.db.account_db_service import AccountDBService
+from controllers.db.transaction_db_service import TransactionDBService
+from utils.number_formatter import NumberFormatter
+
+class AccountLedgerWindow(PopUpWindow):
+    def __init__(self, window_name: str, min_width: int, min_height: int, db, parent=None) -> None:
+        super().__init__(window_name, min_width, min_height, db, parent)
+
+        self.accounts_db_service = AccountDBService(self.get_db())
+        self.transaction_db_service = TransactionDBService(self.get_db())
+        self.cursor = None
+
+        self.setup_ui()
+        self.load_ledger()
+
+    def setup_ui(self):
+        main_layout = QVBoxLayout()
+
+        title_label = QLabel("Account Ledger")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(title_label)
+
+        form_layout = QFormLayout()
+
+        self.account_combo = QComboBox()
+        self.load_accounts()
+        self.account_combo.currentIndexChanged.connect(self.load_ledger)
+        form_layout.addRow("Account:", self.account_combo)
+
+        main_layout.addLayout(form_layout)
+
+        self.ledger_table = QTableWidget()
+        self.ledger_table.setColumnCount(6)
+        self.ledger_table.setHorizontalHeaderLabels(["Date", "Description", "Category", "Type", "Amount", "Balance"])
+        main_layout.addWidget(self.ledger_table)
+
+        button_layout = QHBoxLayout()
+
+        self.load_more_btn = QPushButton("Load More")
+        self.load_more_btn.setAutoDefault(False)
+        self.load_more_btn.clicked.connect(self.load_more_ledger)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+
+        button_layout.addWidget(self.load_more_btn)
+        button_layout.addWidget(close_btn)
+
+        main_layout.addLayout(button_layout)
+
+        self.setLayout(main_layout)
+
+    def load_accounts(self):
+        """Load accounts from database into combo box"""
+        self.account_combo.clear()
+        try:
+            accounts = self.accounts_db_service.select_name_id_all_accounts()
+            if accounts and isinstance(accounts, list):
+                for account in accounts:
+                    # account is (id, name)
+                    self.account_combo.addItem(str(account[1]), account[0])
+        except Exception as e:
+            print(f"Error loading accounts: {e}")
+            QMessageBox.warning(self, "Error", "Could not load accounts from database.")
+
+    def load_ledger(self):
+        """Load the newest page of the selected account's ledger"""
+        self.ledger_table.setRowCount(0)
+        self.cursor = None
+        self.load_more_ledger()
+
+    def load_more_ledger(self):
+        """Appends the next, older page of the ledger to the table"""
+        account_id = self.account_combo.currentData()
+        if account_id is None:
+            self.load_more_btn.setEnabled(False)
+            return
+
+        try:
+            rows, self.cursor = self.transaction_db_service.account_ledger_page(account_id, page_size=500, cursor=self.cursor)
+            if rows is None:
+                raise RuntimeError("Ledger search failed")
+
+            row_count = self.ledger_table.rowCount()
+            self.ledger_table.setRowCount(row_count + len(rows))
+            for i, row in enumerate(rows, start=row_count):
+                # row is (id, date, description, category, type, amount, balance)
+                for j, value in enumerate(row[1:]):
+                    if j >= 4:  # Amount and balance columns
+                        item = QTableWidgetItem(NumberFormatter.safe_format_table_amount(value))
+                    else:
+                        item = QTableWidgetItem("" if value is None else str(value))
+                    self.ledger_table.setItem(i, j, item)
+
+            if rows and row_count == 0:
+                self.ledger_table.resizeColumnsToContents()
+        except Exception as e:
+            print(f"Error loading ledger: {e}")
+            QMessageBox.warning(self, "Error", "Could not load the account ledger.")
+            self.cursor = None
+
+        self.load_more_btn.setEnabled(self.cursor is not None)
@@ -4,6 +4,7 @@ from PyQt6.QtCore import Qt
 from controllers.db.account_db_service import AccountDBService
 from controllers.db.transaction_db_service import TransactionDBService
 from views.common.popup_window import PopUpWindow
+from database_connector import TransactionError
 
 class DelAccountsWindow(PopUpWindow):
     def __init__(self, window_name: str, min_width: int, min_height: int, db, parent=None) -> None:
@@ -92,30 +93,28 @@ class DelAccountsWindow(PopUpWindow):
         print(f"Deleting Account:")
         print(f"Name: {selected_account}")
 
-        if is_transfer and transfer_account and transfer_account != selected_account:
-            print(f"Transferring transactions to: {transfer_account}")
-            transfer_result = self.account_db_service.transfer_transactions(self.id_from_name(selected_account), self.id_from_name(transfer_account))
-            print(f"Transactions moved: {transfer_result}")
-        else:
-            print("Deleting transactions from selected account")
-            try:
-                id = self.account_db_service.search_account(name=selected_account)[0][0] # type: ignore
-                del_transactions_result = self.transaction_db_service.del_account_transactions(id)
-                print(f"Result of Account wide deletion of transactions: {del_transactions_result}")
-            except Exception as e:
-                print(f"Error deleting transactions from {selected_account}")
-
         try:
             account_id = self.id_from_name(selected_account)
             if account_id is None:
                 QMessageBox.warning(self, "Error", "Could not find account to delete.")
                 return
-                
-            result = self.account_db_service.del_account(account_id)
-            if result == 1:
-                QMessageBox.information(self, "Success", "Account deleted successfully!")
-            else:
-                QMessageBox.warning(self, "Error", "Failed to delete account.")
+
+            # Moving or deleting the transactions and deleting the account commit together
+            with self.get_db().transaction():
+                if is_transfer and transfer_account and transfer_account != selected_account:
+                    print(f"Transferring transactions to: {transfer_account}")
+                    transfer_result = self.account_db_service.transfer_transactions(account_id, self.id_from_name(transfer_account))
+                    print(f"Transactions moved: {transfer_result}")
+                else:
+                    print("Deleting transactions from selected account")
+                    del_transactions_result = self.transaction_db_service.del_account_transactions(account_id)
+                    print(f"Result of Account wide deletion of transactions: {del_transactions_result}")
+
+                result = self.account_db_service.del_account(account_id)
+                if result != 1:
+                    raise TransactionError("Account could not be deleted, no changes were made.")
+
+            QMessageBox.information(self, "Success", "Account deleted successfully!")
         except Exception as e:
             print(f"Error Deleting Account:\n{e}")
             QMessageBox.warning(self, "Error", f"An error occurred while deleting: {str(e)}")
@@ -12,9 +12,11 @@ from .common.settings_window import SettingsWindow
 from .categories.modify_categories import ModifyCategoriesWindow
 from .transactions.del_transactions_window import DelTransactionsWindow
 from .transactions.add_transactions_window import AddTransactionsWindow
+from .transactions.import_transactions_window import ImportTransactionsWindow
 from .accounts.add_accounts_window import AddAccountsWindow
 from .transactions.add_transfers_window import AddTransfersWindow
 from .accounts.del_accounts_window import DelAccountsWindow
+from .accounts.account_ledger_window import AccountLedgerWindow
 
 from controllers.db.budget_db_service import BudgetDBService
 from controllers.db.transaction_db_service import TransactionDBService
@@ -69,7 +71,7 @@ class MainWindow(QMainWindow):
     # Close the application
     def closeEvent(self, a0):
         if self.db:
-            self.db.close()
+            self.db.shutdown()
         
         super().closeEvent(a0)
         
@@ -140,6 +142,10 @@ class MainWindow(QMainWindow):
         add_transfer_btn = QPushButton("Add Account Transfer")
         add_transfer_btn.clicked.connect(self.handle_add_transfer)
         button_layout_top.addWidget(add_transfer_btn)
+
+        ledger_btn = QPushButton("View Ledger")
+        ledger_btn.clicked.connect(self.handle_view_ledger)
+        button_layout_top.addWidget(ledger_btn)
  
         button_layout_bottom = QHBoxLayout()
 
@@ -171,10 +177,18 @@ class MainWindow(QMainWindow):
         add_btn = QPushButton("Add Transaction")
         add_btn.clicked.connect(self.handle_add_transaction)
         button_layout.addWidget(add_btn)
+
+        import_btn = QPushButton("Import Transactions")
+        import_btn.clicked.connect(self.handle_import_transactions)
+        button_layout.addWidget(import_btn)
         
         refresh_btn = QPushButton("Refresh")
         refresh_btn.clicked.connect(self.refresh_summary)
         button_layout.addWidget(refresh_btn)
+
+        self.load_more_transactions_btn = QPushButton("Load More")
+        self.load_more_transactions_btn.clicked.connect(self.load_more_transactions)
+        button_layout.addWidget(self.load_more_transactions_btn)
         
         delete_btn = QPushButton("Delete Transaction")
         delete_btn.clicked.connect(self.handle_delete_transaction)
@@ -214,6 +228,10 @@ class MainWindow(QMainWindow):
         self.popup_window.open_window(AddTransactionsWindow("Add Transaction", 400, 500, self.db))
         self.refresh()
 
+    def handle_import_transactions(self):
+        self.popup_window.open_window(ImportTransactionsWindow("Import Transactions", 400, 300, self.db))
+        self.refresh()
+
     def handle_delete_transaction(self):
         self.popup_window.open_window(DelTransactionsWindow("Delete Transaction", 400, 500, self.db))
         self.refresh()
@@ -221,6 +239,9 @@ class MainWindow(QMainWindow):
     def handle_add_transfer(self):
         self.popup_window.open_window(AddTransfersWindow("Add Transfer", 400, 500, self.db))
         self.refresh()
+
+    def handle_view_ledger(self):
+        self.popup_window.open_window(AccountLedgerWindow("Account Ledger", 700, 500, self.db))
     
     def refresh(self):
         self.refresh_summary()
@@ -228,26 +249,36 @@ class MainWindow(QMainWindow):
         self.refresh_budget()
 
     def refresh_summary(self):
+        self.transaction_summary_table.setRowCount(0)
+        self.transaction_cursor = None
+        self.load_more_transactions()
+
+    def load_more_transactions(self):
+        """Appends the next page of transactions to the table"""
         try:
-            results = self.transaction_db_service.search_all()
-            
-            if results and isinstance(results, list):
-                self.transaction_summary_table.setRowCount(len(results))
-                for i, row in enumerate(results):
-                    for j, value in enumerate(row):
-                        # Format amount with currency symbol
-                        if j == 2:  # Amount column
-                            item = QTableWidgetItem(NumberFormatter.safe_format_table_amount(value))
-                        else:
-                            item = QTableWidgetItem(str(value))
-                        self.transaction_summary_table.setItem(i, j, item)
-                        
+            rows, self.transaction_cursor = self.transaction_db_service.search_all_page(page_size=500, cursor=self.transaction_cursor)
+            if rows is None:
+                raise RuntimeError("Transaction search failed")
+
+            row_count = self.transaction_summary_table.rowCount()
+            self.transaction_summary_table.setRowCount(row_count + len(rows))
+            for i, row in enumerate(rows, start=row_count):
+                for j, value in enumerate(row):
+                    # Format amount with currency symbol
+                    if j == 2:  # Amount column
+                        item = QTableWidgetItem(NumberFormatter.safe_format_table_amount(value))
+                    else:
+                        item = QTableWidgetItem(str(value))
+                    self.transaction_summary_table.setItem(i, j, item)
+
+            if rows and row_count == 0:
                 self.transaction_summary_table.resizeColumnsToContents()
-            else:
-                self.transaction_summary_table.setRowCount(0)
         except Exception as e:
             print(f"Error refreshing transactions: {e}")
-            QMessageBox.warning(self, "Error", "Could not refresh transactions.") 
+            QMessageBox.warning(self, "Error", "Could not refresh transactions.")
+            self.transaction_cursor = None
+
+        self.load_more_transactions_btn.setEnabled(self.transaction_cursor is not None)
 
     def refresh_accounts(self):
         try:
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QDate
 from views.common.popup_window import PopUpWindow
+from database_connector import TransactionError
 
 from controllers.db.categories_db_service import CategoriesDBService
 from controllers.db.account_db_service import AccountDBService
@@ -159,13 +160,17 @@ class AddTransactionsWindow(PopUpWindow):
         print(f"Altering account: {is_alter_account}")
         
         try:
-            transaction_result = self.transaction_db_service.add_transaction(
-                date, description, amount, category_id, transaction_type, account_id, notes
-            )
-            if is_alter_account:
-                account_result = self.accounts_db_service.add_transaction(account_id, amount if transaction_type == "Income" else -amount)
-            else:
-                account_result = None
+            # Both writes share one connection and one commit, so the balance cannot drift from the ledger
+            with self.get_db().transaction():
+                transaction_result = self.transaction_db_service.add_transaction(
+                    date, description, amount, category_id, transaction_type, account_id, notes
+                )
+                if is_alter_account:
+                    account_result = self.accounts_db_service.add_transaction(account_id, amount if transaction_type == "Income" else -amount)
+                    if account_result != 1:
+                        raise TransactionError("Account balance could not be updated, the transaction was not added.")
+                else:
+                    account_result = None
             
             if transaction_result == 1 and account_result == 1:
                 QMessageBox.information(self, "Success", "Transaction added successfully and account was updated.")
@@ -126,17 +126,14 @@ class AddTransfersWindow(PopUpWindow):
         print(f"Notes: {notes}")
         
         try:
+            # Records the transfer and moves both balances in one transaction
             transfer_result = self.transaction_db_service.add_transfer(
                 date,  amount, from_account_id, to_account_id, notes
             )
-            account_result = self.accounts_db_service.add_transfer(from_account_id, to_account_id, amount)
             
-            if transfer_result == 1 and account_result == 2:
+            if transfer_result == 1:
                 QMessageBox.information(self, "Success", "Transfer added successfully and both accounts were updated.")
                 self.accept()
-            elif transfer_result == 1:
-                QMessageBox.warning(self, "Warning", "Transfer added successfully but accounts were not updated")
-                self.accept()
             else:
                 QMessageBox.warning(self, "Error", "Failed to add transfer.")
 
@@ -3,6 +3,7 @@ from PyQt6.QtCore import Qt, QDate
 
 from controllers.db.account_db_service import AccountDBService
 from views.common.popup_window import PopUpWindow
+from database_connector import TransactionError
 from controllers.db.transaction_db_service import TransactionDBService
 from utils.number_formatter import NumberFormatter
 
@@ -45,6 +46,11 @@ class DelTransactionsWindow(PopUpWindow):
         self.select_transaction_combo = QComboBox()
         form_layout.addRow("Select Transaction:", self.select_transaction_combo)
 
+        self.load_more_btn = QPushButton("Load More Transactions")
+        self.load_more_btn.setAutoDefault(False)
+        self.load_more_btn.clicked.connect(self.load_more_transactions)
+        form_layout.addRow("", self.load_more_btn)
+
         self.reverse_account_changes_checkbox = QCheckBox()
         form_layout.addRow("Reverse changes to account:", self.reverse_account_changes_checkbox)
 
@@ -67,17 +73,21 @@ class DelTransactionsWindow(PopUpWindow):
         self.setLayout(main_layout)
 
     def load_transactions(self):
-        """Load transactions based on date range"""
+        """Load the first page of transactions in the date range"""
+        self.select_transaction_combo.clear()
+        self.transaction_information: list = []
+        self.cursor = None
+        self.load_more_transactions()
+
+    def load_more_transactions(self):
+        """Append the next page of transactions to the selection"""
         try:
             start_date = self.start_date_input.date().toPyDate()
             end_date = self.end_date_input.date().toPyDate()
-            
-            self.select_transaction_combo.clear()
-            
-            transactions = self.transaction_db_service.search_for_deletion(start_date, end_date)
-            
-            self.transaction_information: list = []
-            if transactions and isinstance(transactions, list):
+
+            transactions, self.cursor = self.transaction_db_service.search_for_deletion_page(start_date, end_date, page_size=200, cursor=self.cursor)
+
+            if transactions is not None:
                 for transaction in transactions:
                     transaction_id = transaction[0]
                     date = transaction[1]
@@ -101,6 +111,9 @@ class DelTransactionsWindow(PopUpWindow):
         except Exception as e:
             print(f"Error loading transactions: {e}")
             QMessageBox.warning(self, "Error", "Could not load transactions.")
+            self.cursor = None
+
+        self.load_more_btn.setEnabled(self.cursor is not None)
 
     def del_transaction(self):
         if self.select_transaction_combo.count() == 0 or self.select_transaction_combo.currentData() is None:
@@ -123,14 +136,21 @@ class DelTransactionsWindow(PopUpWindow):
             return
 
         try:
-            result = self.transaction_db_service.del_transaction(transaction_id)
-            if is_reverse_changes and result == 1:
-                current_index = self.select_transaction_combo.currentIndex()
-                if self.transaction_information[current_index][2] != "Transfer":
+            current_index = self.select_transaction_combo.currentIndex()
+            is_transfer = self.transaction_information[current_index][2] == "Transfer"
+
+            # The deletion and the balance reversal commit together or not at all
+            with self.db_connector.transaction():
+                if is_transfer:
+                    # Both legs go, and the amount moves back to the sending account
+                    result = self.transaction_db_service.del_transfer(transaction_id, reverse_balances=is_reverse_changes)
+                else:
+                    result = self.transaction_db_service.del_transaction(transaction_id)
+                if is_reverse_changes and result == 1 and not is_transfer:
                     reverse_result = self.accounts_db_service.add_transaction(self.transaction_information[current_index][0], -self.transaction_information[current_index][1])
                     print(f"Result for account reversal: {reverse_result}")
-                else:
-                    QMessageBox.warning(self, "Warning", "Transfers currently cannot be reversed... Continuing with deletion.")
+                    if reverse_result != 1:
+                        raise TransactionError("Account balance could not be reversed, the transaction was not deleted.")
             if result == 1:
                 QMessageBox.information(self, "Success", "Transaction deleted successfully!")
                 self.load_transactions()
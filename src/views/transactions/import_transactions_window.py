@@ -0,0 +1,132 @@
+from PyQt6.QtWidgets import (
+    QCheckBox, QVBoxLayout, QPushButton, QFormLayout, QFileDialog,
+    QComboBox, QHBoxLayout, QMessageBox, QLabel
+)
+from PyQt6.QtCore import Qt
+from views.common.popup_window import PopUpWindow
+
+from controllers.db.categories_db_service import CategoriesDBService
+from controllers.db.account_db_service import AccountDBService
+from controllers.transaction_importer import TransactionImporter
+
+class ImportTransactionsWindow(PopUpWindow):
+    def __init__(self, window_name: str, min_width: int, min_height: int, db, parent=None) -> None:
+        super().__init__(window_name, min_width, min_height, db, parent)
+
+        self.categories_db_service = CategoriesDBService(self.get_db())
+        self.accounts_db_service = AccountDBService(self.get_db())
+        self.transaction_importer = TransactionImporter(self.get_db())
+        self.file_path = None
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_layout = QVBoxLayout()
+
+        title_label = QLabel("Import Transactions")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(title_label)
+
+        form_layout = QFormLayout()
+
+        self.file_label = QLabel("No file selected")
+        choose_file_btn = QPushButton("Choose CSV or OFX File")
+        choose_file_btn.setAutoDefault(False)
+        choose_file_btn.clicked.connect(self.choose_file)
+        form_layout.addRow(choose_file_btn, self.file_label)
+
+        self.account_combo = QComboBox()
+        self.load_accounts()
+        form_layout.addRow("Account:", self.account_combo)
+
+        self.category_combo = QComboBox()
+        self.load_categories()
+        form_layout.addRow("Default Category:", self.category_combo)
+
+        self.alter_account_checkbox = QCheckBox()
+        form_layout.addRow("Avoid alterations to account balance:", self.alter_account_checkbox)
+
+        main_layout.addLayout(form_layout)
+
+        button_layout = QHBoxLayout()
+
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.setAutoDefault(False)
+        cancel_btn.clicked.connect(self.reject)
+
+        import_btn = QPushButton("Import")
+        import_btn.clicked.connect(self.import_transactions)
+
+        button_layout.addWidget(cancel_btn)
+        button_layout.addWidget(import_btn)
+
+        main_layout.addLayout(button_layout)
+
+        self.setLayout(main_layout)
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Transactions", "", "Bank statements (*.csv *.ofx *.qfx);;All files (*)")
+        if path:
+            self.file_path = path
+            self.file_label.setText(path)
+
+    def load_categories(self):
+        """Load categories from database into combo box"""
+        self.category_combo.clear()
+        self.category_combo.addItem("None", None)
+        try:
+            categories = self.categories_db_service.select_category_names()
+            if categories and isinstance(categories, list):
+                for category in categories:
+                    # category is (name, id)
+                    self.category_combo.addItem(str(category[1]), category[0])
+        except Exception as e:
+            print(f"Error loading categories: {e}")
+            QMessageBox.warning(self, "Error", "Could not load categories from database.")
+
+    def load_accounts(self):
+        """Load accounts from database into combo box"""
+        self.account_combo.clear()
+        try:
+            accounts = self.accounts_db_service.select_name_id_all_accounts()
+            if accounts and isinstance(accounts, list):
+                for account in accounts:
+                    # account is (name, id)
+                    self.account_combo.addItem(str(account[1]), account[0])
+        except Exception as e:
+            print(f"Error loading accounts: {e}")
+            QMessageBox.warning(self, "Error", "Could not load accounts from database.")
+
+    def import_transactions(self):
+        account_id = self.account_combo.currentData()
+        is_alter_account = True if self.alter_account_checkbox.checkState() == Qt.CheckState.Unchecked else False
+
+        if not self.file_path:
+            QMessageBox.warning(self, "Invalid Input", "Please choose a file to import.")
+            return
+
+        if account_id is None:
+            QMessageBox.warning(self, "Invalid Input", "Please select an account.")
+            return
+
+        try:
+            report = self.transaction_importer.import_file(
+                self.file_path, account_id,
+                default_category_id=self.category_combo.currentData(),
+                update_balance=is_alter_account
+            )
+        except Exception as e:
+            print(f"Error importing transactions: {e}")
+            QMessageBox.warning(self, "Error", f"An error occurred: {str(e)}")
+            return
+
+        summary = (
+            f"Imported {report['imported']} transactions "
+            f"({report['duplicates']} duplicates skipped, {report['invalid']} invalid rows) "
+            f"in {report['seconds']:.1f}s."
+        )
+        if report['error']:
+            QMessageBox.warning(self, "Import Stopped", f"{summary}\n\n{report['error']}")
+        else:
+            QMessageBox.information(self, "Success", summary)
+        self.accept()